@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Multi-process adjudication engine for large comment dumps.
+
+Comments are split into fixed-size chunks and scored by a pool of worker
+processes. Each worker loads the compiled rule index once through the pool
+initializer (memory-mapped when a rules JSON path is given, so workers share
+pages; the index is compiled into ``index_dir`` or a temporary directory,
+never next to the input file), and results are yielded in input order. At
+most ``max_in_flight`` chunks are outstanding at any time, which bounds
+memory no matter how large the input is. Verdicts are identical to the
+single-process path.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Union
+
+from citation_checker import (
+    LatencyHistogram,
+    RuleIndex,
+    _iter_comment_records,
+    adjudicate_comment,
+    adjudicate_comments,
+    load_rule_index,
+)
+
+
+# Per-process state set up by _init_worker.
+_WORKER_INDEX: Optional[RuleIndex] = None
+_WORKER_OPTIONS: Dict[str, Any] = {}
+
+
+def _init_worker(rules: Union[str, Dict[str, Any]], options: Dict[str, Any], index_dir: Optional[str]) -> None:
+    global _WORKER_INDEX, _WORKER_OPTIONS
+    if isinstance(rules, str):
+        # The parent compiled the index already; workers only memory-map it.
+        _WORKER_INDEX = load_rule_index(rules, index_dir=index_dir)
+    else:
+        _WORKER_INDEX = RuleIndex(rules)
+    _WORKER_OPTIONS = options
+
+
+def _adjudicate_chunk(comments: List[str]) -> List[Dict[str, Any]]:
+    top_k = _WORKER_OPTIONS.get("top_k")
+    thresholds = {
+        "exact_threshold": _WORKER_OPTIONS["exact_threshold"],
+        "semantic_threshold": _WORKER_OPTIONS["semantic_threshold"],
+    }
+    if top_k is None:
+        return adjudicate_comments(comments, _WORKER_INDEX, **thresholds)
+    return [
+        adjudicate_comment(comment, _WORKER_INDEX, top_k=top_k, **thresholds)
+        for comment in comments
+    ]
+
+
+def _chunked(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    chunk: List[Any] = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class ShardedAdjudicator:
+    """
+    Process pool that adjudicates comments in ordered, bounded chunks.
+
+    Args:
+        rules: Path to a normalized rules JSON file (its compiled index is
+            built once here and memory-mapped by every worker) or a rules dict.
+        index_dir: Directory to compile the index into and reuse it from on
+            later runs; by default a temporary directory removed on close().
+        workers: Number of worker processes (default: CPU count).
+        chunk_size: Comments sent to a worker per task.
+        max_in_flight: Maximum outstanding chunks (default: 2 x workers).
+        exact_threshold / semantic_threshold / top_k: As in adjudicate_comment.
+
+    Example:
+        >>> with ShardedAdjudicator("rules.json", workers=8) as engine:
+        ...     for verdict in engine.adjudicate(comments):
+        ...         handle(verdict)
+    """
+
+    def __init__(
+        self,
+        rules: Union[str, Dict[str, Any]],
+        *,
+        workers: Optional[int] = None,
+        chunk_size: int = 512,
+        max_in_flight: Optional[int] = None,
+        exact_threshold: float = 0.34,
+        semantic_threshold: float = 0.28,
+        top_k: Optional[int] = None,
+        index_dir: Optional[str] = None,
+    ):
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.chunk_size = max(1, int(chunk_size))
+        self.max_in_flight = max(1, max_in_flight or 2 * self.workers)
+        self._temp_index_dir: Optional[str] = None
+        if isinstance(rules, str):
+            if index_dir is None:
+                index_dir = self._temp_index_dir = tempfile.mkdtemp(prefix="rule-index-")
+            load_rule_index(rules, compile=True, index_dir=index_dir)
+        options = {
+            "exact_threshold": exact_threshold,
+            "semantic_threshold": semantic_threshold,
+            "top_k": top_k,
+        }
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(rules, options, index_dir),
+        )
+
+    def adjudicate(self, comments: Iterable[str]) -> Iterator[Dict[str, Any]]:
+        """Yield one verdict per comment, in input order."""
+        pending: deque = deque()
+        for chunk in _chunked(comments, self.chunk_size):
+            if len(pending) >= self.max_in_flight:
+                yield from pending.popleft().result()
+            pending.append(self._pool.submit(_adjudicate_chunk, chunk))
+        while pending:
+            yield from pending.popleft().result()
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=True, cancel_futures=True)
+        if self._temp_index_dir is not None:
+            shutil.rmtree(self._temp_index_dir, ignore_errors=True)
+            self._temp_index_dir = None
+
+    def __enter__(self) -> "ShardedAdjudicator":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def adjudicate_parallel(
+    comments: Iterable[str],
+    rules: Union[str, Dict[str, Any]],
+    **options: Any,
+) -> List[Dict[str, Any]]:
+    """Adjudicate ``comments`` with a temporary ShardedAdjudicator and return all verdicts."""
+    with ShardedAdjudicator(rules, **options) as engine:
+        return list(engine.adjudicate(comments))
+
+
+def _parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Multi-process Citation Anchoring checker")
+    parser.add_argument("--rules-json", required=True, help="Path to rules JSON file")
+    parser.add_argument(
+        "--comments-file",
+        required=True,
+        help="Newline-delimited comments or JSON records ('-' for stdin)",
+    )
+    parser.add_argument("--output", help="Write NDJSON verdicts here instead of stdout")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=512, help="Comments per worker task")
+    parser.add_argument("--max-in-flight", type=int, help="Outstanding chunks (default: 2 x workers)")
+    parser.add_argument("--top-k", type=int, help="Only score the top-k BM25 candidate rules")
+    parser.add_argument(
+        "--index-dir",
+        help="Keep the compiled rule index here for reuse (default: a temporary directory)",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = _parse_args(argv)
+    source = sys.stdin if args.comments_file == "-" else open(args.comments_file, "r", encoding="utf-8")
+    sink = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    histogram = LatencyHistogram()
+    violations = 0
+    started = time.perf_counter()
+    try:
+        engine = ShardedAdjudicator(
+            args.rules_json,
+            workers=args.workers,
+            chunk_size=args.chunk_size,
+            max_in_flight=args.max_in_flight,
+            top_k=args.top_k,
+            index_dir=args.index_dir,
+        )
+        with engine:
+            records = _iter_comment_records(source)
+            comment_ids: deque = deque()
+
+            def _comments() -> Iterator[str]:
+                for comment_id, comment in records:
+                    comment_ids.append((comment_id, time.perf_counter()))
+                    yield comment
+
+            for result in engine.adjudicate(_comments()):
+                comment_id, submitted = comment_ids.popleft()
+                histogram.record(time.perf_counter() - submitted)
+                if result["verdict"] == "Violation":
+                    violations += 1
+                sink.write(json.dumps({"comment_id": comment_id, **result}, ensure_ascii=False) + "\n")
+                if histogram.count % engine.chunk_size == 0:
+                    sink.flush()
+        sink.flush()
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if sink is not sys.stdout:
+            sink.close()
+
+    elapsed = time.perf_counter() - started
+    rate = histogram.count / elapsed if elapsed > 0 else 0.0
+    print(
+        f"Adjudicated {histogram.count} comments ({violations} violations) in {elapsed:.3f}s "
+        f"with {engine.workers} workers: {rate:.1f} comments/sec, "
+        f"p50 {histogram.percentile(0.50) * 1000:.3f} ms, p99 {histogram.percentile(0.99) * 1000:.3f} ms",
+        file=sys.stderr,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
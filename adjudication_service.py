@@ -0,0 +1,428 @@
+#!/usr/bin/env python3
+"""
+Asyncio HTTP adjudication service with dynamic micro-batching.
+
+Serves ``POST /api/v1/disputes/analyze`` from the design spec for text
+content. Rule indexes stay resident in memory, one per ``rule_set_id``.
+Concurrent requests for the same rule set are collected by a MicroBatcher
+for at most ``max_wait_ms`` (or until ``max_batch_size`` requests are queued)
+and scored together with one ``adjudicate_comments`` call on a worker thread;
+each request's future is then resolved with its own verdict.
+
+Usage:
+    python adjudication_service.py --rules default=rules.json --port 8080
+"""
+
+import argparse
+import asyncio
+import functools
+import json
+import sys
+import time
+import uuid
+from concurrent.futures import Executor, ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from citation_checker import RuleIndex, adjudicate_comments, load_rule_index
+from verdict_cache import VerdictCache
+
+
+ANALYZE_PATH = "/api/v1/disputes/analyze"
+HEALTH_PATH = "/api/v1/health"
+MAX_BODY_BYTES = 1024 * 1024
+
+_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+}
+
+
+class ServiceUnavailable(RuntimeError):
+    """Raised for requests a stopped MicroBatcher can no longer answer."""
+
+
+class MicroBatcher:
+    """
+    Collect concurrent adjudication requests and score them in one batch.
+
+    A batch closes when ``max_batch_size`` comments are queued or
+    ``max_wait_ms`` has passed since its first comment arrived, whichever
+    comes first. Scoring runs in ``executor`` so the event loop stays
+    responsive while a batch is being processed. With a ``cache``, repeated
+    comments are answered without entering a batch. ``stop()`` fails every
+    request still queued or batched with ServiceUnavailable, so no caller
+    is left waiting.
+    """
+
+    def __init__(
+        self,
+        index: RuleIndex,
+        *,
+        max_batch_size: int = 64,
+        max_wait_ms: float = 5.0,
+        executor: Optional[Executor] = None,
+        cache: Optional[VerdictCache] = None,
+    ):
+        self.index = index
+        self.cache = cache
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.executor = executor
+        self.batches = 0
+        self.comments = 0
+        self.largest_batch = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        # Requests taken off the queue and not yet answered.
+        self._batch: List[Tuple[str, asyncio.Future]] = []
+        self._stopped = False
+
+    def start(self) -> None:
+        self._stopped = False
+        if self._worker is None:
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        self._stopped = True
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        pending = [future for _, future in self._batch]
+        self._batch = []
+        while self._queue is not None and not self._queue.empty():
+            pending.append(self._queue.get_nowait()[1])
+        for future in pending:
+            if not future.done():
+                future.set_exception(ServiceUnavailable("Adjudication service is shutting down"))
+
+    async def submit(self, comment: str) -> Dict[str, Any]:
+        if self._stopped:
+            raise ServiceUnavailable("Adjudication service is shutting down")
+        self.start()
+        key = None
+        if self.cache is not None:
+            key = self.cache.make_key(comment, self.index)
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((comment, future))
+        verdict = await future
+        if key is not None:
+            self.cache.put(key, verdict)
+        return verdict
+
+    async def _collect(self) -> List[Tuple[str, asyncio.Future]]:
+        loop = asyncio.get_running_loop()
+        # Kept on the instance so stop() can fail a half-collected batch.
+        self._batch = batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            comments = [comment for comment, _ in batch]
+            try:
+                results = await loop.run_in_executor(
+                    self.executor, functools.partial(adjudicate_comments, comments, self.index)
+                )
+            except Exception as exc:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+                self._batch = []
+                continue
+            self.batches += 1
+            self.comments += len(batch)
+            self.largest_batch = max(self.largest_batch, len(batch))
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+            self._batch = []
+
+
+class AdjudicationService:
+    """
+    HTTP front end over resident rule indexes, one MicroBatcher per rule set.
+
+    Args:
+        rule_sets: Mapping of rule_set_id to a RuleIndex or rules dict.
+        max_batch_size / max_wait_ms: Micro-batching limits per rule set.
+        default_rule_set: Used when a request omits ``rule_set_id``
+            (defaults to the only rule set, if exactly one is loaded).
+        verdict_cache: Optional VerdictCache shared by all rule sets; keys
+            include the rulebook fingerprint, so rule sets never collide.
+    """
+
+    def __init__(
+        self,
+        rule_sets: Dict[str, Any],
+        *,
+        max_batch_size: int = 64,
+        max_wait_ms: float = 5.0,
+        default_rule_set: Optional[str] = None,
+        verdict_cache: Optional[VerdictCache] = None,
+    ):
+        self.verdict_cache = verdict_cache
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="adjudicate")
+        self.batchers = {
+            rule_set_id: MicroBatcher(
+                rules if isinstance(rules, RuleIndex) else RuleIndex(rules),
+                max_batch_size=max_batch_size,
+                max_wait_ms=max_wait_ms,
+                executor=self.executor,
+                cache=verdict_cache,
+            )
+            for rule_set_id, rules in rule_sets.items()
+        }
+        if default_rule_set is None and len(self.batchers) == 1:
+            default_rule_set = next(iter(self.batchers))
+        self.default_rule_set = default_rule_set
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8080) -> asyncio.AbstractServer:
+        for batcher in self.batchers.values():
+            batcher.start()
+        self._server = await asyncio.start_server(self._handle_connection, host, port)
+        return self._server
+
+    @property
+    def port(self) -> Optional[int]:
+        if self._server is None or not self._server.sockets:
+            return None
+        return self._server.sockets[0].getsockname()[1]
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        for batcher in self.batchers.values():
+            await batcher.stop()
+        self.executor.shutdown(wait=False)
+
+    async def analyze(self, payload: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+        started = time.perf_counter()
+        rule_set_id = payload.get("rule_set_id") or self.default_rule_set
+        batcher = self.batchers.get(rule_set_id)
+        if batcher is None:
+            return 404, {"error": f"Unknown rule_set_id: {rule_set_id!r}"}
+
+        content = payload.get("content")
+        if isinstance(content, dict):
+            if content.get("type", "text") != "text":
+                return 400, {"error": "Only text content can be analyzed"}
+            text = content.get("data")
+        else:
+            text = payload.get("comment", content)
+        if not isinstance(text, str):
+            return 400, {"error": "Request must include content.data text"}
+
+        verdict = await batcher.submit(text)
+        return 200, {
+            "analysis_id": str(uuid.uuid4()),
+            "dispute_id": payload.get("dispute_id"),
+            "rule_set_id": rule_set_id,
+            "status": "completed",
+            "verdict": verdict,
+            "processing_metadata": {
+                "analysis_duration_ms": round((time.perf_counter() - started) * 1000, 3),
+                "created_at": datetime.now(timezone.utc).isoformat(),
+            },
+        }
+
+    def health(self) -> Dict[str, Any]:
+        return {
+            "status": "ok",
+            "verdict_cache": self.verdict_cache.stats() if self.verdict_cache else None,
+            "rule_sets": {
+                rule_set_id: {
+                    "rules": len(batcher.index),
+                    "batches": batcher.batches,
+                    "comments": batcher.comments,
+                    "largest_batch": batcher.largest_batch,
+                }
+                for rule_set_id, batcher in self.batchers.items()
+            },
+        }
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                request = await _read_request(reader)
+                if request is None:
+                    break
+                method, path, headers, body = request
+                status, payload = await self._dispatch(method, path, body)
+                keep_alive = headers.get("connection", "").lower() != "close"
+                _write_response(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except _HttpError as exc:
+            _write_response(writer, exc.status, {"error": exc.message}, keep_alive=False)
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def _dispatch(self, method: str, path: str, body: bytes) -> Tuple[int, Dict[str, Any]]:
+        if path == HEALTH_PATH:
+            if method != "GET":
+                return 405, {"error": "Use GET"}
+            return 200, self.health()
+        if path != ANALYZE_PATH:
+            return 404, {"error": f"No route for {path}"}
+        if method != "POST":
+            return 405, {"error": "Use POST"}
+        try:
+            payload = json.loads(body.decode("utf-8") or "{}")
+        except (UnicodeDecodeError, json.JSONDecodeError):
+            return 400, {"error": "Body must be JSON"}
+        if not isinstance(payload, dict):
+            return 400, {"error": "Body must be a JSON object"}
+        try:
+            return await self.analyze(payload)
+        except ServiceUnavailable as exc:
+            return 503, {"error": str(exc)}
+        except Exception as exc:
+            return 500, {"error": str(exc)}
+
+
+class _HttpError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+async def _read_request(reader: asyncio.StreamReader):
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+    try:
+        method, target, _ = request_line.decode("latin-1").split(" ", 2)
+    except ValueError:
+        raise _HttpError(400, "Malformed request line")
+
+    headers: Dict[str, str] = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    try:
+        length = int(headers.get("content-length", "0"))
+    except ValueError:
+        raise _HttpError(400, "Invalid Content-Length")
+    if length < 0:
+        raise _HttpError(400, "Invalid Content-Length")
+    if length > MAX_BODY_BYTES:
+        raise _HttpError(413, "Request body too large")
+    body = await reader.readexactly(length) if length else b""
+    return method.upper(), target.split("?", 1)[0], headers, body
+
+
+def _write_response(writer: asyncio.StreamWriter, status: int, payload: Dict[str, Any], keep_alive: bool) -> None:
+    body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    head = (
+        f"HTTP/1.1 {status} {_REASONS.get(status, 'Error')}\r\n"
+        "Content-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    writer.write(head.encode("latin-1") + body)
+
+
+def _parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Citation Anchoring HTTP service")
+    parser.add_argument(
+        "--rules",
+        action="append",
+        required=True,
+        metavar="RULE_SET_ID=PATH",
+        help="Rule set to keep resident (normalized rules JSON); repeat for several",
+    )
+    parser.add_argument(
+        "--compile-index",
+        action="store_true",
+        help="Write compiled rule indexes so later starts can memory-map them",
+    )
+    parser.add_argument(
+        "--index-dir",
+        help="Directory for compiled rule indexes (default: next to each rules JSON file)",
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--max-batch-size", type=int, default=64)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=10000,
+        help="Verdicts kept in the LRU verdict cache (0 disables it)",
+    )
+    parser.add_argument("--cache-ttl", type=float, default=3600.0, help="Verdict cache TTL in seconds")
+    return parser.parse_args(argv)
+
+
+async def _serve(args: argparse.Namespace) -> None:
+    rule_sets = {}
+    for spec in args.rules:
+        rule_set_id, separator, path = spec.partition("=")
+        if not separator:
+            rule_set_id, path = "default", spec
+        rule_sets[rule_set_id] = load_rule_index(path, compile=args.compile_index, index_dir=args.index_dir)
+
+    verdict_cache = None
+    if args.cache_size > 0:
+        verdict_cache = VerdictCache(max_entries=args.cache_size, ttl_seconds=args.cache_ttl)
+    service = AdjudicationService(
+        rule_sets,
+        max_batch_size=args.max_batch_size,
+        max_wait_ms=args.max_wait_ms,
+        verdict_cache=verdict_cache,
+    )
+    server = await service.start(args.host, args.port)
+    print(f"Serving {ANALYZE_PATH} on http://{args.host}:{service.port}", file=sys.stderr)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    try:
+        asyncio.run(_serve(_parse_args(argv)))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
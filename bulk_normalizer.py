@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Parallel bulk normalization of many rulebooks.
+
+Onboarding a batch of communities means normalizing hundreds of rule files.
+Files are distributed over a process pool; each worker loads the spaCy
+pipeline once in the pool initializer and then normalizes whole files. Every
+input produces one ``<name>.json`` in the output directory (written
+atomically) and one report entry with its timing. A file that cannot be read
+or normalized is reported as a failure without stopping the run.
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+import normalizer
+from normalization_cache import NormalizationCache
+
+
+# Per-process state set up by _init_worker.
+_WORKER_OPTIONS: Dict[str, Any] = {}
+_WORKER_CACHE: Optional[NormalizationCache] = None
+
+
+def _init_worker(options: Dict[str, Any], cache_dir: Optional[str] = None) -> None:
+    global _WORKER_OPTIONS, _WORKER_CACHE
+    _WORKER_OPTIONS = options
+    _WORKER_CACHE = NormalizationCache(cache_dir) if cache_dir else None
+    # Load the pipeline once per worker rather than on the first file.
+    normalizer.get_nlp()
+
+
+def _normalize_file(input_path: str, output_path: str) -> Dict[str, Any]:
+    started = time.perf_counter()
+    report: Dict[str, Any] = {"input": input_path, "output": output_path}
+    try:
+        with open(input_path, "r", encoding="utf-8") as handle:
+            raw_text = handle.read()
+        if _WORKER_CACHE is not None:
+            hits = _WORKER_CACHE.hits
+            rules_json = _WORKER_CACHE.normalize(raw_text, **_WORKER_OPTIONS)
+            report["cached"] = _WORKER_CACHE.hits > hits
+        else:
+            rules_json = normalizer.normalize_rules_to_json(raw_text, **_WORKER_OPTIONS)
+        _write_json_atomic(output_path, rules_json)
+        report.update(status="ok", rules=len(rules_json["rules"]))
+    except Exception as exc:  # one bad file must not abort the batch
+        report.update(status="error", error=f"{type(exc).__name__}: {exc}")
+    report["seconds"] = round(time.perf_counter() - started, 4)
+    return report
+
+
+def _write_json_atomic(path: str, payload: Dict[str, Any]) -> None:
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            json.dump(payload, handle, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def discover_inputs(source: str, pattern: str = ".txt") -> List[str]:
+    """
+    Rule files to normalize from a directory or a manifest.
+
+    Args:
+        source: A directory (every file ending in ``pattern``, sorted) or a
+            manifest file: a JSON list of paths, or one path per line.
+            Relative manifest paths are resolved against the manifest's folder.
+        pattern: File suffix selected from a directory.
+    """
+    if os.path.isdir(source):
+        return sorted(
+            os.path.join(source, name)
+            for name in os.listdir(source)
+            if name.endswith(pattern) and os.path.isfile(os.path.join(source, name))
+        )
+
+    with open(source, "r", encoding="utf-8") as handle:
+        content = handle.read()
+    if source.endswith(".json"):
+        entries = json.loads(content)
+        if not isinstance(entries, list):
+            raise ValueError(f"Manifest {source} must contain a JSON list of paths")
+    else:
+        entries = [line.strip() for line in content.splitlines()]
+    base = os.path.dirname(os.path.abspath(source))
+    return [
+        entry if os.path.isabs(entry) else os.path.join(base, entry)
+        for entry in (str(item) for item in entries)
+        if entry and not entry.startswith("#")
+    ]
+
+
+def _output_paths(inputs: List[str], output_dir: str) -> List[Tuple[str, str]]:
+    """Pair each input with ``output_dir/<stem>.json``, disambiguating repeated stems."""
+    pairs = []
+    used: Dict[str, int] = {}
+    for input_path in inputs:
+        stem = os.path.splitext(os.path.basename(input_path))[0]
+        count = used.get(stem, 0)
+        used[stem] = count + 1
+        name = f"{stem}.json" if count == 0 else f"{stem}_{count + 1}.json"
+        pairs.append((input_path, os.path.join(output_dir, name)))
+    return pairs
+
+
+def normalize_bulk(
+    inputs: List[str],
+    output_dir: str,
+    *,
+    workers: Optional[int] = None,
+    prefix: str = "rule",
+    start_num: int = 1,
+    padding: int = 3,
+    batch_size: int = normalizer.NLP_BATCH_SIZE,
+    cache_dir: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Normalize every input file in a process pool.
+
+    Returns one report per input, in input order, with ``status`` ("ok" or
+    "error"), ``rules`` or ``error``, ``seconds`` and the input/output paths.
+    With ``cache_dir``, workers share a NormalizationCache there and each
+    report also says whether the result was ``cached``.
+
+    Example:
+        >>> reports = normalize_bulk(discover_inputs("examples"), "normalized", workers=8)
+        >>> [r["input"] for r in reports if r["status"] == "error"]
+    """
+    options = {"prefix": prefix, "start_num": start_num, "padding": padding, "batch_size": batch_size}
+    pairs = _output_paths(inputs, output_dir)
+    if not pairs:
+        return []
+    os.makedirs(output_dir, exist_ok=True)
+    workers = max(1, min(workers or os.cpu_count() or 1, len(pairs)))
+    reports = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(options, cache_dir)) as pool:
+        futures = [pool.submit(_normalize_file, input_path, output_path) for input_path, output_path in pairs]
+        for (input_path, output_path), future in zip(pairs, futures):
+            try:
+                reports.append(future.result())
+            except Exception as exc:  # e.g. a worker process died
+                reports.append({
+                    "input": input_path,
+                    "output": output_path,
+                    "status": "error",
+                    "error": f"{type(exc).__name__}: {exc}",
+                    "seconds": 0.0,
+                })
+    return reports
+
+
+def _parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Normalize many rulebooks in parallel")
+    parser.add_argument("source", help="Directory of rule files or a manifest (JSON list or one path per line)")
+    parser.add_argument("--output-dir", required=True, help="Directory for the normalized JSON files")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: CPU count)")
+    parser.add_argument("--pattern", default=".txt", help="File suffix to pick up from a directory")
+    parser.add_argument("--prefix", default="rule", help="Prefix for rule identifiers")
+    parser.add_argument("--report", help="Write the per-file report as JSON here")
+    parser.add_argument("--cache-dir", help="Reuse normalization results cached in this directory")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = _parse_args(argv)
+    started = time.perf_counter()
+    inputs = discover_inputs(args.source, args.pattern)
+    reports = normalize_bulk(
+        inputs, args.output_dir, workers=args.workers, prefix=args.prefix, cache_dir=args.cache_dir
+    )
+    elapsed = time.perf_counter() - started
+
+    for report in reports:
+        if report["status"] == "ok":
+            print(f"ok     {report['seconds']:8.3f}s  {report['rules']:5d} rules  {report['input']}", file=sys.stderr)
+        else:
+            print(f"FAILED {report['seconds']:8.3f}s  {report['input']}: {report['error']}", file=sys.stderr)
+    failures = sum(1 for report in reports if report["status"] != "ok")
+    print(
+        f"Normalized {len(reports) - failures}/{len(reports)} rulebooks in {elapsed:.3f}s "
+        f"({failures} failed)",
+        file=sys.stderr,
+    )
+    if args.report:
+        _write_json_atomic(args.report, {"elapsed_seconds": round(elapsed, 3), "files": reports})
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
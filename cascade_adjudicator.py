@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+Tiered adjudication: the local scorer first, the LLM only for ambiguous cases.
+
+Most comments are clear-cut for ``citation_checker.adjudicate_comment``: they
+either score far above the violation thresholds or nowhere near them. The
+CascadeAdjudicator scores every comment locally and escalates to the LLM
+(``normalizer.adjudicate_dispute``, or an AsyncDisputeAdjudicator for
+batches) only when the best rule's ``combined_score`` falls inside a
+configurable uncertainty band around the thresholds. Every verdict records
+the tier that decided it, and ``stats()`` reports the escalation rate and the
+time spent per tier so the band can be tuned for cost against latency.
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from citation_checker import RuleIndex, adjudicate_comment, adjudicate_comments
+
+
+TIER_LOCAL = "local"
+TIER_LLM = "llm"
+
+# Default band: scores between these go to the LLM. It brackets the default
+# semantic (0.28) and exact (0.34) thresholds.
+DEFAULT_UNCERTAINTY_BAND = (0.2, 0.45)
+
+# Local verdicts with these flags have nothing for the LLM to decide.
+_FINAL_FLAGS = frozenset({"EMPTY_COMMENT", "NO_RULES"})
+
+
+def _default_llm(comment: str, rules_json: Dict[str, Any]) -> Dict[str, Any]:
+    from normalizer import adjudicate_dispute
+    return adjudicate_dispute(comment, rules_json)
+
+
+class CascadeAdjudicator:
+    """
+    Local-first adjudicator for one rulebook.
+
+    Args:
+        rules_json: Rules JSON or a prebuilt RuleIndex.
+        uncertainty_band: ``(lower, upper)``; a local verdict whose
+            ``combined_score`` (its confidence) satisfies
+            ``lower <= score < upper`` is escalated. ``(0, 0)`` never escalates.
+        exact_threshold, semantic_threshold, top_k: Local scorer options.
+        llm: ``llm(comment, rules_json) -> verdict`` called once per
+            escalation (default ``normalizer.adjudicate_dispute``).
+        async_llm: Optional AsyncDisputeAdjudicator used instead of ``llm``;
+            a batch's escalations are then sent concurrently. They all run on
+            one event loop owned by the cascade, on a background thread, so
+            the adjudicator's client and limits stay valid across calls;
+            ``close()`` (or leaving a ``with`` block) stops it.
+
+    Each returned verdict carries ``"tier"`` ("local" or "llm"); escalated
+    ones also keep the ``"local_score"`` that sent them up. If the LLM call
+    fails, the local verdict stands, flagged ``LLM_UNAVAILABLE``.
+
+    Example:
+        >>> cascade = CascadeAdjudicator(rules_json, uncertainty_band=(0.2, 0.45))
+        >>> verdicts = cascade.adjudicate_many(comments)
+        >>> cascade.stats()["escalation_rate"]
+    """
+
+    def __init__(
+        self,
+        rules_json: Union[Dict[str, Any], RuleIndex],
+        *,
+        uncertainty_band: Tuple[float, float] = DEFAULT_UNCERTAINTY_BAND,
+        exact_threshold: float = 0.34,
+        semantic_threshold: float = 0.28,
+        top_k: Optional[int] = None,
+        llm: Optional[Callable[[str, Dict[str, Any]], Dict[str, Any]]] = None,
+        async_llm: Any = None,
+    ):
+        lower, upper = uncertainty_band
+        if lower > upper:
+            raise ValueError(f"Uncertainty band lower bound {lower} exceeds upper bound {upper}")
+        self.index = rules_json if isinstance(rules_json, RuleIndex) else RuleIndex(rules_json)
+        self.rules_json = {"rules": self.index.rules}
+        self.uncertainty_band = (float(lower), float(upper))
+        self.exact_threshold = exact_threshold
+        self.semantic_threshold = semantic_threshold
+        self.top_k = top_k
+        self._llm = llm or _default_llm
+        self._async_llm = async_llm
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.decided = {TIER_LOCAL: 0, TIER_LLM: 0}
+        self.escalated = 0
+        self.llm_errors = 0
+        self.seconds = {TIER_LOCAL: 0.0, TIER_LLM: 0.0}
+
+    def is_uncertain(self, verdict: Dict[str, Any]) -> bool:
+        if _FINAL_FLAGS.intersection(verdict.get("flags") or ()):
+            return False
+        lower, upper = self.uncertainty_band
+        return lower <= float(verdict.get("confidence", 0.0)) < upper
+
+    def _record(
+        self,
+        *,
+        local: int = 0,
+        llm: int = 0,
+        escalated: int = 0,
+        errors: int = 0,
+        local_seconds: float = 0.0,
+        llm_seconds: float = 0.0,
+    ) -> None:
+        with self._lock:
+            self.decided[TIER_LOCAL] += local
+            self.decided[TIER_LLM] += llm
+            self.escalated += escalated
+            self.llm_errors += errors
+            self.seconds[TIER_LOCAL] += local_seconds
+            self.seconds[TIER_LLM] += llm_seconds
+
+    def _local(self, comment: str) -> Dict[str, Any]:
+        return adjudicate_comment(
+            comment,
+            self.index,
+            exact_threshold=self.exact_threshold,
+            semantic_threshold=self.semantic_threshold,
+            top_k=self.top_k,
+        )
+
+    @staticmethod
+    def _escalated(local_verdict: Dict[str, Any], llm_result: Any) -> Tuple[Dict[str, Any], str]:
+        if isinstance(llm_result, BaseException) or not isinstance(llm_result, dict):
+            verdict = dict(local_verdict, flags=list(local_verdict.get("flags") or []) + ["LLM_UNAVAILABLE"])
+            return verdict, TIER_LOCAL
+        verdict = dict(llm_result, local_score=local_verdict.get("confidence", 0.0))
+        return verdict, TIER_LLM
+
+    def adjudicate(self, comment: str) -> Dict[str, Any]:
+        started = time.perf_counter()
+        verdict = self._local(comment)
+        local_seconds = time.perf_counter() - started
+        if not self.is_uncertain(verdict):
+            self._record(local=1, local_seconds=local_seconds)
+            return dict(verdict, tier=TIER_LOCAL)
+
+        started = time.perf_counter()
+        llm_result = self._escalate([comment])[0]
+        llm_seconds = time.perf_counter() - started
+        verdict, tier = self._escalated(verdict, llm_result)
+        failed = int(tier != TIER_LLM)
+        self._record(local=failed, llm=1 - failed, escalated=1, errors=failed,
+                     local_seconds=local_seconds, llm_seconds=llm_seconds)
+        return dict(verdict, tier=tier)
+
+    def adjudicate_many(self, comments: List[str]) -> List[Dict[str, Any]]:
+        """
+        Score all comments locally in one batch, then escalate the uncertain
+        ones (concurrently through ``async_llm`` when given). Input order is kept.
+        """
+        started = time.perf_counter()
+        if self.top_k is None:
+            local = adjudicate_comments(
+                comments, self.index,
+                exact_threshold=self.exact_threshold, semantic_threshold=self.semantic_threshold,
+            )
+        else:
+            local = [self._local(comment) for comment in comments]
+        local_seconds = time.perf_counter() - started
+
+        uncertain = [position for position, verdict in enumerate(local) if self.is_uncertain(verdict)]
+        results = [dict(verdict, tier=TIER_LOCAL) for verdict in local]
+        llm_seconds = 0.0
+        errors = 0
+        if uncertain:
+            started = time.perf_counter()
+            llm_results = self._escalate([comments[position] for position in uncertain])
+            llm_seconds = time.perf_counter() - started
+            for position, llm_result in zip(uncertain, llm_results):
+                verdict, tier = self._escalated(local[position], llm_result)
+                errors += tier != TIER_LLM
+                results[position] = dict(verdict, tier=tier)
+        self._record(
+            local=len(local) - len(uncertain) + errors,
+            llm=len(uncertain) - errors,
+            escalated=len(uncertain),
+            errors=errors,
+            local_seconds=local_seconds,
+            llm_seconds=llm_seconds,
+        )
+        return results
+
+    def _escalate(self, comments: List[str]) -> List[Any]:
+        """LLM verdicts for ``comments``, with an exception in place of each failure."""
+        if self._async_llm is not None:
+            batch = self._async_llm.adjudicate_many(
+                ((comment, self.rules_json) for comment in comments), return_exceptions=True
+            )
+            return asyncio.run_coroutine_threadsafe(batch, self._event_loop()).result()
+        results: List[Any] = []
+        for comment in comments:
+            try:
+                results.append(self._llm(comment, self.rules_json))
+            except Exception as exc:
+                results.append(exc)
+        return results
+
+    def _event_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._loop_thread = threading.Thread(
+                    target=self._loop.run_forever, name="cascade-escalations", daemon=True
+                )
+                self._loop_thread.start()
+            return self._loop
+
+    def close(self) -> None:
+        """Stop the escalation event loop, if one was started."""
+        with self._lock:
+            loop, thread = self._loop, self._loop_thread
+            self._loop = self._loop_thread = None
+        if loop is not None:
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join()
+            loop.close()
+
+    def __enter__(self) -> "CascadeAdjudicator":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.decided[TIER_LOCAL] + self.decided[TIER_LLM]
+            return {
+                "total": total,
+                "decided_local": self.decided[TIER_LOCAL],
+                "decided_llm": self.decided[TIER_LLM],
+                "escalated": self.escalated,
+                "llm_errors": self.llm_errors,
+                "escalation_rate": round(self.escalated / total, 4) if total else 0.0,
+                "local_seconds": round(self.seconds[TIER_LOCAL], 4),
+                "llm_seconds": round(self.seconds[TIER_LLM], 4),
+                "uncertainty_band": list(self.uncertainty_band),
+            }
+
+
+def _parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Local-first adjudication with LLM escalation")
+    parser.add_argument("rules", help="Normalized rules JSON file")
+    parser.add_argument("comments", help="Comments file (one per line)")
+    parser.add_argument("--band", type=float, nargs=2, metavar=("LOWER", "UPPER"),
+                        default=list(DEFAULT_UNCERTAINTY_BAND),
+                        help="Escalate local scores in [LOWER, UPPER)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent LLM requests for escalations")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = _parse_args(argv)
+    from llm_adjudication import AsyncDisputeAdjudicator
+
+    with open(args.rules, "r", encoding="utf-8") as handle:
+        rules_json = json.load(handle)
+    with open(args.comments, "r", encoding="utf-8") as handle:
+        comments = [line.rstrip("\n") for line in handle if line.strip()]
+
+    with CascadeAdjudicator(
+        rules_json,
+        uncertainty_band=tuple(args.band),
+        async_llm=AsyncDisputeAdjudicator(max_concurrency=args.concurrency),
+    ) as cascade:
+        verdicts = cascade.adjudicate_many(comments)
+    for comment, verdict in zip(comments, verdicts):
+        print(json.dumps({"comment": comment, "verdict": verdict}, ensure_ascii=False))
+    print(f"Cascade stats: {cascade.stats()}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,13 +1,25 @@
 import argparse
+import bisect
+import contextlib
+import contextvars
+import hashlib
+import heapq
 import json
+import logging
 import math
 import os
 import re
-from typing import Any, Dict, List, Optional, Tuple
+import shutil
+import sys
+import tempfile
+import time
+from collections import Counter, deque
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, TextIO, Tuple, Union
 
 try:
+    import numpy as np
+    from scipy import sparse
     from sklearn.feature_extraction.text import TfidfVectorizer
-    from sklearn.metrics.pairwise import cosine_similarity
     SKLEARN_AVAILABLE = True
 except ImportError:
     SKLEARN_AVAILABLE = False
@@ -15,6 +27,8 @@ except ImportError:
 from normalizer import normalize_rules_to_json
 
 
+logger = logging.getLogger(__name__)
+
 STOPWORDS = {
     "a", "an", "and", "are", "as", "at", "be", "but", "by", "for", "from",
     "has", "he", "in", "is", "it", "its", "of", "on", "or", "that", "the",
@@ -22,6 +36,21 @@ STOPWORDS = {
 }
 
 
+# Bump when the on-disk layout written by RuleIndex.save changes.
+INDEX_FORMAT_VERSION = 1
+
+TFIDF_OPTIONS = {"ngram_range": (1, 2), "norm": None}
+
+
+def rulebook_fingerprint(rules_json: Dict[str, Any]) -> str:
+    canonical = json.dumps(rules_json, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _tfidf_analyzer():
+    return TfidfVectorizer(**TFIDF_OPTIONS).build_analyzer()
+
+
 def _normalize_text(text: str) -> str:
     return re.sub(r"\s+", " ", text.lower()).strip()
 
@@ -38,100 +67,637 @@ def _get_rule_keywords(rule: Dict[str, Any]) -> List[str]:
     return [str(keyword).strip() for keyword in keywords if str(keyword).strip()]
 
 
-def _exact_match_score(comment: str, rule: Dict[str, Any]) -> Tuple[float, List[str]]:
-    comment_lower = _normalize_text(comment)
-    keywords = _get_rule_keywords(rule)
-    matched_keywords = [kw for kw in keywords if _normalize_text(kw) in comment_lower]
+class RuleIndex:
+    """
+    Compiled, reusable scoring state for a single rulebook.
 
-    if keywords:
-        score = min(1.0, len(matched_keywords) / max(1, len(keywords)))
-        return score, matched_keywords
+    Build it once from a ``rules_json`` (output of normalizer.py) and pass it
+    to ``adjudicate_comment`` in place of the raw dict. The TF-IDF vocabulary,
+    IDF weights and L2-normalized rule matrix are fitted on the rule texts only,
+    so scoring a comment costs one vectorization plus one sparse dot product.
+    All rule keywords are compiled into one KeywordAutomaton, and the token
+    sets of keyword-less rules into an inverted index, so exact scoring is a
+    single pass over the comment regardless of rulebook size.
+    """
 
-    rule_tokens = set(_tokenize(rule.get("text", "")))
-    comment_tokens = set(_tokenize(comment))
-    if not rule_tokens:
-        return 0.0, []
-    overlap = rule_tokens.intersection(comment_tokens)
-    score = len(overlap) / max(1, len(rule_tokens))
-    return score, list(overlap)
+    def __init__(self, rules_json: Optional[Dict[str, Any]]):
+        rules = rules_json.get("rules") if isinstance(rules_json, dict) else None
+        self.rules: List[Dict[str, Any]] = list(rules or [])
+        self.rule_texts = [rule.get("text", "") for rule in self.rules]
+        self.rule_keywords = [_get_rule_keywords(rule) for rule in self.rules]
+        self.rule_token_sets = [set(_tokenize(text)) for text in self.rule_texts]
+        self.fingerprint = rulebook_fingerprint({"rules": self.rules})
+        self.source_sha256: Optional[str] = None
+        self._compile_keywords()
+        self._build_bm25()
 
+        self.vocabulary: Dict[str, int] = {}
+        self.idf = None
+        self.rule_matrix = None
+        self._analyzer = None
+        self._oov_idf = 0.0
+        if SKLEARN_AVAILABLE and self.rules:
+            self._fit_tfidf()
 
-def _semantic_similarity_scores(comment: str, rules: List[Dict[str, Any]]) -> List[float]:
-    if not rules:
-        return []
+    def __len__(self) -> int:
+        return len(self.rules)
 
-    rule_texts = [rule.get("text", "") for rule in rules]
-    if SKLEARN_AVAILABLE:
-        vectorizer = TfidfVectorizer(ngram_range=(1, 2))
-        vectors = vectorizer.fit_transform([comment] + rule_texts)
-        similarities = cosine_similarity(vectors[0:1], vectors[1:]).flatten()
-        return [float(score) for score in similarities]
+    def save(self, directory: str) -> None:
+        """
+        Write the compiled index to ``directory``.
 
-    comment_tokens = set(_tokenize(comment))
-    scores = []
-    for text in rule_texts:
-        rule_tokens = set(_tokenize(text))
-        if not comment_tokens or not rule_tokens:
-            scores.append(0.0)
-            continue
-        intersection = comment_tokens.intersection(rule_tokens)
-        union = comment_tokens.union(rule_tokens)
-        scores.append(len(intersection) / max(1, len(union)))
-    return scores
+        Numeric arrays (IDF vector and CSR rule matrix) are stored as ``.npy``
+        files so ``load`` can memory-map them; everything else goes into
+        ``manifest.json``. The directory is swapped in atomically.
+        """
+        if not SKLEARN_AVAILABLE:
+            raise RuntimeError("Saving a compiled rule index requires numpy and scikit-learn")
+        parent = os.path.dirname(os.path.abspath(directory))
+        staging = tempfile.mkdtemp(prefix=".rule-index-", dir=parent)
+        try:
+            vocabulary = [""] * len(self.vocabulary)
+            for term, column in self.vocabulary.items():
+                vocabulary[column] = term
+            manifest = {
+                "format_version": INDEX_FORMAT_VERSION,
+                "fingerprint": self.fingerprint,
+                "source_sha256": self.source_sha256,
+                "rules": self.rules,
+                "rule_tokens": [sorted(tokens) for tokens in self.rule_token_sets],
+                "keyword_patterns": self.rule_keyword_patterns,
+                "keyword_owners": self.keyword_owners,
+                "token_postings": self.token_postings,
+                "automaton": self.automaton.to_dict(),
+                "bm25_postings": self.bm25_postings,
+                "vocabulary": vocabulary,
+                "oov_idf": self._oov_idf,
+                "has_matrix": self.rule_matrix is not None,
+            }
+            with open(os.path.join(staging, "manifest.json"), "w", encoding="utf-8") as handle:
+                json.dump(manifest, handle, ensure_ascii=False)
+            if self.rule_matrix is not None:
+                matrix = self.rule_matrix
+                matrix.sort_indices()
+                np.save(os.path.join(staging, "idf.npy"), np.asarray(self.idf))
+                np.save(os.path.join(staging, "rule_matrix_data.npy"), matrix.data)
+                np.save(os.path.join(staging, "rule_matrix_indices.npy"), matrix.indices)
+                np.save(os.path.join(staging, "rule_matrix_indptr.npy"), matrix.indptr)
+
+            retired = None
+            if os.path.isdir(directory):
+                retired = tempfile.mkdtemp(prefix=".rule-index-old-", dir=parent)
+                os.replace(directory, os.path.join(retired, "index"))
+            os.replace(staging, directory)
+            if retired:
+                shutil.rmtree(retired, ignore_errors=True)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+    @classmethod
+    def load(cls, directory: str, *, mmap: bool = True) -> "RuleIndex":
+        """
+        Load an index written by ``save``.
+
+        With ``mmap=True`` the rule matrix and IDF arrays are memory-mapped
+        read-only, so worker processes loading the same index share pages.
+        """
+        if not SKLEARN_AVAILABLE:
+            raise RuntimeError("Loading a compiled rule index requires numpy and scikit-learn")
+        with open(os.path.join(directory, "manifest.json"), "r", encoding="utf-8") as handle:
+            manifest = json.load(handle)
+        if manifest.get("format_version") != INDEX_FORMAT_VERSION:
+            raise ValueError(f"Unsupported rule index format in {directory}")
+
+        index = cls.__new__(cls)
+        index.rules = manifest["rules"]
+        index.rule_texts = [rule.get("text", "") for rule in index.rules]
+        index.rule_keywords = [_get_rule_keywords(rule) for rule in index.rules]
+        index.rule_token_sets = [set(tokens) for tokens in manifest["rule_tokens"]]
+        index.fingerprint = manifest["fingerprint"]
+        index.source_sha256 = manifest.get("source_sha256")
+        index.rule_keyword_patterns = manifest["keyword_patterns"]
+        index.keyword_owners = [
+            [tuple(owner) for owner in owners] for owners in manifest["keyword_owners"]
+        ]
+        index.token_postings = manifest["token_postings"]
+        index.automaton = KeywordAutomaton.from_dict(manifest["automaton"])
+        index.bm25_postings = {
+            term: (rule_ids, weights, upper_bound)
+            for term, (rule_ids, weights, upper_bound) in manifest["bm25_postings"].items()
+        }
+        index.vocabulary = {term: column for column, term in enumerate(manifest["vocabulary"])}
+        index._oov_idf = manifest["oov_idf"]
+        index.idf = None
+        index.rule_matrix = None
+        index._analyzer = None
+        if manifest["has_matrix"]:
+            mmap_mode = "r" if mmap else None
+
+            def _array(name):
+                return np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mmap_mode)
+
+            index.idf = _array("idf")
+            index.rule_matrix = sparse.csr_matrix(
+                (_array("rule_matrix_data"), _array("rule_matrix_indices"), _array("rule_matrix_indptr")),
+                shape=(len(index.rules), len(index.vocabulary)),
+                copy=False,
+            )
+            index._analyzer = _tfidf_analyzer()
+        return index
+
+    def _build_bm25(self, k1: float = 1.2, b: float = 0.75) -> None:
+        term_counts = [Counter(_tokenize(text)) for text in self.rule_texts]
+        lengths = [sum(counts.values()) for counts in term_counts]
+        average_length = (sum(lengths) / len(lengths)) if lengths else 0.0
+        postings: Dict[str, Tuple[List[int], List[float]]] = {}
+        for rule_idx, counts in enumerate(term_counts):
+            norm = k1 * (1 - b + b * lengths[rule_idx] / average_length) if average_length else k1
+            for term, count in counts.items():
+                rule_ids, saturations = postings.setdefault(term, ([], []))
+                rule_ids.append(rule_idx)
+                saturations.append(count * (k1 + 1) / (count + norm))
+
+        # term -> (rule positions ascending, BM25 weight per posting, max weight)
+        self.bm25_postings: Dict[str, Tuple[List[int], List[float], float]] = {}
+        total = len(self.rule_texts)
+        for term, (rule_ids, saturations) in postings.items():
+            idf = math.log(1 + (total - len(rule_ids) + 0.5) / (len(rule_ids) + 0.5))
+            weights = [idf * saturation for saturation in saturations]
+            self.bm25_postings[term] = (rule_ids, weights, max(weights))
+
+    def _compile_keywords(self) -> None:
+        pattern_ids: Dict[str, int] = {}
+        owners: List[Counter] = []
+        self.rule_keyword_patterns: List[List[int]] = []
+        self.token_postings: Dict[str, List[int]] = {}
+        for rule_idx, keywords in enumerate(self.rule_keywords):
+            patterns = []
+            for keyword in keywords:
+                normalized = _normalize_text(keyword)
+                pattern_id = pattern_ids.setdefault(normalized, len(pattern_ids))
+                if pattern_id == len(owners):
+                    owners.append(Counter())
+                owners[pattern_id][rule_idx] += 1
+                patterns.append(pattern_id)
+            self.rule_keyword_patterns.append(patterns)
+            if not keywords:
+                for token in self.rule_token_sets[rule_idx]:
+                    self.token_postings.setdefault(token, []).append(rule_idx)
+        # Per pattern, the rules that list it and how many times.
+        self.keyword_owners = [list(counts.items()) for counts in owners]
+        self.automaton = KeywordAutomaton(list(pattern_ids))
+
+    def _fit_tfidf(self) -> None:
+        vectorizer = TfidfVectorizer(**TFIDF_OPTIONS)
+        try:
+            raw_matrix = vectorizer.fit_transform(self.rule_texts)
+        except ValueError:
+            # Every rule text was empty or stop-words only: no semantic stage.
+            return
+        self.vocabulary = {term: int(col) for term, col in vectorizer.vocabulary_.items()}
+        self.idf = np.asarray(vectorizer.idf_, dtype=np.float64)
+        self.rule_matrix = _l2_normalize_rows(sparse.csr_matrix(raw_matrix, dtype=np.float64))
+        self._analyzer = vectorizer.build_analyzer()
+        # Smoothed IDF of a term seen in none of the rules; comment terms outside
+        # the vocabulary still count towards the comment vector's norm.
+        self._oov_idf = math.log(1 + len(self.rule_texts)) + 1.0
+
+    def _vectorize(self, comments: List[str]):
+        """Return the L2-normalized TF-IDF rows for ``comments``."""
+        indptr = [0]
+        indices: List[int] = []
+        data: List[float] = []
+        oov_squares = []
+        for comment in comments:
+            oov_square = 0.0
+            for term, count in Counter(self._analyzer(comment)).items():
+                column = self.vocabulary.get(term)
+                if column is None:
+                    oov_square += (count * self._oov_idf) ** 2
+                    continue
+                indices.append(column)
+                data.append(count * self.idf[column])
+            indptr.append(len(indices))
+            oov_squares.append(oov_square)
+
+        matrix = sparse.csr_matrix(
+            (np.asarray(data, dtype=np.float64), np.asarray(indices, dtype=np.int64), indptr),
+            shape=(len(comments), len(self.vocabulary)),
+        )
+        return _l2_normalize_rows(matrix, extra_squares=np.asarray(oov_squares))
+
+    def semantic_score_matrix(self, comments: List[str], rule_indices: Optional[List[int]] = None):
+        """Cosine similarities as a dense (comments x rules) array, in one sparse product."""
+        columns = len(self.rules) if rule_indices is None else len(rule_indices)
+        if self.rule_matrix is None:
+            return np.zeros((len(comments), columns))
+        rule_matrix = self.rule_matrix if rule_indices is None else self.rule_matrix[rule_indices]
+        return (self._vectorize(comments) @ rule_matrix.T).toarray()
+
+    def semantic_scores(self, comment: str, rule_indices: Optional[List[int]] = None) -> List[float]:
+        if rule_indices is None:
+            rule_indices = list(range(len(self.rules)))
+        if not rule_indices:
+            return []
+        if self.rule_matrix is not None:
+            return [float(score) for score in self.semantic_score_matrix([comment], rule_indices)[0]]
+        if SKLEARN_AVAILABLE:
+            return [0.0] * len(rule_indices)
+
+        comment_tokens = set(_tokenize(comment))
+        scores = []
+        for rule_idx in rule_indices:
+            rule_tokens = self.rule_token_sets[rule_idx]
+            if not comment_tokens or not rule_tokens:
+                scores.append(0.0)
+                continue
+            intersection = comment_tokens.intersection(rule_tokens)
+            union = comment_tokens.union(rule_tokens)
+            scores.append(len(intersection) / max(1, len(union)))
+        return scores
+
+    def top_candidates(self, comment: str, k: int) -> List[Tuple[int, float]]:
+        """
+        Top-``k`` rules by BM25 over rule tokens, as (rule position, score) pairs.
+
+        Only posting lists of the comment's terms are visited, and WAND pruning
+        skips rules whose score upper bound cannot enter the current top-k.
+        Ties are broken by rule position.
+        """
+        cursors = []
+        for term in set(_tokenize(comment)):
+            postings = self.bm25_postings.get(term)
+            if postings is not None:
+                rule_ids, weights, upper_bound = postings
+                cursors.append([rule_ids[0], 0, rule_ids, weights, upper_bound])
+        if k <= 0 or not cursors:
+            return []
+
+        top: List[Tuple[float, int]] = []
+        threshold = 0.0
+        while cursors:
+            cursors.sort(key=lambda cursor: cursor[0])
+            bound = 0.0
+            pivot = None
+            for position, cursor in enumerate(cursors):
+                bound += cursor[4]
+                if bound > threshold or len(top) < k:
+                    pivot = position
+                    break
+            if pivot is None:
+                break
+
+            pivot_rule = cursors[pivot][0]
+            if cursors[0][0] == pivot_rule:
+                score = 0.0
+                for cursor in cursors:
+                    if cursor[0] != pivot_rule:
+                        break
+                    score += cursor[3][cursor[1]]
+                    _advance_cursor(cursor, pivot_rule + 1)
+                if len(top) < k:
+                    heapq.heappush(top, (score, -pivot_rule))
+                elif score > top[0][0]:
+                    heapq.heapreplace(top, (score, -pivot_rule))
+                if len(top) == k:
+                    threshold = top[0][0]
+            else:
+                for cursor in cursors[:pivot]:
+                    _advance_cursor(cursor, pivot_rule)
+            cursors = [cursor for cursor in cursors if cursor[0] is not None]
+
+        ranked = sorted(top, key=lambda item: (-item[0], -item[1]))
+        return [(-negated_rule, score) for score, negated_rule in ranked]
+
+    def match_keywords(self, comment_lower: str) -> Set[int]:
+        """Pattern ids of every rule keyword occurring in the normalized comment."""
+        return self.automaton.find(comment_lower)
+
+    def keyword_rules(self, matched_patterns: Set[int]) -> Set[int]:
+        """Positions of rules with at least one matched keyword."""
+        return {
+            rule_idx
+            for pattern_id in matched_patterns
+            for rule_idx, _ in self.keyword_owners[pattern_id]
+        }
+
+    def exact_score_entries(self, matched_patterns: Set[int], comment_tokens: set) -> Dict[int, float]:
+        """Non-zero exact scores keyed by rule position."""
+        keyword_hits: Counter = Counter()
+        for pattern_id in matched_patterns:
+            for rule_idx, count in self.keyword_owners[pattern_id]:
+                keyword_hits[rule_idx] += count
+        scores = {
+            rule_idx: min(1.0, hits / len(self.rule_keywords[rule_idx]))
+            for rule_idx, hits in keyword_hits.items()
+        }
+
+        token_hits: Counter = Counter()
+        for token in comment_tokens:
+            for rule_idx in self.token_postings.get(token, ()):
+                token_hits[rule_idx] += 1
+        for rule_idx, hits in token_hits.items():
+            scores[rule_idx] = hits / len(self.rule_token_sets[rule_idx])
+        return scores
+
+    def exact_scores(self, comment_lower: str, comment_tokens: set) -> List[float]:
+        scores = [0.0] * len(self.rules)
+        entries = self.exact_score_entries(self.match_keywords(comment_lower), comment_tokens)
+        for rule_idx, score in entries.items():
+            scores[rule_idx] = score
+        return scores
+
+    def exact_match_score(
+        self,
+        comment_lower: str,
+        comment_tokens: set,
+        rule_idx: int,
+        matched_patterns: Optional[Set[int]] = None,
+    ) -> Tuple[float, List[str]]:
+        keywords = self.rule_keywords[rule_idx]
+        if keywords:
+            if matched_patterns is None:
+                matched_patterns = self.match_keywords(comment_lower)
+            matched_keywords = [
+                keyword
+                for keyword, pattern_id in zip(keywords, self.rule_keyword_patterns[rule_idx])
+                if pattern_id in matched_patterns
+            ]
+            score = min(1.0, len(matched_keywords) / max(1, len(keywords)))
+            return score, matched_keywords
+
+        rule_tokens = self.rule_token_sets[rule_idx]
+        if not rule_tokens:
+            return 0.0, []
+        overlap = rule_tokens.intersection(comment_tokens)
+        score = len(overlap) / max(1, len(rule_tokens))
+        return score, sorted(overlap)
+
+
+class KeywordAutomaton:
+    """
+    Aho-Corasick automaton over a fixed list of patterns.
+
+    ``find`` reports which patterns occur as substrings of a text in a single
+    left-to-right pass, so the cost depends on the text length rather than on
+    the number of patterns. Pattern ids are positions in ``patterns``.
+    """
 
+    def __init__(self, patterns: List[str]):
+        self.patterns = list(patterns)
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._outputs: List[Tuple[int, ...]] = [()]
 
-def _score_rules(comment: str, rules: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    semantic_scores = _semantic_similarity_scores(comment, rules)
+        for pattern_id, pattern in enumerate(self.patterns):
+            state = 0
+            for char in pattern:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._outputs.append(())
+                state = next_state
+            self._outputs[state] += (pattern_id,)
+
+        # Breadth-first pass: failure links point at the longest proper suffix
+        # that is also a trie prefix, and outputs inherit along those links.
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(char, 0)
+                self._outputs[next_state] += self._outputs[self._fail[next_state]]
+
+    def __len__(self) -> int:
+        return len(self.patterns)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "patterns": self.patterns,
+            "goto": self._goto,
+            "fail": self._fail,
+            "outputs": [list(output) for output in self._outputs],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "KeywordAutomaton":
+        automaton = cls.__new__(cls)
+        automaton.patterns = list(data["patterns"])
+        automaton._goto = data["goto"]
+        automaton._fail = data["fail"]
+        automaton._outputs = [tuple(output) for output in data["outputs"]]
+        return automaton
+
+    def find(self, text: str) -> Set[int]:
+        goto = self._goto
+        fail = self._fail
+        outputs = self._outputs
+        found: Set[int] = set()
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if outputs[state]:
+                found.update(outputs[state])
+        return found
+
+
+def _advance_cursor(cursor: List[Any], target_rule: int) -> None:
+    """Move a WAND posting cursor to the first rule position >= ``target_rule``."""
+    rule_ids = cursor[2]
+    position = bisect.bisect_left(rule_ids, target_rule, cursor[1])
+    cursor[1] = position
+    cursor[0] = rule_ids[position] if position < len(rule_ids) else None
+
+
+def _l2_normalize_rows(matrix, extra_squares=None):
+    squares = np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel()
+    if extra_squares is not None:
+        squares = squares + extra_squares
+    norms = np.sqrt(squares)
+    scale = np.divide(1.0, norms, out=np.zeros_like(norms), where=norms > 0)
+    return sparse.csr_matrix(sparse.diags(scale) @ matrix)
+
+
+class _StageClock:
+    """Accumulates nanoseconds per stage between successive ``mark`` calls."""
+
+    __slots__ = ("stages_ns", "rules", "candidates", "_last")
+
+    def __init__(self):
+        self.stages_ns: Dict[str, int] = {}
+        self.rules = 0
+        self.candidates = 0
+        self._last = time.perf_counter_ns()
+
+    def mark(self, stage: str) -> None:
+        now = time.perf_counter_ns()
+        self.stages_ns[stage] = self.stages_ns.get(stage, 0) + now - self._last
+        self._last = now
+
+
+class StageTimings:
+    """
+    Per-stage timings collected while ``record_stage_timings`` is active.
+
+    Every adjudicate_comment call produces one record::
+
+        {"stages_ns": {...}, "total_ns": int, "rules": int,
+         "candidates": int, "top_k": Optional[int]}
+
+    Records are passed to ``sink`` (any callable) when given, added to the
+    verdict as ``match_details["timings"]`` when ``attach`` is set, and summed
+    into ``totals_ns`` so ``summary()`` can report mean cost per stage.
+    """
+
+    def __init__(
+        self,
+        sink: Optional[Callable[[Dict[str, Any]], None]] = None,
+        *,
+        attach: bool = False,
+    ):
+        self.sink = sink
+        self.attach = attach
+        self.calls = 0
+        self.candidates = 0
+        self.totals_ns: Counter = Counter()
+
+    def record(self, clock: _StageClock, verdict: Dict[str, Any], top_k: Optional[int]) -> None:
+        record = {
+            "stages_ns": dict(clock.stages_ns),
+            "total_ns": sum(clock.stages_ns.values()),
+            "rules": clock.rules,
+            "candidates": clock.candidates,
+            "top_k": top_k,
+        }
+        self.calls += 1
+        self.candidates += clock.candidates
+        self.totals_ns.update(clock.stages_ns)
+        if self.attach:
+            verdict.setdefault("match_details", {})["timings"] = record
+        if self.sink is not None:
+            self.sink(record)
+
+    def summary(self) -> Dict[str, Any]:
+        """Mean nanoseconds per stage and mean candidates over recorded calls."""
+        calls = max(self.calls, 1)
+        return {
+            "calls": self.calls,
+            "mean_candidates": round(self.candidates / calls, 2),
+            "mean_stage_ns": {stage: total // calls for stage, total in self.totals_ns.items()},
+        }
+
+
+_ACTIVE_TIMINGS: "contextvars.ContextVar[Optional[StageTimings]]" = contextvars.ContextVar(
+    "citation_checker_stage_timings", default=None
+)
+
+
+@contextlib.contextmanager
+def record_stage_timings(
+    sink: Optional[Callable[[Dict[str, Any]], None]] = None,
+    *,
+    attach: bool = False,
+) -> Iterator[StageTimings]:
+    """
+    Time each stage of adjudicate_comment calls made inside the ``with`` block.
+
+    Scoped with a context variable, so it applies to the current thread or
+    asyncio task only. Outside the block adjudication pays a single context
+    variable lookup per comment.
+
+    Example:
+        >>> with record_stage_timings(attach=True) as timings:
+        ...     adjudicate_comment(comment, index, top_k=20)
+        >>> timings.summary()["mean_stage_ns"]
+    """
+    timings = StageTimings(sink, attach=attach)
+    token = _ACTIVE_TIMINGS.set(timings)
+    try:
+        yield timings
+    finally:
+        _ACTIVE_TIMINGS.reset(token)
+
+
+def _score_rules(
+    comment: str,
+    index: RuleIndex,
+    top_k: Optional[int] = None,
+    clock: Optional[_StageClock] = None,
+) -> List[Dict[str, Any]]:
+    comment_lower = _normalize_text(comment)
+    comment_tokens = set(_tokenize(comment))
+    if clock is not None:
+        clock.mark("tokenize")
+    matched_patterns = index.match_keywords(comment_lower)
+    if clock is not None:
+        clock.mark("keyword_match")
+    if top_k is None:
+        candidates = list(range(len(index.rules)))
+        exact_scores = index.exact_score_entries(matched_patterns, comment_tokens)
+    else:
+        # Keyword hits stay on the short list so an exact citation is never pruned.
+        shortlisted = {rule_idx for rule_idx, _ in index.top_candidates(comment, top_k)}
+        candidates = sorted(shortlisted.union(index.keyword_rules(matched_patterns)))
+        if clock is not None:
+            clock.mark("candidate_selection")
+        exact_scores = {
+            rule_idx: index.exact_match_score(
+                comment_lower, comment_tokens, rule_idx, matched_patterns
+            )[0]
+            for rule_idx in candidates
+        }
+    if clock is not None:
+        clock.mark("exact_score")
+        clock.candidates = len(candidates)
+    semantic_scores = index.semantic_scores(comment, candidates)
+    if clock is not None:
+        clock.mark("semantic_score")
     scored = []
-    for idx, rule in enumerate(rules):
-        exact_score, matched_keywords = _exact_match_score(comment, rule)
-        semantic_score = semantic_scores[idx] if idx < len(semantic_scores) else 0.0
+    for position, idx in enumerate(candidates):
+        exact_score = exact_scores.get(idx, 0.0)
+        semantic_score = semantic_scores[position] if position < len(semantic_scores) else 0.0
         combined = max(exact_score, semantic_score)
         scored.append({
-            "rule": rule,
+            "rule_index": idx,
+            "rule": index.rules[idx],
             "exact_score": exact_score,
             "semantic_score": semantic_score,
             "combined_score": combined,
-            "matched_keywords": matched_keywords,
         })
     return scored
 
 
-def adjudicate_comment(
-    comment: str,
-    rules_json: Dict[str, Any],
-    *,
-    exact_threshold: float = 0.34,
-    semantic_threshold: float = 0.28,
-) -> Dict[str, Any]:
-    comment = (comment or "").strip()
-    rules = rules_json.get("rules") if isinstance(rules_json, dict) else None
-    if not comment:
-        return {
-            "verdict": "No Violation",
-            "citation_anchor": None,
-            "reasoning": "No content provided to analyze.",
-            "confidence": 0.0,
-            "flags": ["EMPTY_COMMENT"],
-        }
+def _empty_comment_verdict() -> Dict[str, Any]:
+    return {
+        "verdict": "No Violation",
+        "citation_anchor": None,
+        "reasoning": "No content provided to analyze.",
+        "confidence": 0.0,
+        "flags": ["EMPTY_COMMENT"],
+    }
 
-    if not rules:
-        return {
-            "verdict": "No Violation",
-            "citation_anchor": None,
-            "reasoning": "No rules available to anchor a violation.",
-            "confidence": 0.0,
-            "flags": ["NO_RULES"],
-        }
 
-    scored = _score_rules(comment, rules)
-    scored.sort(key=lambda item: item["combined_score"], reverse=True)
-    best = scored[0]
+def _no_rules_verdict() -> Dict[str, Any]:
+    return {
+        "verdict": "No Violation",
+        "citation_anchor": None,
+        "reasoning": "No rules available to anchor a violation.",
+        "confidence": 0.0,
+        "flags": ["NO_RULES"],
+    }
 
-    is_violation = (
-        best["exact_score"] >= exact_threshold or best["semantic_score"] >= semantic_threshold
-    )
 
+def _build_verdict(best: Dict[str, Any], is_violation: bool) -> Dict[str, Any]:
     if not is_violation:
         return {
             "verdict": "No Violation",
@@ -165,6 +731,148 @@ def adjudicate_comment(
     }
 
 
+def adjudicate_comment(
+    comment: str,
+    rules_json: Union[Dict[str, Any], RuleIndex],
+    *,
+    exact_threshold: float = 0.34,
+    semantic_threshold: float = 0.28,
+    top_k: Optional[int] = None,
+) -> Dict[str, Any]:
+    timings = _ACTIVE_TIMINGS.get()
+    if timings is None:
+        return _adjudicate(comment, rules_json, exact_threshold, semantic_threshold, top_k)
+    clock = _StageClock()
+    verdict = _adjudicate(comment, rules_json, exact_threshold, semantic_threshold, top_k, clock)
+    timings.record(clock, verdict, top_k)
+    return verdict
+
+
+def _adjudicate(
+    comment: str,
+    rules_json: Union[Dict[str, Any], RuleIndex],
+    exact_threshold: float,
+    semantic_threshold: float,
+    top_k: Optional[int],
+    clock: Optional[_StageClock] = None,
+) -> Dict[str, Any]:
+    comment = (comment or "").strip()
+    if not comment:
+        return _empty_comment_verdict()
+
+    index = rules_json if isinstance(rules_json, RuleIndex) else RuleIndex(rules_json)
+    if clock is not None:
+        clock.mark("index")
+        clock.rules = len(index.rules)
+    if not index.rules:
+        return _no_rules_verdict()
+
+    scored = _score_rules(comment, index, top_k, clock)
+    if clock is not None:
+        clock.mark("assemble")
+    if not scored:
+        return _build_verdict({"combined_score": 0.0}, False)
+    # max() keeps the first of equally scored rules, in rulebook order.
+    best = max(scored, key=lambda item: item["combined_score"])
+    best["matched_keywords"] = []
+    if best["exact_score"]:
+        _, best["matched_keywords"] = index.exact_match_score(
+            _normalize_text(comment), set(_tokenize(comment)), best["rule_index"]
+        )
+    if clock is not None:
+        clock.mark("select")
+
+    is_violation = (
+        best["exact_score"] >= exact_threshold or best["semantic_score"] >= semantic_threshold
+    )
+    verdict = _build_verdict(best, is_violation)
+    if clock is not None:
+        clock.mark("verdict")
+    return verdict
+
+
+def adjudicate_comments(
+    comments: List[str],
+    rules_json: Union[Dict[str, Any], RuleIndex],
+    *,
+    exact_threshold: float = 0.34,
+    semantic_threshold: float = 0.28,
+    batch_size: int = 1024,
+) -> List[Dict[str, Any]]:
+    """
+    Batched counterpart of ``adjudicate_comment``.
+
+    Comments are vectorized together and scored against every rule with one
+    sparse (comments x rules) product per batch; thresholds and best-rule
+    selection are applied column-wise with NumPy. Verdicts are identical to
+    calling ``adjudicate_comment`` on each comment and come back in input order.
+    ``batch_size`` bounds the size of the dense score matrices.
+    """
+    index = rules_json if isinstance(rules_json, RuleIndex) else RuleIndex(rules_json)
+    cleaned = [(comment or "").strip() for comment in comments]
+    if not SKLEARN_AVAILABLE:
+        return [
+            adjudicate_comment(
+                comment,
+                index,
+                exact_threshold=exact_threshold,
+                semantic_threshold=semantic_threshold,
+            )
+            for comment in cleaned
+        ]
+
+    results: List[Optional[Dict[str, Any]]] = [None] * len(cleaned)
+    pending = []
+    for position, comment in enumerate(cleaned):
+        if not comment:
+            results[position] = _empty_comment_verdict()
+        elif not index.rules:
+            results[position] = _no_rules_verdict()
+        else:
+            pending.append(position)
+
+    batch_size = max(1, int(batch_size))
+    for start in range(0, len(pending), batch_size):
+        positions = pending[start:start + batch_size]
+        batch = [cleaned[position] for position in positions]
+        lowered = [_normalize_text(comment) for comment in batch]
+        token_sets = [set(_tokenize(comment)) for comment in batch]
+
+        matched = [index.match_keywords(comment_lower) for comment_lower in lowered]
+
+        semantic = index.semantic_score_matrix(batch)
+        exact = np.zeros_like(semantic)
+        for row, (patterns, comment_tokens) in enumerate(zip(matched, token_sets)):
+            for rule_idx, score in index.exact_score_entries(patterns, comment_tokens).items():
+                exact[row, rule_idx] = score
+        combined = np.maximum(exact, semantic)
+        # argmax keeps the first maximum, like max() in adjudicate_comment.
+        best_rules = combined.argmax(axis=1)
+        rows = np.arange(len(batch))
+        best_exact = exact[rows, best_rules]
+        best_semantic = semantic[rows, best_rules]
+        violations = (best_exact >= exact_threshold) | (best_semantic >= semantic_threshold)
+
+        for row, position in enumerate(positions):
+            rule_idx = int(best_rules[row])
+            is_violation = bool(violations[row])
+            matched_keywords: List[str] = []
+            if is_violation:
+                _, matched_keywords = index.exact_match_score(
+                    lowered[row], token_sets[row], rule_idx, matched[row]
+                )
+            best = {
+                "rule": index.rules[rule_idx],
+                "exact_score": float(best_exact[row]),
+                "semantic_score": float(best_semantic[row]),
+                "combined_score": float(combined[row, rule_idx]),
+                "matched_keywords": matched_keywords,
+            }
+            results[position] = _build_verdict(best, is_violation)
+
+    return results
+
+
 def load_rules_from_text(rule_text: str) -> Dict[str, Any]:
     return normalize_rules_to_json(rule_text)
 
@@ -174,9 +882,197 @@ def load_rules_from_file(path: str) -> Dict[str, Any]:
         return json.load(handle)
 
 
-def _parse_args() -> argparse.Namespace:
+def compiled_index_path(rules_json_path: str, index_dir: Optional[str] = None) -> str:
+    """
+    Where the compiled index of a rules JSON file lives: next to it, or in
+    ``index_dir`` under a name that also encodes the file's absolute path.
+    """
+    if index_dir is None:
+        return os.path.splitext(rules_json_path)[0] + ".index"
+    stem = os.path.splitext(os.path.basename(rules_json_path))[0]
+    path_hash = hashlib.sha256(os.path.abspath(rules_json_path).encode("utf-8")).hexdigest()[:12]
+    return os.path.join(index_dir, f"{stem}-{path_hash}.index")
+
+
+def load_rule_index(
+    rules_json_path: str,
+    *,
+    mmap: bool = True,
+    compile: bool = False,
+    index_dir: Optional[str] = None,
+) -> RuleIndex:
+    """
+    Load the compiled index of a normalized rules JSON file.
+
+    The index (next to the JSON, or in ``index_dir``) is reused when its
+    recorded SHA-256 matches the current JSON file; otherwise it is rebuilt
+    from the JSON. Only with ``compile`` is the rebuilt index written back so
+    later processes can memory-map it; a failed write is logged, and the
+    in-memory index is still returned.
+    """
+    with open(rules_json_path, "rb") as handle:
+        raw = handle.read()
+    source_sha256 = hashlib.sha256(raw).hexdigest()
+    index_path = compiled_index_path(rules_json_path, index_dir)
+
+    if SKLEARN_AVAILABLE and os.path.isdir(index_path):
+        try:
+            index = RuleIndex.load(index_path, mmap=mmap)
+        except (OSError, ValueError, KeyError):
+            index = None
+        if index is not None and index.source_sha256 == source_sha256:
+            return index
+
+    index = RuleIndex(json.loads(raw.decode("utf-8")))
+    index.source_sha256 = source_sha256
+    if compile and SKLEARN_AVAILABLE:
+        try:
+            if index_dir is not None:
+                os.makedirs(index_dir, exist_ok=True)
+            index.save(index_path)
+        except OSError as exc:
+            logger.warning("Could not save compiled rule index to %s: %s", index_path, exc)
+    return index
+
+
+class LatencyHistogram:
+    """
+    Constant-memory latency recorder with ~2% relative-error percentiles.
+
+    Samples are counted in log-spaced buckets, so percentiles over millions of
+    comments do not require keeping every measurement.
+    """
+
+    _GROWTH = 1.02
+
+    def __init__(self):
+        self.count = 0
+        self._buckets: Counter = Counter()
+
+    def record(self, seconds: float) -> None:
+        bucket = int(math.log(max(seconds, 1e-9) * 1e9, self._GROWTH))
+        self._buckets[bucket] += 1
+        self.count += 1
+
+    def percentile(self, fraction: float) -> float:
+        """Approximate latency in seconds at ``fraction`` (0-1) of samples."""
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(fraction * self.count))
+        seen = 0
+        for bucket in sorted(self._buckets):
+            seen += self._buckets[bucket]
+            if seen >= rank:
+                return self._GROWTH ** (bucket + 1) / 1e9
+        return 0.0
+
+
+def _iter_comment_records(lines: Iterable[str]) -> Iterator[Tuple[Any, str]]:
+    """Yield (comment_id, text) from plain-text or JSON lines, skipping blanks."""
+    for line_number, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith("{"):
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                record = None
+            if isinstance(record, dict):
+                comment = record.get("comment", record.get("text", ""))
+                yield record.get("id", line_number), str(comment or "")
+                continue
+        yield line_number, line
+
+
+def adjudicate_stream(
+    lines: Iterable[str],
+    rules_json: Union[Dict[str, Any], RuleIndex],
+    output: TextIO,
+    *,
+    batch_size: int = 256,
+    exact_threshold: float = 0.34,
+    semantic_threshold: float = 0.28,
+    top_k: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Adjudicate newline-delimited comments and write NDJSON verdicts.
+
+    Input lines are plain comment text or JSON records with a ``comment``
+    (or ``text``) field and an optional ``id``. Each output line is the verdict
+    plus ``comment_id`` (the record id, or the input line number). Comments are
+    scored ``batch_size`` at a time and the output is flushed after every batch,
+    so memory stays bounded by the batch size. Returns a throughput summary.
+    Comments in a batch are scored together, so latency is reported per batch:
+    ``batch_latency_*`` is the wall time from a batch starting to its verdicts
+    being written, one sample per batch.
+    """
+    index = rules_json if isinstance(rules_json, RuleIndex) else RuleIndex(rules_json)
+    histogram = LatencyHistogram()
+    comments_seen = 0
+    violations = 0
+    started = time.perf_counter()
+
+    def _flush(batch: List[Tuple[Any, str]]) -> None:
+        nonlocal comments_seen, violations
+        batch_started = time.perf_counter()
+        comments = [comment for _, comment in batch]
+        if top_k is None:
+            results = adjudicate_comments(
+                comments,
+                index,
+                exact_threshold=exact_threshold,
+                semantic_threshold=semantic_threshold,
+            )
+        else:
+            results = [
+                adjudicate_comment(
+                    comment,
+                    index,
+                    exact_threshold=exact_threshold,
+                    semantic_threshold=semantic_threshold,
+                    top_k=top_k,
+                )
+                for comment in comments
+            ]
+        output.write("".join(
+            json.dumps({"comment_id": comment_id, **result}, ensure_ascii=False) + "\n"
+            for (comment_id, _), result in zip(batch, results)
+        ))
+        output.flush()
+        histogram.record(time.perf_counter() - batch_started)
+        comments_seen += len(results)
+        violations += sum(1 for result in results if result["verdict"] == "Violation")
+
+    batch: List[Tuple[Any, str]] = []
+    for record in _iter_comment_records(lines):
+        batch.append(record)
+        if len(batch) >= batch_size:
+            _flush(batch)
+            batch = []
+    if batch:
+        _flush(batch)
+
+    elapsed = time.perf_counter() - started
+    return {
+        "comments": comments_seen,
+        "violations": violations,
+        "batches": histogram.count,
+        "elapsed_seconds": round(elapsed, 3),
+        "comments_per_second": round(comments_seen / elapsed, 1) if elapsed > 0 else 0.0,
+        "batch_latency_p50_ms": round(histogram.percentile(0.50) * 1000, 3),
+        "batch_latency_p99_ms": round(histogram.percentile(0.99) * 1000, 3),
+    }
+
+
+def _parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Citation Anchoring checker")
-    parser.add_argument("--comment", required=True, help="User comment to analyze")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--comment", help="User comment to analyze")
+    source.add_argument(
+        "--comments-file",
+        help="Newline-delimited comments or JSON records to analyze ('-' for stdin)",
+    )
     parser.add_argument(
         "--rules-json",
         help="Path to rules JSON file (output of normalizer.py)",
@@ -189,14 +1085,43 @@ def _parse_args() -> argparse.Namespace:
         "--rules-file",
         help="Path to a text file containing raw community rules",
     )
-    return parser.parse_args()
+    parser.add_argument(
+        "--compile-index",
+        action="store_true",
+        help="Write the compiled rule index for --rules-json so later runs can memory-map it",
+    )
+    parser.add_argument(
+        "--index-dir",
+        help="Directory for compiled rule indexes (default: next to the --rules-json file)",
+    )
+    parser.add_argument(
+        "--top-k",
+        type=int,
+        help="Only score the top-k BM25 candidate rules (plus keyword hits)",
+    )
+    parser.add_argument(
+        "--output",
+        help="Write NDJSON verdicts to this file instead of stdout (with --comments-file)",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=256,
+        help="Comments scored and flushed per batch (with --comments-file)",
+    )
+    parser.add_argument(
+        "--timings",
+        action="store_true",
+        help="Attach per-stage nanosecond timings to match_details (with --comment)",
+    )
+    return parser.parse_args(argv)
 
 
-def main() -> int:
-    args = _parse_args()
+def main(argv: Optional[List[str]] = None) -> int:
+    args = _parse_args(argv)
 
     if args.rules_json:
-        rules = load_rules_from_file(args.rules_json)
+        rules = load_rule_index(args.rules_json, compile=args.compile_index, index_dir=args.index_dir)
     elif args.rules_text:
         rules = load_rules_from_text(args.rules_text)
     elif args.rules_file:
@@ -205,7 +1130,30 @@ def main() -> int:
     else:
         raise SystemExit("Provide --rules-json, --rules-text, or --rules-file")
 
-    result = adjudicate_comment(args.comment, rules)
+    if args.comments_file:
+        index = rules if isinstance(rules, RuleIndex) else RuleIndex(rules)
+        with contextlib.ExitStack() as stack:
+            if args.comments_file == "-":
+                source = sys.stdin
+            else:
+                source = stack.enter_context(open(args.comments_file, "r", encoding="utf-8"))
+            if args.output:
+                sink = stack.enter_context(open(args.output, "w", encoding="utf-8"))
+            else:
+                sink = sys.stdout
+            summary = adjudicate_stream(
+                source, index, sink, batch_size=max(1, args.batch_size), top_k=args.top_k
+            )
+        print(
+            "Adjudicated {comments} comments ({violations} violations) in {elapsed_seconds}s: "
+            "{comments_per_second} comments/sec, {batches} batches, batch latency "
+            "p50 {batch_latency_p50_ms} ms, p99 {batch_latency_p99_ms} ms".format(**summary),
+            file=sys.stderr,
+        )
+        return 0
+
+    with record_stage_timings(attach=True) if args.timings else contextlib.nullcontext():
+        result = adjudicate_comment(args.comment, rules, top_k=args.top_k)
     print(json.dumps(result, indent=2))
     return 0
 
@@ -3,6 +3,7 @@ import os
 import streamlit as st
 
 from citation_checker import adjudicate_comment
+from normalization_cache import NormalizationCache
 from normalizer import normalize_rules_to_json
 
 # ---------------------------------------------------------
@@ -38,8 +39,16 @@ with st.sidebar:
     auto_run = st.toggle("Auto-run analysis", value=False, help="Run normalization and analysis as you type.")
 
 
+# Set OAP_NORMALIZATION_CACHE_DIR to reuse normalized rulebooks across restarts.
+_cache_dir = os.getenv("OAP_NORMALIZATION_CACHE_DIR")
+normalization_cache = NormalizationCache(_cache_dir) if _cache_dir else None
+
+
 def run_normalization(raw_rules: str) -> None:
-    normalized = normalize_rules_to_json(raw_rules)
+    if normalization_cache is not None:
+        normalized = normalization_cache.normalize(raw_rules)
+    else:
+        normalized = normalize_rules_to_json(raw_rules)
     st.session_state.normalized_rules = normalized
     st.session_state.last_rules_input = raw_rules
 
@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+"""
+Concurrent LLM adjudication for dispute backlogs.
+
+``normalizer.adjudicate_dispute`` sends one blocking request at a time. The
+AsyncDisputeAdjudicator sends the same prompts through ``openai.AsyncOpenAI``
+with at most ``max_concurrency`` requests in flight, paced by token buckets
+for requests and tokens per minute. Rate-limit (429), timeout, connection and
+5xx failures are retried with exponential backoff and full jitter, honouring
+a ``Retry-After`` header when the server sends one. Batch results come back in
+input order, and repeats are answered from the normalizer's response cache
+when one is configured.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import normalizer
+
+
+# Statuses worth retrying: rate limited, or a transient server-side failure.
+RETRYABLE_STATUS = frozenset({408, 409, 429, 500, 502, 503, 504})
+
+
+class TokenBucket:
+    """
+    Async token bucket: ``rate_per_minute`` tokens refill continuously up to
+    ``capacity`` (one minute's worth by default). Waiters are served in order.
+    """
+
+    def __init__(
+        self,
+        rate_per_minute: float,
+        capacity: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if rate_per_minute <= 0:
+            raise ValueError("rate_per_minute must be positive")
+        self.rate = rate_per_minute / 60.0
+        self.capacity = float(capacity if capacity is not None else rate_per_minute)
+        self._tokens = self.capacity
+        self._clock = clock
+        self._updated = clock()
+        # asyncio.Lock binds to the first loop that waits on it; the bucket
+        # state itself outlives any one loop, so only the lock is replaced.
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self.waited_seconds = 0.0
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _loop_lock(self) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop, self._lock = loop, asyncio.Lock()
+        return self._lock
+
+    async def acquire(self, amount: float = 1.0) -> None:
+        # A request larger than the bucket could never be admitted otherwise.
+        amount = min(float(amount), self.capacity)
+        async with self._loop_lock():
+            self._refill()
+            while self._tokens < amount:
+                delay = (amount - self._tokens) / self.rate
+                self.waited_seconds += delay
+                await asyncio.sleep(delay)
+                self._refill()
+            self._tokens -= amount
+
+
+def _status_code(exc: BaseException) -> Optional[int]:
+    return getattr(exc, "status_code", None)
+
+
+def _is_retryable(exc: BaseException) -> bool:
+    import openai
+
+    if isinstance(exc, (openai.APIConnectionError, openai.APITimeoutError)):
+        return True
+    return _status_code(exc) in RETRYABLE_STATUS
+
+
+def _retry_after(exc: BaseException) -> Optional[float]:
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    try:
+        return max(0.0, float(headers.get("retry-after")))
+    except (TypeError, ValueError):
+        return None
+
+
+class AsyncDisputeAdjudicator:
+    """
+    Bounded, rate-limited, retrying async version of adjudicate_dispute.
+
+    Args:
+        client: ``openai.AsyncOpenAI`` (created from ``normalizer.api_key``
+            with the SDK's own retries off when omitted). A client passed in
+            keeps connections bound to the event loop that first used it, so
+            it may only be used from that loop; an omitted one is recreated
+            whenever the adjudicator is run on a new loop.
+        max_concurrency: Maximum requests in flight.
+        requests_per_minute: Request rate limit; ``None`` disables it.
+        tokens_per_minute: Token rate limit (prompt estimate plus
+            ``completion_tokens``); ``None`` disables it.
+        completion_tokens: Tokens reserved per request for the response.
+        max_retries: Retries per request after the first attempt.
+        base_delay: Backoff before the first retry, doubled per retry.
+        max_delay: Cap on a single backoff delay.
+        model: Chat model (default ``normalizer.OPENAI_MODEL``).
+        top_k: Send only the ``top_k`` rules the local scorer ranks highest
+            for each comment (see ``normalizer.adjudicate_dispute``); the
+            citation is then checked against those rules and each verdict
+            carries a ``retrieval`` token report.
+        rng: Random source for jitter (seedable for tests).
+
+    Example:
+        >>> adjudicator = AsyncDisputeAdjudicator(max_concurrency=16, requests_per_minute=500)
+        >>> verdicts = asyncio.run(adjudicator.adjudicate_many(disputes))
+        >>> adjudicator.stats()["retries"]
+    """
+
+    def __init__(
+        self,
+        client: Any = None,
+        *,
+        max_concurrency: int = 8,
+        requests_per_minute: Optional[float] = 500,
+        tokens_per_minute: Optional[float] = 30_000,
+        completion_tokens: int = 300,
+        max_retries: int = 5,
+        base_delay: float = 0.5,
+        max_delay: float = 30.0,
+        model: Optional[str] = None,
+        top_k: Optional[int] = None,
+        rng: Optional[random.Random] = None,
+    ):
+        self._client = client
+        self._owns_client = client is None
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.completion_tokens = max(0, int(completion_tokens))
+        self.max_retries = max(0, int(max_retries))
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.model = model or normalizer.OPENAI_MODEL
+        self.top_k = top_k
+        self._rng = rng or random.Random()
+        self._request_bucket = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self._token_bucket = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        # Loop-bound state, rebuilt by _limits() when the running loop changes.
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._in_flight = 0
+        self.max_in_flight = 0
+        self.requests = 0
+        self.retries = 0
+        self.rate_limited = 0
+        self.failures = 0
+        self.cache_hits = 0
+        self.backoff_seconds = 0.0
+
+    @property
+    def client(self) -> Any:
+        if self._client is None:
+            from openai import AsyncOpenAI
+            self._client = AsyncOpenAI(api_key=normalizer.api_key, max_retries=0)
+        return self._client
+
+    async def _limits(self) -> Tuple[asyncio.Semaphore, Optional[TokenBucket], Optional[TokenBucket]]:
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            if self._loop is not None:
+                if not self._owns_client:
+                    raise RuntimeError(
+                        "AsyncDisputeAdjudicator was given a client that is bound to another event loop; "
+                        "reuse the same loop or pass a client created for this one"
+                    )
+                await self._discard_client()
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore, self._request_bucket, self._token_bucket
+
+    async def _discard_client(self) -> None:
+        # Our own client's pooled connections belong to the previous loop and
+        # cannot be reused; mark it closed so it does not try again when collected.
+        client, self._client = self._client, None
+        if client is not None:
+            try:
+                await client.close()
+            except RuntimeError:
+                pass
+
+    def _backoff(self, attempt: int, exc: BaseException) -> float:
+        retry_after = _retry_after(exc)
+        if retry_after is not None:
+            return min(self.max_delay, retry_after)
+        # Full jitter: uniform over [0, base * 2^attempt], capped.
+        return self._rng.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    async def _complete(self, system_prompt: str, user_content: str) -> str:
+        semaphore, request_bucket, token_bucket = await self._limits()
+        tokens = normalizer.estimate_tokens(system_prompt, user_content) + self.completion_tokens
+        attempt = 0
+        while True:
+            if request_bucket is not None:
+                await request_bucket.acquire()
+            if token_bucket is not None:
+                await token_bucket.acquire(tokens)
+            async with semaphore:
+                self._in_flight += 1
+                self.max_in_flight = max(self.max_in_flight, self._in_flight)
+                self.requests += 1
+                try:
+                    response = await self.client.chat.completions.create(
+                        model=self.model,
+                        messages=[
+                            {"role": "system", "content": system_prompt},
+                            {"role": "user", "content": user_content},
+                        ],
+                        response_format={"type": "json_object"},
+                    )
+                    return response.choices[0].message.content
+                except Exception as exc:
+                    if _status_code(exc) == 429:
+                        self.rate_limited += 1
+                    if attempt >= self.max_retries or not _is_retryable(exc):
+                        self.failures += 1
+                        raise
+                    delay = self._backoff(attempt, exc)
+                finally:
+                    self._in_flight -= 1
+            # Back off outside the semaphore so other requests keep flowing.
+            attempt += 1
+            self.retries += 1
+            self.backoff_seconds += delay
+            await asyncio.sleep(delay)
+
+    async def adjudicate(self, user_comment: str, normalized_rules: Dict[str, Any]) -> Dict[str, Any]:
+        """Async ``adjudicate_dispute``: same prompt, same response cache."""
+        if self.top_k is None:
+            return await self._chat_json(normalizer.adjudication_prompt(normalized_rules), user_comment)
+
+        # Shared, fingerprint-keyed LRU: bounded, and an edited rulebook gets a fresh index.
+        index, full_prompt_chars = normalizer._rulebook_state(normalized_rules)
+        sent_rules = normalizer.retrieve_candidate_rules(user_comment, normalized_rules, self.top_k, index)
+        system_prompt = normalizer.adjudication_prompt(sent_rules)
+        verdict = normalizer.check_citation(await self._chat_json(system_prompt, user_comment), sent_rules)
+        verdict["retrieval"] = normalizer.retrieval_report(
+            normalized_rules, sent_rules, system_prompt, user_comment, full_prompt_chars
+        )
+        return verdict
+
+    async def _chat_json(self, system_prompt: str, user_content: str) -> Dict[str, Any]:
+        cache = normalizer.get_response_cache()
+        if cache is not None:
+            key = cache.make_key(self.model, system_prompt, user_content)
+            content = cache.get(key)
+            if content is not None:
+                self.cache_hits += 1
+                return json.loads(content)
+        content = await self._complete(system_prompt, user_content)
+        result = json.loads(content)
+        if cache is not None:
+            cache.put(key, content, model=self.model)
+        return result
+
+    async def adjudicate_many(
+        self,
+        disputes: Iterable[Tuple[str, Dict[str, Any]]],
+        return_exceptions: bool = False,
+    ) -> List[Any]:
+        """
+        Adjudicate ``(user_comment, normalized_rules)`` pairs concurrently.
+
+        Results are in input order. With ``return_exceptions``, a dispute that
+        still fails after its retries yields its exception in place of a
+        verdict instead of failing the whole batch.
+        """
+        # Fail the batch, not each dispute, when the client cannot run on this loop.
+        await self._limits()
+        return await asyncio.gather(
+            *(self.adjudicate(comment, rules) for comment, rules in disputes),
+            return_exceptions=return_exceptions,
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "retries": self.retries,
+            "rate_limited": self.rate_limited,
+            "failures": self.failures,
+            "cache_hits": self.cache_hits,
+            "max_in_flight": self.max_in_flight,
+            "backoff_seconds": round(self.backoff_seconds, 3),
+            "throttled_seconds": round(
+                sum(bucket.waited_seconds for bucket in (self._request_bucket, self._token_bucket) if bucket), 3
+            ),
+        }
+
+
+def adjudicate_disputes(
+    disputes: Sequence[Tuple[str, Dict[str, Any]]],
+    return_exceptions: bool = False,
+    **options: Any,
+) -> List[Any]:
+    """Blocking wrapper: adjudicate disputes concurrently and return them in order."""
+    adjudicator = AsyncDisputeAdjudicator(**options)
+    return asyncio.run(adjudicator.adjudicate_many(disputes, return_exceptions=return_exceptions))
+
+
+def _parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Adjudicate a dispute backlog with the LLM concurrently")
+    parser.add_argument("rules", help="Normalized rules JSON file")
+    parser.add_argument("comments", help="Comments file (one per line)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Maximum requests in flight")
+    parser.add_argument("--rpm", type=float, default=500, help="Requests per minute")
+    parser.add_argument("--tpm", type=float, default=30_000, help="Tokens per minute")
+    parser.add_argument("--max-retries", type=int, default=5, help="Retries per request")
+    parser.add_argument("--top-k", type=int, help="Send only the top-k candidate rules per comment")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = _parse_args(argv)
+    with open(args.rules, "r", encoding="utf-8") as handle:
+        rules_json = json.load(handle)
+    with open(args.comments, "r", encoding="utf-8") as handle:
+        comments = [line.rstrip("\n") for line in handle if line.strip()]
+
+    adjudicator = AsyncDisputeAdjudicator(
+        max_concurrency=args.concurrency,
+        requests_per_minute=args.rpm,
+        tokens_per_minute=args.tpm,
+        max_retries=args.max_retries,
+        top_k=args.top_k,
+    )
+    started = time.perf_counter()
+    results = asyncio.run(
+        adjudicator.adjudicate_many(((comment, rules_json) for comment in comments), return_exceptions=True)
+    )
+    elapsed = time.perf_counter() - started
+    failures = 0
+    for comment, result in zip(comments, results):
+        if isinstance(result, Exception):
+            failures += 1
+            result = {"error": f"{type(result).__name__}: {result}"}
+        print(json.dumps({"comment": comment, "verdict": result}, ensure_ascii=False))
+    print(f"Adjudicated {len(comments)} disputes in {elapsed:.2f}s ({failures} failed); "
+          f"stats: {adjudicator.stats()}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,169 @@
+"""
+Persistent cache of OpenAI chat responses.
+
+``normalizer.normalize_rules`` and ``adjudicate_dispute`` send a full gpt-4o
+request per call, even when the rulebook and comment were seen before. This
+cache stores the raw response content in an embedded SQLite database, keyed by
+the model, a hash of the system prompt and a hash of the user content, so an
+identical request is answered locally. The store is bounded by entry count and
+total content size; beyond either limit the least recently used responses are
+deleted. SQLite's locking lets several processes share one cache file.
+
+Each instance keeps a running entry count and size, so a write does not
+aggregate the whole table. The totals are rescanned on the first write and
+every ``RESYNC_WRITES`` writes after that, which picks up entries written by
+other processes sharing the file.
+"""
+
+import hashlib
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+
+# Bump when the key derivation or stored layout changes.
+CACHE_FORMAT_VERSION = 1
+
+# Writes between rescans of the running entry count and size.
+RESYNC_WRITES = 1000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    model TEXT NOT NULL,
+    content TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    last_used REAL NOT NULL
+)
+"""
+
+
+def _sha256(text: str) -> str:
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """
+    SQLite-backed LRU cache of chat completion contents.
+
+    Args:
+        path: Database file (created if missing), or ":memory:".
+        max_entries: Maximum stored responses.
+        max_bytes: Maximum total size of stored response contents.
+        clock: Time source used to order entries by last use (injectable for
+            tests).
+
+    Example:
+        >>> normalizer.set_response_cache(LLMResponseCache(".cache/llm.sqlite3"))
+        >>> normalizer.normalize_rules(raw_text)  # a repeat is served locally
+        >>> normalizer.get_response_cache().stats()["hit_rate"]
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_entries: int = 10000,
+        max_bytes: int = 64 * 1024 * 1024,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.path = path
+        self.max_entries = max(1, int(max_entries))
+        self.max_bytes = max(1, int(max_bytes))
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30.0, check_same_thread=False)
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        with self._conn:
+            self._conn.execute(_SCHEMA)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+        # Running totals of the table; None until the first scan.
+        self._count: Optional[int] = None
+        self._total_bytes: Optional[int] = None
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(model: str, system_prompt: str, user_content: str) -> str:
+        return _sha256(
+            f"{CACHE_FORMAT_VERSION}\0{model}\0{_sha256(system_prompt)}\0{_sha256(user_content)}"
+        )
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT content FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            with self._conn:
+                self._conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (self._clock(), key))
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, content: str, model: str = "") -> None:
+        now = self._clock()
+        size = len(content.encode("utf-8"))
+        with self._lock:
+            with self._conn:
+                replaced = self._conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, model, content, size, created, last_used) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, model, content, size, now, now),
+                )
+                self.writes += 1
+                if self._count is None or self.writes % RESYNC_WRITES == 0:
+                    self._count, self._total_bytes = self._conn.execute(
+                        "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+                    ).fetchone()
+                else:
+                    self._count += 0 if replaced else 1
+                    self._total_bytes += size - (replaced[0] if replaced else 0)
+                if self._count > self.max_entries or self._total_bytes > self.max_bytes:
+                    self._evict()
+
+    def _evict(self) -> None:
+        """Delete least recently used entries until the running totals are within the limits."""
+        count, total = self._count, self._total_bytes
+        victims = []
+        for key, size in self._conn.execute("SELECT key, size FROM responses ORDER BY last_used, rowid"):
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            victims.append((key,))
+            count -= 1
+            total -= size
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", victims)
+        self.evictions += len(victims)
+        self._count, self._total_bytes = count, total
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def size_bytes(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def clear(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM responses")
+            self._count, self._total_bytes = 0, 0
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "writes": self.writes,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
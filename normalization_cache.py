@@ -0,0 +1,208 @@
+"""
+Content-addressed on-disk cache for normalized rulebooks.
+
+The same rulebooks are normalized again on every deploy and demo restart.
+Results of ``normalize_rules_to_json`` are stored as JSON files named by the
+SHA-256 of everything that determines the output: the raw text, the ID
+options (prefix, start_num, padding, linguistic_features), the parser in use
+(regex, or spaCy model and version) and the cache format version. Writes go
+to a temporary file that is renamed into place, so concurrent processes can
+share one cache directory and never read a partial entry. When the directory
+grows past ``max_bytes``, the least recently used entries (by mtime, refreshed
+on every hit) are deleted. Each instance keeps a running total of the bytes
+it has seen, so the directory is only scanned when that total crosses the
+bound; with several writers sharing a directory the bound is approximate
+until the next scan.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from typing import Any, Dict, Optional
+
+import normalizer
+
+
+# Bump when the cached JSON layout or the key derivation changes.
+CACHE_FORMAT_VERSION = 1
+
+
+class NormalizationCache:
+    """
+    Disk cache in front of normalize_rules_to_json.
+
+    Args:
+        directory: Cache directory (created if missing); may be shared by
+            several processes.
+        max_bytes: Size bound for all entries; older entries are evicted
+            beyond it.
+
+    Example:
+        >>> cache = NormalizationCache(".cache/normalized")
+        >>> rules_json = cache.normalize(raw_text)
+        >>> cache.stats()["hits"]
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 64 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max(1, int(max_bytes))
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        # Running size of the directory; None until the first put scans it.
+        self._total_bytes: Optional[int] = None
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(
+        raw_text: str,
+        *,
+        prefix: str = "rule",
+        start_num: int = 1,
+        padding: int = 3,
+        linguistic_features: bool = False,
+        parser: Optional[str] = None,
+    ) -> str:
+        descriptor = json.dumps(
+            {
+                "format": CACHE_FORMAT_VERSION,
+                "parser": parser if parser is not None else normalizer.parser_signature(),
+                "prefix": prefix,
+                "start_num": start_num,
+                "padding": padding,
+                "linguistic_features": bool(linguistic_features),
+            },
+            sort_keys=True,
+        )
+        digest = hashlib.sha256()
+        digest.update(descriptor.encode("utf-8"))
+        digest.update(b"\0")
+        digest.update((raw_text or "").encode("utf-8"))
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as handle:
+                rules_json = json.load(handle)
+        except OSError:
+            rules_json = None
+        except ValueError:
+            # Corrupt entry: drop it and recompute.
+            self._remove(path)
+            rules_json = None
+        else:
+            try:
+                os.utime(path)  # mark as recently used for eviction
+            except OSError:
+                pass  # e.g. a read-only cache; the entry is still valid
+        with self._lock:
+            if rules_json is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return rules_json
+
+    def put(self, key: str, rules_json: Dict[str, Any]) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as handle:
+                json.dump(rules_json, handle, ensure_ascii=False)
+                handle.flush()
+                size = os.fstat(handle.fileno()).st_size
+            try:
+                replaced = os.stat(path).st_size
+            except FileNotFoundError:
+                replaced = 0
+            os.replace(tmp_path, path)
+        except BaseException:
+            self._remove(tmp_path)
+            raise
+        with self._lock:
+            self.writes += 1
+            if self._total_bytes is not None:
+                self._total_bytes += size - replaced
+            over = self._total_bytes is None or self._total_bytes > self.max_bytes
+        if over:
+            self._evict()
+
+    def _entries(self):
+        for shard in os.listdir(self.directory):
+            shard_dir = os.path.join(self.directory, shard)
+            if not os.path.isdir(shard_dir):
+                continue
+            for name in os.listdir(shard_dir):
+                if not name.endswith(".json"):
+                    continue
+                path = os.path.join(shard_dir, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:  # removed by another process
+                    continue
+                yield stat.st_mtime, stat.st_size, path
+
+    def _evict(self) -> None:
+        """Scan the directory, delete the oldest entries past max_bytes and resync the running total."""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        evicted = 0
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            if self._remove(path):
+                evicted += 1
+            total -= size
+        with self._lock:
+            self.evictions += evicted
+            self._total_bytes = total
+
+    @staticmethod
+    def _remove(path: str) -> bool:
+        try:
+            os.unlink(path)
+            return True
+        except OSError:  # already gone, or a read-only cache directory
+            return False
+
+    def clear(self) -> None:
+        for _, _, path in list(self._entries()):
+            self._remove(path)
+        with self._lock:
+            self._total_bytes = None
+
+    def size_bytes(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "writes": self.writes,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+    def normalize(self, raw_text: str, **options: Any) -> Dict[str, Any]:
+        """Cached ``normalize_rules_to_json``; ``options`` are its keyword arguments."""
+        key_options = {
+            name: options[name]
+            for name in ("prefix", "start_num", "padding", "linguistic_features")
+            if name in options
+        }
+        key = self.make_key(raw_text, **key_options)
+        rules_json = self.get(key)
+        if rules_json is None:
+            rules_json = normalizer.normalize_rules_to_json(raw_text, **options)
+            self.put(key, rules_json)
+        return rules_json
@@ -1,22 +1,34 @@
+import copy
+import difflib
+import importlib.util
 import json
 import os
 import re
-from openai import OpenAI
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
 
-# Try to import spaCy for NLP-based parsing (Task 1.3)
-try:
-    import spacy
-    SPACY_AVAILABLE = True
-    try:
-        nlp = spacy.load("en_core_web_sm")
-    except OSError:
-        # Model not downloaded yet
-        SPACY_AVAILABLE = False
-        nlp = None
-except ImportError:
-    SPACY_AVAILABLE = False
-    nlp = None
+# spaCy model used for NLP-based parsing (Task 1.3)
+SPACY_MODEL = "en_core_web_sm"
+
+# Pipeline components the normalizer never reads. Sentence splitting,
+# _is_likely_rule and keyword extraction need the tagger, attribute ruler
+# and parser (POS tags, dependencies, noun chunks), but not entities.
+SPACY_EXCLUDE = ("ner",)
+
+# Loaded but not run by default; lemmas are only needed for
+# linguistic_features output and are added to the parsed doc on demand.
+SPACY_DISABLE = ("lemmatizer",)
+
+# spaCy and its model are only checked for here; the (slow) import and model
+# load happen on first use in get_nlp().
+SPACY_AVAILABLE = (
+    importlib.util.find_spec("spacy") is not None
+    and importlib.util.find_spec(SPACY_MODEL) is not None
+)
+nlp = None
+_nlp_lock = threading.Lock()
 
 # ---------------------------------------------------------
 # CONFIGURATION
@@ -24,16 +36,229 @@ except ImportError:
 # Load environment variables from .env file
 load_dotenv()
 
-# Initialize OpenAI client with API key from environment
+# OpenAI API key from environment; the client itself is created by get_client()
 api_key = os.getenv("OPENAI_API_KEY", "YOUR_OPENAI_API_KEY_HERE")
-client = OpenAI(api_key=api_key)
+client = None
+_client_lock = threading.Lock()
+
+# Chat model used by normalize_rules and adjudicate_dispute
+OPENAI_MODEL = "gpt-4o"  # Or gpt-3.5-turbo
+
+# Optional persistent cache of OpenAI responses (llm_cache.LLMResponseCache).
+# Set OAP_LLM_CACHE_PATH to a database file, or call set_response_cache().
+response_cache = None
+_response_cache_lock = threading.Lock()
+
+
+def get_nlp():
+    """
+    Return the shared spaCy pipeline, loading it on first use
+    
+    The model is loaded with SPACY_EXCLUDE components removed and
+    SPACY_DISABLE components switched off. Returns None
+    (and clears SPACY_AVAILABLE) when spaCy or the model cannot be loaded, so
+    callers fall back to regex parsing.
+    
+    Returns:
+        spacy.language.Language or None: The loaded pipeline
+    """
+    global nlp, SPACY_AVAILABLE
+    if nlp is not None or not SPACY_AVAILABLE:
+        return nlp
+    with _nlp_lock:
+        if nlp is None and SPACY_AVAILABLE:
+            try:
+                import spacy
+                nlp = spacy.load(
+                    SPACY_MODEL, exclude=list(SPACY_EXCLUDE), disable=list(SPACY_DISABLE)
+                )
+            except (ImportError, OSError):
+                # spaCy or the model is not usable
+                SPACY_AVAILABLE = False
+    return nlp
+
+
+def parser_signature():
+    """
+    Identify the parser normalize_rules_to_json will use
+    
+    Returns "regex" for the fallback parser, or the spaCy pipeline name and
+    version plus the spaCy version (e.g. "spacy:core_web_sm:3.8.0:3.8.16"),
+    so results cached under one parser are not reused after a model change.
+    
+    Returns:
+        str: Parser signature
+    """
+    pipeline = get_nlp()
+    if pipeline is None:
+        return "regex"
+    meta = getattr(pipeline, "meta", None) or {}
+    try:
+        import spacy
+        spacy_version = spacy.__version__
+    except ImportError:
+        spacy_version = "unknown"
+    return f"spacy:{meta.get('name', 'unknown')}:{meta.get('version', 'unknown')}:{spacy_version}"
+
+
+def get_client():
+    """
+    Return the shared OpenAI client, creating it on first use
+    
+    Returns:
+        openai.OpenAI: Client configured with api_key
+    """
+    global client
+    if client is not None:
+        return client
+    with _client_lock:
+        if client is None:
+            from openai import OpenAI
+            client = OpenAI(api_key=api_key)
+    return client
+
+
+def get_response_cache():
+    """
+    Return the OpenAI response cache, if one is configured
+    
+    When none was set, opens the database named by OAP_LLM_CACHE_PATH on
+    first use.
+    
+    Returns:
+        llm_cache.LLMResponseCache or None: The shared response cache
+    """
+    global response_cache
+    if response_cache is not None:
+        return response_cache
+    cache_path = os.getenv("OAP_LLM_CACHE_PATH")
+    if cache_path:
+        with _response_cache_lock:
+            if response_cache is None:
+                from llm_cache import LLMResponseCache
+                response_cache = LLMResponseCache(cache_path)
+    return response_cache
+
+
+def set_response_cache(cache):
+    """
+    Use cache for OpenAI responses (None turns caching off unless
+    OAP_LLM_CACHE_PATH is set)
+    """
+    global response_cache
+    with _response_cache_lock:
+        response_cache = cache
+
+
+def _chat_json(system_prompt, user_content):
+    """
+    Send one JSON-mode chat request, answering repeats from the response cache
+    
+    Args:
+        system_prompt (str): System message
+        user_content (str): User message
+        
+    Returns:
+        dict: Parsed JSON response
+    """
+    cache = get_response_cache()
+    if cache is not None:
+        key = cache.make_key(OPENAI_MODEL, system_prompt, user_content)
+        content = cache.get(key)
+        if content is not None:
+            return json.loads(content)
+    
+    response = get_client().chat.completions.create(
+        model=OPENAI_MODEL,
+        messages=[
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_content}
+        ],
+        response_format={"type": "json_object"}
+    )
+    content = response.choices[0].message.content
+    result = json.loads(content)  # only valid JSON responses are cached
+    if cache is not None:
+        cache.put(key, content, model=OPENAI_MODEL)
+    return result
+
+
+# Default number of texts spaCy processes per nlp.pipe() batch
+NLP_BATCH_SIZE = 256
+
+# ---------------------------------------------------------
+# RULE VOCABULARIES
+# Built once at import; matched with plain substring checks, which CPython
+# runs faster than a combined alternation regex for vocabularies this size.
+# ---------------------------------------------------------
+
+# Rule indicator keywords (NLP path and keyword-only detection)
+RULE_INDICATORS = (
+    'must', 'should', 'cannot', "can't", "don't", 'do not',
+    'never', 'always', 'prohibited', 'allowed', 'required',
+    'no ', 'not ', 'please', 'be ', 'keep', 'avoid',
+    'shall', 'will not', "won't", 'forbidden', 'banned',
+    'ensure', 'make sure', 'refrain', 'respect', 'report'
+)
+
+# The first 17 indicators: the set the regex fallback parser (Task 1.2) uses
+BASIC_RULE_INDICATORS = RULE_INDICATORS[:17]
+
+# Welcome/intro text that is never a rule
+INTRO_PHRASES = ('welcome', 'introduction', 'about us', 'overview', 'thank you')
+
+# Words that make a short clause a complete rule in the regex parser
+COMPLETE_RULE_WORDS = ('must', 'should', 'prohibited', 'required', 'allowed')
+COMPLETE_RULE_PREFIXES = ('No ', 'Do not ', "Don't ", 'Never ', 'Always ')
+
+# Category keywords, checked in priority order: the first category with a hit wins
+CATEGORY_KEYWORDS = (
+    ("hate_speech", ("hate speech", "hate", "discriminat", "racist", "sexist", "slur", "bigot")),
+    ("harassment", ("harass", "bully", "intimidat", "threaten", "stalk", "abuse")),
+    ("doxxing", ("doxx", "personal information", "private information", "address", "phone number", "real name")),
+    ("spam", ("spam", "promotional", "advertis", "self-promotion", "commercial")),
+    ("violence", ("violence", "violent", "harm", "attack", "assault", "threat")),
+    ("nsfw", ("nsfw", "explicit", "sexual", "pornograph", "adult content", "nudity")),
+    ("misinformation", ("misinformation", "false information", "fake news", "misleading")),
+    ("relevance", ("relevant", "on topic", "off topic", "community topic", "subject matter")),
+    ("respect", ("respect", "polite", "civil", "courteous", "kind")),
+    ("conduct", ("conduct", "behavior", "behave", "appropriate", "inappropriate")),
+)
+
+# Keyword extraction fallback vocabularies
+IMPORTANT_TERMS = frozenset([
+    'harassment', 'bullying', 'spam', 'promotional', 'hate speech',
+    'doxxing', 'violence', 'threat', 'abuse', 'discrimination',
+    'respect', 'relevant', 'appropriate', 'prohibited', 'allowed',
+    'content', 'post', 'comment', 'user', 'member', 'community'
+])
+KEYWORD_STOPWORDS = frozenset([
+    'should', 'would', 'could', 'their', 'there', 'these', 'those', 'about', 'which'
+])
+
+
+# Parsing patterns, compiled once
+NUMBERED_LINE_RE = re.compile(r'^\s*(\d+[\.\)]\s*|[-*•]\s*)')
+WHITESPACE_RE = re.compile(r'\s+')
+KEYWORD_PUNCTUATION_RE = re.compile(r'[.,!?;:]')
+SENTENCE_BOUNDARY_RE = re.compile(
+    r'\.(?=\s+(?:[A-Z]|No |Users |All |Do not |Don\'t |Never |Always |Must |Should |Cannot ))'
+)
+
+
+def _contains_any(text, vocabulary):
+    """True if any entry of ``vocabulary`` is a substring of ``text``"""
+    for entry in vocabulary:
+        if entry in text:
+            return True
+    return False
 
 # ---------------------------------------------------------
 # MODULE 1: THE RULEBOOK NORMALIZER
 # (Turns messy text into a rigid, numbered list)
 # ---------------------------------------------------------
 
-def parse_rule_clauses(raw_text):
+def parse_rule_clauses(raw_text, batch_size=NLP_BATCH_SIZE, n_process=1):
     """
     Task 1.2 & 1.3: Implement text parsing to identify discrete rule clauses
     Enhanced with NLP techniques for better extraction
@@ -43,6 +268,8 @@ def parse_rule_clauses(raw_text):
     
     Args:
         raw_text (str): Raw community guidelines or rules text
+        batch_size (int): Texts per spaCy nlp.pipe() batch (NLP path only)
+        n_process (int): Worker processes for nlp.pipe() (NLP path only)
         
     Returns:
         list: List of identified rule clause strings
@@ -54,14 +281,14 @@ def parse_rule_clauses(raw_text):
     text = raw_text.strip()
     
     # Task 1.3: Use NLP techniques if spaCy is available
-    if SPACY_AVAILABLE and nlp is not None:
-        return _parse_with_nlp(text)
+    if get_nlp() is not None:
+        return _parse_with_nlp(text, batch_size=batch_size, n_process=n_process)
     else:
         # Fallback to regex-based parsing (Task 1.2)
         return _parse_with_regex(text)
 
 
-def _parse_with_nlp(text):
+def _parse_with_nlp(text, batch_size=NLP_BATCH_SIZE, n_process=1):
     """
     Task 1.3: Extract individual rules using NLP techniques (spaCy)
     
@@ -73,12 +300,30 @@ def _parse_with_nlp(text):
     
     Args:
         text (str): Raw text to parse
+        batch_size (int): Lines per nlp.pipe() batch in the line-based fallback
+        n_process (int): Worker processes for nlp.pipe()
         
     Returns:
         list: List of extracted rule clauses
     """
+    return [clause for clause, _ in _parse_clause_spans(text, batch_size, n_process)]
+
+
+def _parse_clause_spans(text, batch_size=NLP_BATCH_SIZE, n_process=1):
+    """
+    Same parsing as _parse_with_nlp, keeping the spaCy span each clause came from
+    
+    The span lets linguistic_features (and keyword extraction, with
+    span_keywords) reuse the parse instead of running the pipeline again for
+    every rule. categorize_rule works on the clause text and does not use it.
+    
+    Returns:
+        list: (clause text, spacy.tokens.Span) pairs
+    """
+    nlp = get_nlp()
     doc = nlp(text)
     clauses = []
+    spans = []
     
     # Strategy 1: Use spaCy's sentence segmentation
     # This is more sophisticated than regex as it understands linguistic structure
@@ -94,29 +339,34 @@ def _parse_with_nlp(text):
         
         if cleaned and len(cleaned) > 5:
             clauses.append(cleaned)
+            spans.append(sent)
     
     # Strategy 2: If no sentences found or very few, try splitting by line breaks
     # This handles bulleted/numbered lists that spaCy might not segment well
     if len(clauses) < 2:
-        lines = text.split('\n')
-        numbered_pattern = r'^\s*(\d+[\.\)]\s*|[-*•]\s*)'
+        seen = set(clauses)  # Avoid duplicates, keeping first occurrences
+        candidates = []
         
-        for line in lines:
+        for line in text.split('\n'):
             line = line.strip()
             if not line:
                 continue
             
             # Remove numbering/bullets
-            cleaned = re.sub(numbered_pattern, '', line).strip()
+            cleaned = NUMBERED_LINE_RE.sub('', line, count=1).strip()
             
-            if cleaned and len(cleaned) > 5:
-                # Check if it's a rule using NLP
-                line_doc = nlp(cleaned)
-                if any(_is_likely_rule(sent.text, sent) for sent in line_doc.sents):
-                    if cleaned not in clauses:  # Avoid duplicates
-                        clauses.append(cleaned)
+            if cleaned and len(cleaned) > 5 and cleaned not in seen:
+                seen.add(cleaned)
+                candidates.append(cleaned)
+        
+        # Check which lines are rules using NLP, all lines in one batched pass
+        line_docs = nlp.pipe(candidates, batch_size=batch_size, n_process=n_process)
+        for cleaned, line_doc in zip(candidates, line_docs):
+            if any(_is_likely_rule(sent.text, sent) for sent in line_doc.sents):
+                clauses.append(cleaned)
+                spans.append(line_doc[:])
     
-    return clauses
+    return list(zip(clauses, spans))
 
 
 def _is_likely_rule(text, sent_doc=None):
@@ -138,25 +388,13 @@ def _is_likely_rule(text, sent_doc=None):
     """
     text_lower = text.lower()
     
-    # Rule indicator keywords
-    rule_indicators = [
-        'must', 'should', 'cannot', "can't", "don't", 'do not',
-        'never', 'always', 'prohibited', 'allowed', 'required',
-        'no ', 'not ', 'please', 'be ', 'keep', 'avoid',
-        'shall', 'will not', "won't", 'forbidden', 'banned',
-        'ensure', 'make sure', 'refrain', 'respect', 'report'
-    ]
-    
-    # Check for rule indicators
-    has_indicator = any(indicator in text_lower for indicator in rule_indicators)
-    
     # Filter out welcome/intro text
-    intro_phrases = ['welcome', 'introduction', 'about us', 'overview', 'thank you']
-    is_intro = any(phrase in text_lower for phrase in intro_phrases)
-    
-    if is_intro:
+    if _contains_any(text_lower, INTRO_PHRASES):
         return False
     
+    # Check for rule indicators
+    has_indicator = _contains_any(text_lower, RULE_INDICATORS)
+    
     # If we have spaCy doc, use linguistic analysis
     if sent_doc is not None:
         # Check for modal verbs (MD tag)
@@ -198,7 +436,7 @@ def _clean_clause(text):
         str: Cleaned clause text
     """
     # Remove extra whitespace
-    text = re.sub(r'\s+', ' ', text).strip()
+    text = WHITESPACE_RE.sub(' ', text).strip()
     
     # Ensure proper ending punctuation
     if text and not text[-1] in '.!?':
@@ -260,25 +498,10 @@ def categorize_rule(rule_text):
     """
     text_lower = rule_text.lower()
     
-    # Define category patterns with keywords
-    category_patterns = {
-        "hate_speech": ["hate speech", "hate", "discriminat", "racist", "sexist", "slur", "bigot"],
-        "harassment": ["harass", "bully", "intimidat", "threaten", "stalk", "abuse"],
-        "doxxing": ["doxx", "personal information", "private information", "address", "phone number", "real name"],
-        "spam": ["spam", "promotional", "advertis", "self-promotion", "commercial"],
-        "violence": ["violence", "violent", "harm", "attack", "assault", "threat"],
-        "nsfw": ["nsfw", "explicit", "sexual", "pornograph", "adult content", "nudity"],
-        "misinformation": ["misinformation", "false information", "fake news", "misleading"],
-        "relevance": ["relevant", "on topic", "off topic", "community topic", "subject matter"],
-        "respect": ["respect", "polite", "civil", "courteous", "kind"],
-        "conduct": ["conduct", "behavior", "behave", "appropriate", "inappropriate"]
-    }
-    
-    # Check each category
-    for category, keywords in category_patterns.items():
-        for keyword in keywords:
-            if keyword in text_lower:
-                return category
+    # Check each category in priority order
+    for category, keywords in CATEGORY_KEYWORDS:
+        if _contains_any(text_lower, keywords):
+            return category
     
     # Default category if no match found
     return "general"
@@ -300,51 +523,148 @@ def extract_keywords(rule_text, max_keywords=5):
     Returns:
         list: List of extracted keywords
     """
-    keywords = []
-    text_lower = rule_text.lower()
-    
-    # Remove common punctuation for keyword extraction
-    text_clean = re.sub(r'[.,!?;:]', '', text_lower)
+    text_clean = _keyword_text(rule_text)
     
     # If spaCy is available, use NLP for better keyword extraction
-    if SPACY_AVAILABLE and nlp is not None:
-        doc = nlp(text_clean)
-        
-        # Extract nouns, verbs, and adjectives
-        for token in doc:
-            # Skip stop words, short words, and common words
-            if (token.pos_ in ['NOUN', 'VERB', 'ADJ'] and 
-                not token.is_stop and 
-                len(token.text) > 2 and
-                token.text not in ['must', 'should', 'will', 'can', 'may', 'shall']):
-                keywords.append(token.text)
-        
-        # Also look for multi-word expressions (noun chunks)
-        for chunk in doc.noun_chunks:
-            chunk_text = chunk.text.strip()
-            if len(chunk_text.split()) > 1 and len(chunk_text) > 5:
-                keywords.append(chunk_text)
+    nlp = get_nlp()
+    if nlp is not None:
+        keywords = _keywords_from_doc(nlp(text_clean))
     else:
-        # Fallback: Extract words based on patterns
-        words = text_clean.split()
-        
-        # Important rule-related terms
-        important_terms = [
-            'harassment', 'bullying', 'spam', 'promotional', 'hate speech',
-            'doxxing', 'violence', 'threat', 'abuse', 'discrimination',
-            'respect', 'relevant', 'appropriate', 'prohibited', 'allowed',
-            'content', 'post', 'comment', 'user', 'member', 'community'
-        ]
+        keywords = _keywords_from_words(text_clean)
+    
+    return _unique_keywords(keywords, max_keywords)
+
+
+def extract_keywords_batch(rule_texts, max_keywords=5, batch_size=NLP_BATCH_SIZE, n_process=1):
+    """
+    Extract keywords for many rules at once
+    
+    Same output as calling extract_keywords on each rule, but all rules go
+    through a single spaCy nlp.pipe() call instead of one nlp() call per rule.
+    
+    Args:
+        rule_texts (list): Rule texts
+        max_keywords (int): Maximum number of keywords per rule (default: 5)
+        batch_size (int): Texts per nlp.pipe() batch
+        n_process (int): Worker processes for nlp.pipe()
         
-        for word in words:
-            # Add important terms
-            if word in important_terms:
-                keywords.append(word)
-            # Add longer words that aren't common stop words
-            elif (len(word) > 4 and 
-                  word not in ['should', 'would', 'could', 'their', 'there', 'these', 'those', 'about', 'which']):
-                keywords.append(word)
+    Returns:
+        list: One keyword list per rule text, in order
+    """
+    cleaned_texts = [_keyword_text(rule_text) for rule_text in rule_texts]
+    
+    nlp = get_nlp()
+    if nlp is not None:
+        docs = nlp.pipe(cleaned_texts, batch_size=batch_size, n_process=n_process)
+        return [_unique_keywords(_keywords_from_doc(doc), max_keywords) for doc in docs]
+    
+    return [
+        _unique_keywords(_keywords_from_words(text_clean), max_keywords)
+        for text_clean in cleaned_texts
+    ]
+
+
+def _keyword_text(rule_text):
+    # Remove common punctuation for keyword extraction
+    return KEYWORD_PUNCTUATION_RE.sub('', rule_text.lower())
+
+
+def _keywords_from_doc(doc):
+    """Candidate keywords from a spaCy doc: content words, then noun chunks"""
+    keywords = []
+    
+    # Extract nouns, verbs, and adjectives
+    for token in doc:
+        # Skip stop words, short words, and common words
+        if (token.pos_ in ['NOUN', 'VERB', 'ADJ'] and 
+            not token.is_stop and 
+            len(token.text) > 2 and
+            token.text not in ['must', 'should', 'will', 'can', 'may', 'shall']):
+            keywords.append(token.text)
+    
+    # Also look for multi-word expressions (noun chunks)
+    for chunk in doc.noun_chunks:
+        chunk_text = chunk.text.strip()
+        if len(chunk_text.split()) > 1 and len(chunk_text) > 5:
+            keywords.append(chunk_text)
+    
+    return keywords
+
+
+def _keywords_from_span(span):
+    """
+    Candidate keywords read from the clause's own parse
+    
+    Uses the same filters as _keywords_from_doc on the span produced during
+    clause extraction, lowercased and with punctuation stripped, so the rule
+    is not parsed a second time.
+    """
+    keywords = []
+    
+    for token in span:
+        text = _keyword_text(token.text)
+        if (token.pos_ in ['NOUN', 'VERB', 'ADJ'] and 
+            not token.is_stop and 
+            len(text) > 2 and
+            text not in ['must', 'should', 'will', 'can', 'may', 'shall']):
+            keywords.append(text)
     
+    for chunk in span.noun_chunks:
+        chunk_text = _keyword_text(chunk.text).strip()
+        if len(chunk_text.split()) > 1 and len(chunk_text) > 5:
+            keywords.append(chunk_text)
+    
+    return keywords
+
+
+def _linguistic_features(span):
+    """
+    Lemmas of the content words and the noun chunks of a clause span
+    
+    Lemmas come from spaCy's lemmatizer when the pipeline has one (see
+    get_nlp); otherwise the lowercased token text is used.
+    """
+    lemmas = []
+    for token in span:
+        if token.is_alpha and not token.is_stop:
+            lemma = (token.lemma_ or token.text).lower()
+            if lemma not in lemmas:
+                lemmas.append(lemma)
+    
+    noun_chunks = [chunk.text.strip() for chunk in span.noun_chunks]
+    return {"lemmas": lemmas, "noun_chunks": noun_chunks}
+
+
+def _add_lemmas(spans):
+    """Run the disabled lemmatizer once on each parsed doc behind ``spans``"""
+    nlp = get_nlp()
+    if nlp is None or "lemmatizer" not in nlp.disabled:
+        return
+    lemmatizer = nlp.get_pipe("lemmatizer")
+    seen = set()
+    for span in spans:
+        if id(span.doc) not in seen:
+            seen.add(id(span.doc))
+            lemmatizer(span.doc)
+
+
+def _keywords_from_words(text_clean):
+    """Fallback: Extract words based on patterns"""
+    keywords = []
+    words = text_clean.split()
+    
+    for word in words:
+        # Add important terms
+        if word in IMPORTANT_TERMS:
+            keywords.append(word)
+        # Add longer words that aren't common stop words
+        elif len(word) > 4 and word not in KEYWORD_STOPWORDS:
+            keywords.append(word)
+    
+    return keywords
+
+
+def _unique_keywords(keywords, max_keywords):
     # Remove duplicates while preserving order
     seen = set()
     unique_keywords = []
@@ -357,7 +677,9 @@ def extract_keywords(rule_text, max_keywords=5):
     return unique_keywords[:max_keywords]
 
 
-def format_rules_json(clauses, prefix="rule", start_num=1, padding=3):
+def format_rules_json(clauses, prefix="rule", start_num=1, padding=3,
+                      batch_size=NLP_BATCH_SIZE, n_process=1, spans=None,
+                      linguistic_features=False, span_keywords=False):
     """
     Task 1.5: Output structured JSON format with rule clauses
     
@@ -374,6 +696,17 @@ def format_rules_json(clauses, prefix="rule", start_num=1, padding=3):
         prefix (str): Prefix for the identifier (default: "rule")
         start_num (int): Starting number for identifiers (default: 1)
         padding (int): Number of digits to pad the number (default: 3)
+        batch_size (int): Texts per spaCy nlp.pipe() batch for keyword extraction
+        n_process (int): Worker processes for nlp.pipe()
+        spans (list, optional): spaCy span of each clause from parsing, used
+            for linguistic_features and span_keywords. Categories are always
+            computed from the clause text, not from the span.
+        linguistic_features (bool): Add "lemmas" and "noun_chunks" to each
+            rule (requires spans)
+        span_keywords (bool): Read keywords from ``spans`` instead of
+            re-tagging each clause (default: False). Saves a spaCy pass, but
+            the span is tagged in its original case with punctuation, so
+            keywords can differ from extract_keywords.
         
     Returns:
         dict: Dictionary with 'rules' key containing list of complete rule objects
@@ -400,16 +733,23 @@ def format_rules_json(clauses, prefix="rule", start_num=1, padding=3):
     """
     rules = []
     
-    for i, clause in enumerate(clauses, start=start_num):
+    if linguistic_features and spans is not None:
+        _add_lemmas(spans)
+    
+    if span_keywords and spans is not None:
+        # Reuse the parse from clause extraction
+        all_keywords = [_unique_keywords(_keywords_from_span(span), 5) for span in spans]
+    else:
+        # Extract keywords for all clauses in one batched NLP pass
+        all_keywords = extract_keywords_batch(clauses, batch_size=batch_size, n_process=n_process)
+    
+    for i, (clause, keywords) in enumerate(zip(clauses, all_keywords), start=start_num):
         # Format the identifier with zero-padding
         rule_id = f"{prefix}_{str(i).zfill(padding)}"
         
         # Categorize the rule
         category = categorize_rule(clause)
         
-        # Extract keywords
-        keywords = extract_keywords(clause)
-        
         # Create the complete rule object
         rule = {
             "id": rule_id,
@@ -418,12 +758,17 @@ def format_rules_json(clauses, prefix="rule", start_num=1, padding=3):
             "keywords": keywords
         }
         
+        if linguistic_features and spans is not None:
+            rule.update(_linguistic_features(spans[i - start_num]))
+        
         rules.append(rule)
     
     return {"rules": rules}
 
 
-def normalize_rules_to_json(raw_text, prefix="rule", start_num=1, padding=3):
+def normalize_rules_to_json(raw_text, prefix="rule", start_num=1, padding=3,
+                            batch_size=NLP_BATCH_SIZE, n_process=1,
+                            linguistic_features=False, span_keywords=False):
     """
     Complete workflow: Parse raw text and output structured JSON
     
@@ -439,6 +784,12 @@ def normalize_rules_to_json(raw_text, prefix="rule", start_num=1, padding=3):
         prefix (str): Prefix for rule identifiers (default: "rule")
         start_num (int): Starting number for identifiers (default: 1)
         padding (int): Number of digits to pad the number (default: 3)
+        batch_size (int): Texts per spaCy nlp.pipe() batch (default: NLP_BATCH_SIZE)
+        n_process (int): Worker processes for nlp.pipe() (default: 1)
+        linguistic_features (bool): Add "lemmas" and "noun_chunks" to each
+            rule when NLP parsing is used (default: False)
+        span_keywords (bool): Take keywords from the clause parse instead of
+            re-tagging each rule; see format_rules_json (default: False)
         
     Returns:
         dict: Complete structured JSON with all rules
@@ -449,10 +800,309 @@ def normalize_rules_to_json(raw_text, prefix="rule", start_num=1, padding=3):
         >>> print(json.dumps(result, indent=2))
     """
     # Step 1-3: Parse and extract clauses
-    clauses = parse_rule_clauses(raw_text)
+    clauses, spans = _extract_clauses(raw_text, batch_size, n_process)
     
     # Step 4-5: Format with IDs, categories, and keywords
-    return format_rules_json(clauses, prefix, start_num, padding)
+    return format_rules_json(clauses, prefix, start_num, padding,
+                             batch_size=batch_size, n_process=n_process, spans=spans,
+                             linguistic_features=linguistic_features, span_keywords=span_keywords)
+
+
+def _extract_clauses(raw_text, batch_size=NLP_BATCH_SIZE, n_process=1):
+    """
+    Parse clauses, keeping each clause's spaCy span when NLP parsing is used
+    
+    Returns:
+        tuple: (list of clause strings, list of spans or None on the regex path)
+    """
+    # With spaCy, keep each clause's span so every rule is parsed only once
+    if raw_text and raw_text.strip() and get_nlp() is not None:
+        pairs = _parse_clause_spans(raw_text.strip(), batch_size, n_process)
+        return [clause for clause, _ in pairs], [span for _, span in pairs]
+    
+    return parse_rule_clauses(raw_text, batch_size=batch_size, n_process=n_process), None
+
+
+# Minimum difflib similarity for a replaced clause to count as an edit of
+# the old clause (keeping its ID) rather than a removal plus an addition
+MODIFIED_SIMILARITY = 0.5
+
+
+def renormalize_rules_to_json(previous_rules, raw_text, prefix="rule", start_num=1, padding=3,
+                              batch_size=NLP_BATCH_SIZE, n_process=1,
+                              linguistic_features=False):
+    """
+    Incremental normalization of an edited rulebook with stable rule IDs
+    
+    Clauses are parsed from the new text and diffed against the texts of the
+    previously normalized rules. Unchanged clauses, including ones that were
+    moved, keep their previous rule objects (ID, category, keywords) without
+    being analyzed again; only added and edited clauses are categorized and
+    have keywords extracted. Edited clauses keep the ID of the rule they
+    replace. New clauses are numbered from ``next_id``, the high-water mark
+    stored in the returned rules JSON (or after the highest ``{prefix}_N`` ID
+    when it is missing), so removed IDs are never reused.
+    
+    Args:
+        previous_rules (dict): Earlier output of normalize_rules_to_json
+        raw_text (str): The edited rules text
+        prefix (str): Prefix for new rule identifiers (default: "rule")
+        start_num (int): First number to use if no previous ID has the prefix
+        padding (int): Number of digits to pad new identifiers (default: 3)
+        batch_size (int): Texts per spaCy nlp.pipe() batch
+        n_process (int): Worker processes for nlp.pipe()
+        linguistic_features (bool): Add "lemmas" and "noun_chunks" to
+            re-analyzed rules when NLP parsing is used
+        
+    Returns:
+        tuple: (rules JSON with "rules" and "next_id", change set). The
+            change set is {"added": [rule, ...], "modified": [rule, ...],
+            "removed": [rule_id, ...], "unchanged": int}
+        
+    Example:
+        >>> rules, changes = renormalize_rules_to_json(old_rules, edited_text)
+        >>> [rule["id"] for rule in changes["modified"]]
+        ['rule_004']
+    """
+    previous = list((previous_rules or {}).get("rules") or [])
+    clauses, spans = _extract_clauses(raw_text, batch_size, n_process)
+    
+    kept = [None] * len(clauses)      # previous rule reused as-is
+    edited_ids = [None] * len(clauses)  # ID carried over to an edited clause
+    
+    old_texts = [rule.get("text", "") for rule in previous]
+    matcher = difflib.SequenceMatcher(None, old_texts, clauses, autojunk=False)
+    blocks = []
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            for offset in range(i2 - i1):
+                kept[j1 + offset] = previous[i1 + offset]
+        else:
+            blocks.append((tag, i1, i2, j1, j2))
+    
+    # Moved clauses: an inserted clause whose text matches a deleted rule
+    unmatched_old = {}
+    for _, i1, i2, _, _ in blocks:
+        for i in range(i1, i2):
+            unmatched_old.setdefault(old_texts[i], []).append(i)
+    moved = set()
+    for _, _, _, j1, j2 in blocks:
+        for j in range(j1, j2):
+            candidates = unmatched_old.get(clauses[j])
+            if candidates:
+                i = candidates.pop(0)
+                kept[j] = previous[i]
+                moved.add(i)
+    
+    # Pair the rest of each replaced block in order; dissimilar pairs are remove + add
+    removed = []
+    for tag, i1, i2, j1, j2 in blocks:
+        old_left = [i for i in range(i1, i2) if i not in moved]
+        new_left = [j for j in range(j1, j2) if kept[j] is None]
+        paired = set()
+        if tag == "replace":
+            for i, j in zip(old_left, new_left):
+                if _is_edit_of(old_texts[i], clauses[j]):
+                    edited_ids[j] = previous[i].get("id")
+                    paired.add(i)
+        removed.extend(previous[i].get("id") for i in old_left if i not in paired)
+    
+    # Re-analyze only clauses that were added or edited
+    changed = [j for j in range(len(clauses)) if kept[j] is None]
+    enriched = format_rules_json(
+        [clauses[j] for j in changed], prefix, start_num, padding,
+        batch_size=batch_size, n_process=n_process,
+        spans=[spans[j] for j in changed] if spans is not None else None,
+        linguistic_features=linguistic_features,
+    )["rules"]
+    
+    next_num = _next_rule_number(previous, prefix, start_num)
+    stored_next = (previous_rules or {}).get("next_id")
+    if isinstance(stored_next, int):
+        next_num = max(next_num, stored_next)
+    added, modified = [], []
+    for j, rule in zip(changed, enriched):
+        if edited_ids[j] is not None:
+            rule["id"] = edited_ids[j]
+            modified.append(rule)
+        else:
+            rule["id"] = f"{prefix}_{str(next_num).zfill(padding)}"
+            next_num += 1
+            added.append(rule)
+        kept[j] = rule
+    
+    rules = [copy.deepcopy(rule) for rule in kept]
+    changes = {
+        "added": added,
+        "modified": modified,
+        "removed": removed,
+        "unchanged": len(clauses) - len(changed),
+    }
+    return {"rules": rules, "next_id": next_num}, changes
+
+
+def _is_edit_of(old_text, new_text):
+    matcher = difflib.SequenceMatcher(None, old_text.lower(), new_text.lower(), autojunk=False)
+    return matcher.quick_ratio() >= MODIFIED_SIMILARITY and matcher.ratio() >= MODIFIED_SIMILARITY
+
+
+def _next_rule_number(rules, prefix, start_num):
+    """First number after the highest existing ``{prefix}_N`` identifier"""
+    id_pattern = re.compile(rf"^{re.escape(prefix)}_(\d+)$")
+    numbers = [
+        int(match.group(1))
+        for match in (id_pattern.match(str(rule.get("id", ""))) for rule in rules)
+        if match
+    ]
+    return max(numbers) + 1 if numbers else start_num
+
+
+# Characters of text parsed at a time by iter_normalized_rules; well below
+# spaCy's default nlp.max_length of 1,000,000
+STREAM_CHUNK_CHARS = 100_000
+
+
+def iter_normalized_rules(source, prefix="rule", start_num=1, padding=3,
+                          max_chunk_chars=STREAM_CHUNK_CHARS,
+                          batch_size=NLP_BATCH_SIZE, n_process=1):
+    """
+    Streaming normalization of large policy documents
+    
+    Reads ``source`` line by line, groups lines into chunks of at most
+    ``max_chunk_chars`` that end on a paragraph or section boundary (a blank
+    line or a Markdown heading) whenever possible, normalizes each chunk and
+    yields the enriched rule dicts one at a time. IDs continue across chunks.
+    Memory stays bounded by the chunk size, and no single nlp() call sees more
+    than one chunk. Documents shorter than one chunk give the same rules as
+    normalize_rules_to_json.
+    
+    Args:
+        source (str or iterable): Path to a text file, or an iterable of
+            lines such as an open file or sys.stdin
+        prefix (str): Prefix for rule identifiers (default: "rule")
+        start_num (int): Starting number for identifiers (default: 1)
+        padding (int): Number of digits to pad the number (default: 3)
+        max_chunk_chars (int): Target maximum characters per parsed chunk
+        batch_size (int): Texts per spaCy nlp.pipe() batch
+        n_process (int): Worker processes for nlp.pipe()
+        
+    Yields:
+        dict: Rule objects with id, text, category and keywords
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "r", encoding="utf-8") as handle:
+            yield from iter_normalized_rules(handle, prefix, start_num, padding,
+                                             max_chunk_chars, batch_size, n_process)
+        return
+    
+    next_num = start_num
+    for chunk in _iter_text_chunks(source, max_chunk_chars):
+        rules = normalize_rules_to_json(chunk, prefix, next_num, padding,
+                                        batch_size=batch_size, n_process=n_process)["rules"]
+        next_num += len(rules)
+        yield from rules
+
+
+def _iter_text_chunks(lines, max_chars):
+    """Group lines into chunks of up to ``max_chars``, cut at paragraph boundaries"""
+    buffer = []
+    size = 0
+    boundary = 0        # buffer index of the last paragraph/section start
+    boundary_size = 0   # characters before that index
+    in_break = False    # previous line was blank or a heading
+    
+    for line in lines:
+        for piece in _split_long_line(line, max_chars):
+            stripped = piece.strip()
+            is_break = not stripped or stripped.startswith('#')
+            # A run of blank lines and headings starts one section
+            starts_section = is_break and not in_break
+            in_break = is_break
+            # The text carried over from a paragraph cut can still be too
+            # large to take this line, so keep cutting until it fits
+            while buffer and size + len(piece) > max_chars:
+                # Cut at the last paragraph boundary unless that leaves a
+                # small chunk (one very long paragraph) or this line starts a
+                # section; then cut at this line
+                if boundary_size >= max_chars // 2 and not starts_section:
+                    cut, cut_size = boundary, boundary_size
+                else:
+                    cut, cut_size = len(buffer), size
+                yield "".join(buffer[:cut])
+                buffer = buffer[cut:]
+                size -= cut_size
+                boundary, boundary_size = 0, 0
+            if starts_section:
+                boundary, boundary_size = len(buffer), size
+            buffer.append(piece)
+            size += len(piece)
+    
+    if buffer:
+        yield "".join(buffer)
+
+
+def _split_long_line(line, max_chars):
+    """Split a line longer than ``max_chars`` at whitespace"""
+    while len(line) > max_chars:
+        cut = line.rfind(' ', 0, max_chars) + 1
+        if cut <= 1:
+            cut = max_chars
+        yield line[:cut]
+        line = line[cut:]
+    if line:
+        yield line
+
+
+def write_rules_stream(rules, output, fmt="ndjson"):
+    """
+    Write rule dicts to ``output`` as they are produced
+    
+    Args:
+        rules (iterable): Rule dicts, e.g. from iter_normalized_rules
+        output (file-like): Text stream to write to
+        fmt (str): "ndjson" (one rule per line) or "json" (a {"rules": [...]}
+            document, written incrementally)
+        
+    Returns:
+        int: Number of rules written
+    """
+    if fmt not in ("ndjson", "json"):
+        raise ValueError(f"Unsupported format: {fmt}")
+    
+    count = 0
+    if fmt == "json":
+        output.write('{"rules": [')
+    for rule in rules:
+        line = json.dumps(rule, ensure_ascii=False)
+        if fmt == "json":
+            line = ("\n  " if count == 0 else ",\n  ") + line
+        else:
+            line += "\n"
+        output.write(line)
+        count += 1
+    if fmt == "json":
+        output.write("\n]}\n" if count else "]}\n")
+    return count
+
+
+def normalize_rules_file(input_path, output_path, fmt=None, **options):
+    """
+    Stream-normalize a rules file into a JSON or NDJSON file
+    
+    Args:
+        input_path (str): Raw rules text file
+        output_path (str): Destination file
+        fmt (str, optional): "json" or "ndjson"; inferred from the output
+            extension (.ndjson / .jsonl mean NDJSON) when omitted
+        **options: Passed to iter_normalized_rules
+        
+    Returns:
+        int: Number of rules written
+    """
+    if fmt is None:
+        fmt = "ndjson" if output_path.endswith((".ndjson", ".jsonl")) else "json"
+    with open(output_path, "w", encoding="utf-8") as output:
+        return write_rules_stream(iter_normalized_rules(input_path, **options), output, fmt)
 
 
 def _parse_with_regex(text):
@@ -469,32 +1119,34 @@ def _parse_with_regex(text):
     """
     clauses = []
     
-    # First, try to identify if text uses explicit numbering or bullets
-    numbered_pattern = r'^\s*(\d+[\.\)]\s*|[-*•]\s*)'
-    lines = text.split('\n')
-    
-    # Check if text uses line-based formatting (each line is a rule)
-    has_line_formatting = False
-    non_empty_lines = [line.strip() for line in lines if line.strip()]
+    # Single pass over lines: strip each one, detect numbering/bullets and
+    # remember the line without them
+    stripped_lines = []
+    formatted_lines = 0
+    for line in text.split('\n'):
+        line = line.strip()
+        if not line:
+            continue
+        match = NUMBERED_LINE_RE.match(line)
+        if match:
+            formatted_lines += 1
+            line = line[match.end():]
+        # Remove leading numbers, bullets, and whitespace
+        stripped_lines.append(line.strip())
     
-    if len(non_empty_lines) > 1:
-        # Check if lines start with numbers or bullets
-        formatted_lines = sum(1 for line in non_empty_lines if re.match(numbered_pattern, line))
-        if formatted_lines >= len(non_empty_lines) * 0.5:  # At least 50% are formatted
-            has_line_formatting = True
+    # Check if text uses line-based formatting (each line is a rule):
+    # at least 50% of lines start with numbers or bullets
+    has_line_formatting = (
+        len(stripped_lines) > 1 and formatted_lines >= len(stripped_lines) * 0.5
+    )
     
     if has_line_formatting:
-        # Parse line-by-line, removing numbering/bullets
-        for line in non_empty_lines:
-            # Remove leading numbers, bullets, and whitespace
-            cleaned = re.sub(numbered_pattern, '', line).strip()
-            # For numbered/bulleted lists, be more lenient - include all items
-            if cleaned:
-                clauses.append(cleaned)
+        # Parse line-by-line; for numbered/bulleted lists, be more lenient - include all items
+        clauses = [cleaned for cleaned in stripped_lines if cleaned]
     else:
         # Parse as continuous text - split by sentence boundaries
         # Replace multiple spaces/newlines with single space
-        text = re.sub(r'\s+', ' ', text)
+        text = WHITESPACE_RE.sub(' ', text)
         
         # First, try simple period-space split for very short sentences
         simple_split = text.split('. ')
@@ -509,17 +1161,12 @@ def _parse_with_regex(text):
                 
                 # Check if it looks like a rule
                 if len(cleaned) > 5:
-                    rule_indicators = ['must', 'should', 'cannot', "can't", "don't", 'do not', 
-                                     'never', 'always', 'prohibited', 'allowed', 'required',
-                                     'no ', 'not ', 'please', 'be ', 'keep', 'avoid']
-                    
-                    text_lower = cleaned.lower()
-                    if any(indicator in text_lower for indicator in rule_indicators):
+                    if _contains_any(cleaned.lower(), BASIC_RULE_INDICATORS):
                         clauses.append(cleaned)
         else:
             # Use more sophisticated splitting for longer sentences
             # Split by periods followed by capital letters or common rule indicators
-            sentences = re.split(r'\.(?=\s+(?:[A-Z]|No |Users |All |Do not |Don\'t |Never |Always |Must |Should |Cannot ))', text)
+            sentences = SENTENCE_BOUNDARY_RE.split(text)
             
             for sentence in sentences:
                 cleaned = sentence.strip()
@@ -530,57 +1177,316 @@ def _parse_with_regex(text):
                 # Filter out very short fragments and common non-rule text
                 if len(cleaned) > 10 and not cleaned.lower().startswith('welcome'):
                     # Check if it looks like a rule (contains modal verbs or prohibitions)
-                    rule_indicators = ['must', 'should', 'cannot', 'can\'t', 'don\'t', 'do not', 
-                                     'never', 'always', 'prohibited', 'allowed', 'required',
-                                     'no ', 'not ', 'please', 'be ', 'keep', 'avoid']
-                    
-                    text_lower = cleaned.lower()
-                    if any(indicator in text_lower for indicator in rule_indicators):
+                    if _contains_any(cleaned.lower(), BASIC_RULE_INDICATORS):
                         clauses.append(cleaned)
     
     # Additional cleanup: merge very short clauses with previous ones
     # But only if they don't look like complete rules themselves
-    merged_clauses = []
+    # (parts are collected per clause and joined once, so long runs of short
+    # clauses do not re-copy an ever-growing string)
+    merged_parts = []
     for clause in clauses:
         # Don't merge if it's a short but complete rule (like "No spam.")
         is_complete_rule = (
-            clause.strip().startswith(('No ', 'Do not ', "Don't ", 'Never ', 'Always ')) or
-            any(word in clause.lower() for word in ['must', 'should', 'prohibited', 'required', 'allowed'])
+            clause.strip().startswith(COMPLETE_RULE_PREFIXES) or
+            _contains_any(clause.lower(), COMPLETE_RULE_WORDS)
         )
         
-        if len(clause) < 15 and merged_clauses and not is_complete_rule:
+        if len(clause) < 15 and merged_parts and not is_complete_rule:
             # Merge with previous clause
-            merged_clauses[-1] = merged_clauses[-1] + ' ' + clause
+            merged_parts[-1].append(clause)
         else:
-            merged_clauses.append(clause)
+            merged_parts.append([clause])
     
-    return merged_clauses
+    return [' '.join(parts) for parts in merged_parts]
 
 
-def normalize_rules(raw_text):
-    print(">> 1. Normalizing Rulebook...")
-    system_prompt = """You are the 'Rulebook Normalizer'.
+RULEBOOK_NORMALIZER_PROMPT = """You are the 'Rulebook Normalizer'.
 Take the raw text provided and output a JSON list of individual, atomic rules.
 Format: {"rules": [{"id": "1.0", "text": "exact rule text...", "category": "conduct|spam|doxxing|harassment", "keywords": ["key", "words"]}, ...]}
 Do not change the meaning. Just split and number them."""
 
-    response = client.chat.completions.create(
-        model="gpt-4o",  # Or gpt-3.5-turbo
-        messages=[
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": raw_text}
-        ],
-        response_format={"type": "json_object"}
-    )
-    return json.loads(response.choices[0].message.content)
+
+def normalize_rules(raw_text):
+    print(">> 1. Normalizing Rulebook...")
+    return _chat_json(RULEBOOK_NORMALIZER_PROMPT, raw_text)
+
+
+# Target characters per request for normalize_rules_chunked; small enough
+# that a chunk's rules fit in one response
+LLM_CHUNK_CHARS = 8_000
+
+
+def normalize_rules_chunked(raw_text, max_chunk_chars=LLM_CHUNK_CHARS, max_workers=4, progress=None):
+    """
+    Map-reduce version of normalize_rules for long policy documents
+    
+    The document is split into chunks of at most ``max_chunk_chars`` that end
+    on section or paragraph boundaries (as in iter_normalized_rules). The
+    chunks are normalized by concurrent requests (each answered from the
+    response cache when possible), then merged by merge_normalized_chunks.
+    
+    Args:
+        raw_text (str): Raw community guidelines or terms of service
+        max_chunk_chars (int): Target maximum characters per request
+        max_workers (int): Maximum concurrent requests
+        progress (callable, optional): Called as progress(chunk_index,
+            chunk_count, rules) as each chunk finishes (in completion order)
+        
+    Returns:
+        dict: {"rules": [...]} with IDs "1.0", "2.0", ... across the document
+    """
+    print(">> 1. Normalizing Rulebook in chunks...")
+    chunks = [
+        chunk for chunk in _iter_text_chunks((raw_text or "").splitlines(keepends=True), max_chunk_chars)
+        if chunk.strip()
+    ]
+    if not chunks:
+        return {"rules": []}
+    
+    chunk_rules = [None] * len(chunks)
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(chunks)))) as pool:
+        futures = {
+            pool.submit(_chat_json, RULEBOOK_NORMALIZER_PROMPT, chunk): position
+            for position, chunk in enumerate(chunks)
+        }
+        try:
+            for future in as_completed(futures):
+                position = futures[future]
+                chunk_rules[position] = future.result().get("rules") or []
+                if progress is not None:
+                    progress(position, len(chunks), chunk_rules[position])
+        except BaseException:
+            # Do not start the remaining chunks once one has failed
+            for future in futures:
+                future.cancel()
+            raise
+    
+    return merge_normalized_chunks(chunk_rules)
+
+
+def merge_normalized_chunks(chunk_rules):
+    """
+    Merge per-chunk normalize_rules output into one rulebook
+    
+    Rules keep document order and are renumbered "1.0", "2.0", ... so IDs are
+    unique across chunks. A rule whose text repeats an earlier one (ignoring
+    case, whitespace and trailing punctuation) is dropped, and its keywords
+    are added to the first occurrence.
+    
+    Args:
+        chunk_rules (list): One list of rule dicts per chunk, in document order
+        
+    Returns:
+        dict: {"rules": [...]}
+    """
+    merged = []
+    seen = {}
+    for rules in chunk_rules:
+        for rule in rules:
+            text = str(rule.get("text", "")).strip()
+            if not text:
+                continue
+            key = " ".join(text.lower().split()).rstrip(".!;:")
+            if key in seen:
+                first = seen[key]
+                for keyword in rule.get("keywords") or []:
+                    if keyword not in first.setdefault("keywords", []):
+                        first["keywords"].append(keyword)
+                continue
+            entry = dict(rule, id=f"{len(merged) + 1}.0", text=text)
+            if "keywords" in entry:
+                entry["keywords"] = list(entry["keywords"] or [])
+            merged.append(entry)
+            seen[key] = entry
+    return {"rules": merged}
 
 # ---------------------------------------------------------
 # MODULE 2: THE CITATION ANCHOR ENGINE
 # (The "Safety Gate" Logic)
 # ---------------------------------------------------------
-def adjudicate_dispute(user_comment, normalized_rules):
+def adjudicate_dispute(user_comment, normalized_rules, top_k=None, rule_index=None):
     print(">> 2. Running Citation Anchoring...")
-    system_prompt = f"""You are the Open Adjudication Engine.
+    if top_k is None:
+        return _chat_json(adjudication_prompt(normalized_rules), user_comment)
+    
+    # Retrieval-narrowed prompt: only the top_k candidate rules are sent
+    index, full_prompt_chars = _rulebook_state(normalized_rules, rule_index)
+    sent_rules = retrieve_candidate_rules(user_comment, normalized_rules, top_k, index)
+    system_prompt = adjudication_prompt(sent_rules)
+    verdict = check_citation(_chat_json(system_prompt, user_comment), sent_rules)
+    verdict["retrieval"] = retrieval_report(normalized_rules, sent_rules, system_prompt, user_comment,
+                                            full_prompt_chars)
+    return verdict
+
+
+# Rough characters per token for prompt size estimates
+CHARS_PER_TOKEN = 4
+
+# Rulebooks whose RuleIndex and full-prompt size are kept for retrieval
+RULEBOOK_CACHE_SIZE = 8
+_rulebook_states = OrderedDict()
+_rulebook_states_lock = threading.Lock()
+
+
+def estimate_tokens(*texts):
+    """
+    Estimate the token count of prompt texts (about CHARS_PER_TOKEN
+    characters per token)
+    """
+    return _tokens_for_chars(sum(len(text or "") for text in texts))
+
+
+def _tokens_for_chars(chars):
+    return chars // CHARS_PER_TOKEN + 1
+
+
+def _rulebook_state(normalized_rules, rule_index=None):
+    """
+    RuleIndex and full adjudication prompt length for a rulebook
+    
+    Both are built once per rulebook and kept, keyed by rulebook fingerprint,
+    for the RULEBOOK_CACHE_SIZE most recently used rulebooks, so repeated
+    disputes against one rulebook neither refit the index nor rebuild the
+    full prompt. A rule_index passed in is used as is.
+    
+    Returns:
+        tuple: (citation_checker.RuleIndex, full prompt characters)
+    """
+    # citation_checker imports this module, so it is imported on use
+    from citation_checker import RuleIndex, rulebook_fingerprint
+    
+    if rule_index is not None:
+        fingerprint = rule_index.fingerprint
+    else:
+        fingerprint = rulebook_fingerprint({"rules": list(normalized_rules.get("rules") or [])})
+    with _rulebook_states_lock:
+        state = _rulebook_states.get(fingerprint)
+        if state is not None:
+            _rulebook_states.move_to_end(fingerprint)
+    if state is None:
+        index = rule_index if rule_index is not None else RuleIndex(normalized_rules)
+        state = (index, len(adjudication_prompt(normalized_rules)))
+        with _rulebook_states_lock:
+            _rulebook_states[fingerprint] = state
+            while len(_rulebook_states) > RULEBOOK_CACHE_SIZE:
+                _rulebook_states.popitem(last=False)
+    if rule_index is not None:
+        return rule_index, state[1]
+    return state
+
+
+def retrieve_candidate_rules(user_comment, normalized_rules, top_k, rule_index=None):
+    """
+    Pick the rules most relevant to a comment with the local rule scorer
+    
+    Rules are ranked by citation_checker's combined (exact keyword / TF-IDF)
+    score, ties in rulebook order, and the top_k are kept in rulebook order
+    with their IDs, so large rulebooks fit in a short adjudication prompt.
+    
+    Args:
+        user_comment (str): Comment being adjudicated
+        normalized_rules (dict): Full rules JSON
+        top_k (int): Number of rules to keep
+        rule_index (citation_checker.RuleIndex, optional): Prebuilt index of
+            normalized_rules; by default one is built once per rulebook
+            and cached
+        
+    Returns:
+        dict: {"rules": [...]} with at most top_k rules
+    """
+    # citation_checker imports this module, so it is imported on use
+    from citation_checker import _score_rules
+    
+    index = rule_index if rule_index is not None else _rulebook_state(normalized_rules)[0]
+    top_k = max(0, int(top_k))
+    if len(index.rules) <= top_k:
+        return {"rules": list(index.rules)}
+    
+    comment = (user_comment or "").strip()
+    scored = _score_rules(comment, index) if comment else []
+    ranked = sorted(scored, key=lambda item: (-item["combined_score"], item["rule_index"]))
+    # Every rule is scored, so an empty comment simply keeps the first rules
+    keep = sorted(item["rule_index"] for item in ranked[:top_k]) if ranked else range(top_k)
+    return {"rules": [index.rules[i] for i in keep]}
+
+
+def check_citation(verdict, sent_rules):
+    """
+    Enforce citation anchoring against the rules that were actually sent
+    
+    A "Violation" stands only if its citation_anchor names a sent rule and
+    quotes text found in that rule (whitespace and case aside). Otherwise the
+    verdict becomes "No Violation", flagged UNANCHORED_CITATION, with the
+    rejected anchor kept under "rejected_citation".
+    
+    Args:
+        verdict (dict): Verdict returned by the model
+        sent_rules (dict): Rules JSON embedded in the prompt
+        
+    Returns:
+        dict: The verdict, or its downgraded copy
+    """
+    if verdict.get("verdict") != "Violation":
+        return verdict
+    
+    anchor = verdict.get("citation_anchor") or {}
+    rule_id = str(anchor.get("rule_id", ""))
+    quote = " ".join(str(anchor.get("quoted_rule_text") or "").split()).lower()
+    for rule in sent_rules.get("rules", []):
+        if str(rule.get("id")) == rule_id:
+            rule_text = " ".join(str(rule.get("text", "")).split()).lower()
+            if quote and quote in rule_text:
+                return verdict
+            break
+    
+    return dict(
+        verdict,
+        verdict="No Violation",
+        citation_anchor=None,
+        rejected_citation=anchor,
+        reasoning="The cited rule text is not in the rules provided, so no violation can be anchored.",
+        flags=list(verdict.get("flags") or []) + ["UNANCHORED_CITATION"],
+    )
+
+
+def retrieval_report(normalized_rules, sent_rules, system_prompt, user_comment, full_prompt_chars=None):
+    """
+    Prompt size of a retrieval-narrowed request against the full-rulebook prompt
+    
+    The full prompt's length is taken from full_prompt_chars when given, and
+    otherwise from the per-rulebook cache, so it is measured once per rulebook.
+    
+    Returns:
+        dict: rules_sent, rules_total, prompt_tokens, full_prompt_tokens,
+            tokens_saved and savings (fraction of the full prompt)
+    """
+    if full_prompt_chars is None:
+        full_prompt_chars = _rulebook_state(normalized_rules)[1]
+    prompt_tokens = estimate_tokens(system_prompt, user_comment)
+    full_prompt_tokens = _tokens_for_chars(full_prompt_chars + len(user_comment or ""))
+    tokens_saved = max(0, full_prompt_tokens - prompt_tokens)
+    return {
+        "rules_sent": len(sent_rules.get("rules", [])),
+        "rules_total": len(normalized_rules.get("rules", [])),
+        "prompt_tokens": prompt_tokens,
+        "full_prompt_tokens": full_prompt_tokens,
+        "tokens_saved": tokens_saved,
+        "savings": round(tokens_saved / full_prompt_tokens, 4) if full_prompt_tokens else 0.0,
+    }
+
+
+def adjudication_prompt(normalized_rules):
+    """
+    System prompt for adjudicate_dispute (shared with the async adjudicator)
+    
+    Args:
+        normalized_rules (dict): Rules JSON the verdict must cite
+        
+    Returns:
+        str: System prompt embedding the rules
+    """
+    return f"""You are the Open Adjudication Engine.
 
 THE RULES:
 {json.dumps(normalized_rules)}
@@ -603,16 +1509,6 @@ Output JSON format:
     "confidence": 0.95
 }}"""
 
-    response = client.chat.completions.create(
-        model="gpt-4o",
-        messages=[
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_comment}
-        ],
-        response_format={"type": "json_object"}
-    )
-    return json.loads(response.choices[0].message.content)
-
 # ---------------------------------------------------------
 # DEMO EXECUTION
 # (This is what you record for the demo video)
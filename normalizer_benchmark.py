@@ -0,0 +1,377 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the rule normalizer.
+
+Times ``normalize_rules_to_json``, ``parse_rule_clauses``, ``categorize_rule``
+and ``extract_keywords`` on generated rulebooks of 10 to 100,000 rules in
+numbered, bulleted, paragraph and mixed layouts, on both the spaCy and the
+regex parsing paths. Each result records wall time, throughput and the peak
+traced allocation (tracemalloc, measured in a separate run so it does not
+inflate the timings). On the spaCy path, corpora longer than the pipeline's
+``max_length`` are fed in section-aligned chunks, as ``iter_normalized_rules``
+does. A case that fails is recorded under "skipped" and the run continues.
+Results are saved as JSON together with the commit and parser they were
+measured on, and two result files can be compared:
+
+    python normalizer_benchmark.py --output bench/after.json
+    python normalizer_benchmark.py --sizes 10 1000 --compare bench/before.json
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import normalizer
+
+
+FORMATS = ("numbered", "bulleted", "paragraph", "mixed")
+PATHS = ("regex", "spacy")
+FUNCTIONS = ("normalize_rules_to_json", "parse_rule_clauses", "categorize_rule", "extract_keywords")
+DEFAULT_SIZES = (10, 100, 1_000, 10_000, 100_000)
+
+# Bump when generated corpora or the result layout change, so results from
+# different suite versions are not compared by accident.
+BENCHMARK_VERSION = 2
+
+_TOPICS = (
+    "harassment", "spam", "hate speech", "personal information", "violent threats",
+    "explicit content", "misinformation", "off topic posts", "self-promotion", "rude behavior",
+)
+_PLACES = ("threads", "comments", "direct messages", "live chats", "profile pages")
+_TEMPLATES = (
+    "No {topic} is allowed in {place} under rule {n}.",
+    "Users must not post {topic} in {place} (rule {n}).",
+    "Do not share {topic} with other members in {place}, see rule {n}.",
+    "Members should report {topic} in {place} to the moderators per rule {n}.",
+    "Never encourage {topic} in {place} as stated in rule {n}.",
+)
+
+
+def _rule_sentences(num_rules: int, seed: int) -> List[str]:
+    rng = random.Random(seed)
+    return [
+        rng.choice(_TEMPLATES).format(topic=rng.choice(_TOPICS), place=rng.choice(_PLACES), n=n)
+        for n in range(1, num_rules + 1)
+    ]
+
+
+def generate_corpus(num_rules: int, fmt: str, seed: int = 0) -> str:
+    """
+    Synthetic rulebook with ``num_rules`` distinct rules.
+
+    Args:
+        num_rules: Number of rule sentences.
+        fmt: "numbered" ("1. ..."), "bulleted" ("- ..."), "paragraph"
+            (five sentences per paragraph) or "mixed" (headed sections
+            alternating between the three layouts).
+        seed: Seed for the rule wording; equal seeds give equal corpora.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown corpus format {fmt!r}; expected one of {FORMATS}")
+    sentences = _rule_sentences(num_rules, seed)
+    if fmt == "numbered":
+        return "\n".join(f"{n}. {sentence}" for n, sentence in enumerate(sentences, start=1))
+    if fmt == "bulleted":
+        return "\n".join(f"- {sentence}" for sentence in sentences)
+    if fmt == "paragraph":
+        return "\n\n".join(" ".join(sentences[i:i + 5]) for i in range(0, len(sentences), 5))
+
+    sections = []
+    for section, start in enumerate(range(0, len(sentences), 5), start=1):
+        block = sentences[start:start + 5]
+        layout = FORMATS[(section - 1) % 3]
+        if layout == "numbered":
+            body = "\n".join(f"{n}. {sentence}" for n, sentence in enumerate(block, start=start + 1))
+        elif layout == "bulleted":
+            body = "\n".join(f"* {sentence}" for sentence in block)
+        else:
+            body = " ".join(block)
+        sections.append(f"Section {section}\n{body}")
+    return "\n\n".join(sections)
+
+
+@contextlib.contextmanager
+def parsing_path(path: str) -> Iterator[bool]:
+    """
+    Run the normalizer on one parsing path.
+
+    Yields False when the spaCy path was requested but spaCy or its model is
+    not available. The regex path is forced by hiding the loaded pipeline for
+    the duration of the block.
+    """
+    if path not in PATHS:
+        raise ValueError(f"Unknown parsing path {path!r}; expected one of {PATHS}")
+    if path == "spacy":
+        yield normalizer.get_nlp() is not None
+        return
+    saved = normalizer.nlp, normalizer.SPACY_AVAILABLE
+    normalizer.nlp, normalizer.SPACY_AVAILABLE = None, False
+    try:
+        yield True
+    finally:
+        normalizer.nlp, normalizer.SPACY_AVAILABLE = saved
+
+
+def _chunk_chars(path: str, raw_text: str) -> Optional[int]:
+    """
+    Chunk size for feeding ``raw_text`` to the spaCy path, or None when one
+    nlp() call accepts the whole corpus.
+    """
+    pipeline = normalizer.get_nlp() if path == "spacy" else None
+    max_length = getattr(pipeline, "max_length", None)
+    if not max_length or len(raw_text) < max_length:
+        return None
+    return min(normalizer.STREAM_CHUNK_CHARS, max_length // 2)
+
+
+def _parse_clauses(raw_text: str, chunk_chars: Optional[int]) -> List[str]:
+    if chunk_chars is None:
+        return normalizer.parse_rule_clauses(raw_text)
+    chunks = normalizer._iter_text_chunks(raw_text.splitlines(keepends=True), chunk_chars)
+    return [clause for chunk in chunks for clause in normalizer.parse_rule_clauses(chunk)]
+
+
+def _workload(function: str, raw_text: str, num_rules: int, clauses: List[str],
+              chunk_chars: Optional[int] = None) -> Tuple[Callable[[], Any], int]:
+    """Callable running one benchmarked function, and the number of rules it handles."""
+    if function == "normalize_rules_to_json":
+        if chunk_chars is not None:
+            lines = raw_text.splitlines(keepends=True)
+            return (lambda: list(normalizer.iter_normalized_rules(lines, max_chunk_chars=chunk_chars))), num_rules
+        return (lambda: normalizer.normalize_rules_to_json(raw_text)), num_rules
+    if function == "parse_rule_clauses":
+        return (lambda: _parse_clauses(raw_text, chunk_chars)), num_rules
+    if function == "categorize_rule":
+        return (lambda: [normalizer.categorize_rule(clause) for clause in clauses]), len(clauses)
+    if function == "extract_keywords":
+        return (lambda: [normalizer.extract_keywords(clause) for clause in clauses]), len(clauses)
+    raise ValueError(f"Unknown function {function!r}; expected one of {FUNCTIONS}")
+
+
+def _measure(run: Callable[[], Any], repeat: int, memory: bool) -> Tuple[float, Optional[int]]:
+    best = float("inf")
+    for _ in range(max(1, repeat)):
+        started = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - started)
+    peak = None
+    if memory:
+        tracemalloc.start()
+        try:
+            run()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return best, peak
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        completed = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True, text=True, timeout=10,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    if completed.returncode != 0:
+        return None
+    return completed.stdout.strip() or None
+
+
+def run_benchmarks(
+    sizes: Sequence[int] = DEFAULT_SIZES,
+    formats: Sequence[str] = FORMATS,
+    paths: Sequence[str] = PATHS,
+    functions: Sequence[str] = FUNCTIONS,
+    *,
+    repeat: int = 1,
+    memory: bool = True,
+    seed: int = 0,
+    progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> Dict[str, Any]:
+    """
+    Benchmark every combination of size, corpus format, parsing path and function.
+
+    Returns ``{"metadata": {...}, "results": [...], "skipped": [...]}``. Each
+    result has the function, path, format, corpus ``rules`` and ``chars``, the
+    number of ``clauses`` the path parsed, ``seconds`` (best of ``repeat``),
+    ``rules_per_second`` (corpus rules for the whole-text functions, parsed
+    clauses for the per-rule ones), ``peak_memory_bytes`` (None without ``memory``)
+    and whether the corpus was parsed in ``chunked`` pieces. Paths that cannot
+    run here, and cases that raised, are listed in ``skipped`` with the reason.
+    ``progress`` is called with each result as it is produced.
+
+    Example:
+        >>> report = run_benchmarks(sizes=[10, 1000], paths=["regex"])
+        >>> save_results(report, "bench/regex.json")
+    """
+    results: List[Dict[str, Any]] = []
+    skipped: List[Dict[str, Any]] = []
+    parsers: Dict[str, str] = {}
+    for path in paths:
+        with parsing_path(path) as available:
+            if not available:
+                skipped.append({"path": path, "reason": f"spaCy model {normalizer.SPACY_MODEL} not available"})
+                continue
+            parsers[path] = normalizer.parser_signature()
+            for fmt in formats:
+                for size in sizes:
+                    case = {"path": path, "format": fmt, "rules": size}
+                    try:
+                        raw_text = generate_corpus(size, fmt, seed)
+                        chunk_chars = _chunk_chars(path, raw_text)
+                        clauses = _parse_clauses(raw_text, chunk_chars)
+                    except Exception as exc:
+                        skipped.append({**case, "reason": f"{type(exc).__name__}: {exc}"})
+                        continue
+                    for function in functions:
+                        run, count = _workload(function, raw_text, size, clauses, chunk_chars)
+                        try:
+                            seconds, peak = _measure(run, repeat, memory)
+                        except Exception as exc:
+                            skipped.append({**case, "function": function, "reason": f"{type(exc).__name__}: {exc}"})
+                            continue
+                        result = {
+                            "function": function,
+                            "path": path,
+                            "format": fmt,
+                            "rules": size,
+                            "chars": len(raw_text),
+                            "clauses": len(clauses),
+                            "seconds": round(seconds, 6),
+                            "rules_per_second": round(count / seconds, 1) if seconds > 0 else None,
+                            "peak_memory_bytes": peak,
+                            "chunked": chunk_chars is not None,
+                        }
+                        results.append(result)
+                        if progress is not None:
+                            progress(result)
+    metadata = {
+        "benchmark_version": BENCHMARK_VERSION,
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "parsers": parsers,
+        "repeat": repeat,
+        "seed": seed,
+    }
+    return {"metadata": metadata, "results": results, "skipped": skipped}
+
+
+def save_results(report: Dict[str, Any], path: str) -> None:
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as handle:
+        json.dump(report, handle, indent=2)
+        handle.write("\n")
+
+
+def load_results(path: str) -> Dict[str, Any]:
+    with open(path, "r", encoding="utf-8") as handle:
+        return json.load(handle)
+
+
+def compare_results(baseline: Dict[str, Any], current: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Pair results measured in both reports.
+
+    Returns one row per (function, path, format, rules) present in both, with
+    both timings, ``speedup`` (baseline seconds / current seconds, so above 1
+    is faster) and ``memory_ratio`` (current peak / baseline peak). Raises
+    ValueError when the reports come from different suite versions.
+    """
+    versions = {report.get("metadata", {}).get("benchmark_version") for report in (baseline, current)}
+    if len(versions) > 1:
+        raise ValueError(f"Cannot compare results from benchmark versions {sorted(map(str, versions))}")
+
+    def key(result):
+        return result["function"], result["path"], result["format"], result["rules"]
+
+    previous = {key(result): result for result in baseline.get("results", [])}
+    rows = []
+    for result in current.get("results", []):
+        before = previous.get(key(result))
+        if before is None:
+            continue
+        speedup = before["seconds"] / result["seconds"] if result["seconds"] else None
+        memory_ratio = None
+        if before.get("peak_memory_bytes") and result.get("peak_memory_bytes") is not None:
+            memory_ratio = result["peak_memory_bytes"] / before["peak_memory_bytes"]
+        rows.append({
+            "function": result["function"],
+            "path": result["path"],
+            "format": result["format"],
+            "rules": result["rules"],
+            "baseline_seconds": before["seconds"],
+            "seconds": result["seconds"],
+            "speedup": round(speedup, 3) if speedup is not None else None,
+            "memory_ratio": round(memory_ratio, 3) if memory_ratio is not None else None,
+        })
+    return rows
+
+
+def _format_result(result: Dict[str, Any]) -> str:
+    peak = result["peak_memory_bytes"]
+    memory = f"{peak / 1_048_576:9.2f} MiB" if peak is not None else "        n/a"
+    rate = result["rules_per_second"]
+    throughput = f"{rate:12,.0f} rules/s" if rate is not None else "         n/a"
+    return (
+        f"{result['function']:<24} {result['path']:<6} {result['format']:<9} {result['rules']:>7} "
+        f"{result['seconds']:10.4f}s {throughput} {memory}"
+    )
+
+
+def _parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the rule normalizer on synthetic rulebooks")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="Rules per corpus")
+    parser.add_argument("--formats", nargs="+", choices=FORMATS, default=list(FORMATS), help="Corpus layouts")
+    parser.add_argument("--paths", nargs="+", choices=PATHS, default=list(PATHS), help="Parsing paths")
+    parser.add_argument("--functions", nargs="+", choices=FUNCTIONS, default=list(FUNCTIONS),
+                        help="Normalizer functions to time")
+    parser.add_argument("--repeat", type=int, default=1, help="Timed runs per case; the best is kept")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc peak-memory run")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for corpus generation")
+    parser.add_argument("--output", help="Save results as JSON here")
+    parser.add_argument("--compare", help="Baseline results JSON to compare against")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = _parse_args(argv)
+    print(f"{'function':<24} {'path':<6} {'format':<9} {'rules':>7} {'time':>11} "
+          f"{'throughput':>20} {'peak memory':>13}", file=sys.stderr)
+    report = run_benchmarks(
+        args.sizes, args.formats, args.paths, args.functions,
+        repeat=args.repeat, memory=not args.no_memory, seed=args.seed,
+        progress=lambda result: print(_format_result(result), file=sys.stderr),
+    )
+    for entry in report["skipped"]:
+        case = " ".join(str(entry[key]) for key in ("function", "format", "rules") if key in entry)
+        print(f"Skipped {entry['path']} path{' ' + case if case else ''}: {entry['reason']}", file=sys.stderr)
+    if args.output:
+        save_results(report, args.output)
+        print(f"Saved {len(report['results'])} results to {args.output}", file=sys.stderr)
+    if args.compare:
+        baseline = load_results(args.compare)
+        print(f"\nCompared with {args.compare} (commit {baseline.get('metadata', {}).get('commit')}):",
+              file=sys.stderr)
+        for row in compare_results(baseline, report):
+            speedup = f"{row['speedup']:.2f}x" if row["speedup"] is not None else "n/a"
+            print(f"{row['function']:<24} {row['path']:<6} {row['format']:<9} {row['rules']:>7} "
+                  f"{row['baseline_seconds']:10.4f}s -> {row['seconds']:10.4f}s  {speedup}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
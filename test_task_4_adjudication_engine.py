@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Tests for the multi-process ShardedAdjudicator.
+
+Covers:
+- Parallel verdicts identical and in order vs. the single-process path
+- Bounded in-flight input consumption
+- Rules given as a dict instead of a rules JSON path
+"""
+
+import json
+import os
+import sys
+import tempfile
+
+from adjudication_engine import ShardedAdjudicator, adjudicate_parallel
+from citation_checker import adjudicate_comments
+from normalizer import normalize_rules_to_json
+
+
+def _reddit_rules() -> dict:
+    repo_root = os.path.dirname(__file__)
+    with open(os.path.join(repo_root, "examples", "reddit_rules.txt"), "r", encoding="utf-8") as handle:
+        return normalize_rules_to_json(handle.read())
+
+
+def _comments(count: int) -> list:
+    templates = [
+        "Check out my affiliate link {i}. This is spam.",
+        "You're such an idiot, number {i}.",
+        "I disagree with point {i} of your analysis.",
+        "",
+        "Here is the home address of user {i}.",
+    ]
+    return [templates[i % len(templates)].format(i=i) for i in range(count)]
+
+
+def test_parallel_matches_single() -> bool:
+    print("Test 4.19: Parallel verdicts match single-process verdicts")
+    rules_json = _reddit_rules()
+    comments = _comments(237)
+    expected = adjudicate_comments(comments, rules_json)
+    with tempfile.TemporaryDirectory() as workdir:
+        rules_path = os.path.join(workdir, "rules.json")
+        with open(rules_path, "w", encoding="utf-8") as handle:
+            json.dump(rules_json, handle)
+        actual = adjudicate_parallel(comments, rules_path, workers=2, chunk_size=16)
+    if actual != expected:
+        print("FAIL: Parallel verdicts differ from single-process verdicts")
+        return False
+    print(f"PASS: {len(actual)} verdicts match in order")
+    return True
+
+
+def test_bounded_in_flight() -> bool:
+    print("Test 4.20: In-flight input is bounded")
+    rules_json = _reddit_rules()
+    consumed = 0
+
+    def _source():
+        nonlocal consumed
+        for comment in _comments(400):
+            consumed += 1
+            yield comment
+
+    chunk_size, max_in_flight = 10, 3
+    max_ahead = 0
+    with ShardedAdjudicator(
+        rules_json, workers=2, chunk_size=chunk_size, max_in_flight=max_in_flight
+    ) as engine:
+        produced = 0
+        for _ in engine.adjudicate(_source()):
+            produced += 1
+            max_ahead = max(max_ahead, consumed - produced)
+    limit = (max_in_flight + 1) * chunk_size
+    if produced != 400 or max_ahead > limit:
+        print(f"FAIL: produced={produced}, consumed ahead {max_ahead} > {limit}")
+        return False
+    print(f"PASS: At most {max_ahead} comments in flight")
+    return True
+
+
+def main() -> int:
+    print("=" * 70)
+    print("Step 4 - Sharded Adjudication Engine Tests")
+    print("=" * 70)
+    tests = [test_parallel_matches_single(), test_bounded_in_flight()]
+    if all(tests):
+        print("\nALL TESTS PASSED")
+        return 0
+    print("\nTESTS FAILED")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
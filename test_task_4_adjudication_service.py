@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Tests for the asyncio HTTP adjudication service and its MicroBatcher.
+
+Covers:
+- Concurrent requests are scored together in micro-batches
+- Each HTTP response carries the same verdict as adjudicate_comment
+- Error responses for unknown routes, rule sets and malformed bodies
+- Stopping a batcher fails queued and batched requests instead of hanging them
+"""
+
+import asyncio
+import json
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from adjudication_service import ANALYZE_PATH, AdjudicationService, MicroBatcher, ServiceUnavailable
+from citation_checker import RuleIndex, adjudicate_comment
+from verdict_cache import VerdictCache
+
+
+RULES_JSON = {
+    "rules": [
+        {"id": "rule_001", "text": "No harassment or bullying.", "keywords": ["idiot", "loser"]},
+        {"id": "rule_002", "text": "No spam or promotional content.", "keywords": ["spam", "promo"]},
+    ]
+}
+
+COMMENTS = [
+    "You're such an idiot",
+    "Buy now, this is spam with a promo",
+    "Nice weather today",
+    "",
+] * 10
+
+
+async def _post(port: int, path: str, payload, raw: bytes = None, content_length: int = None):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    body = raw if raw is not None else json.dumps(payload).encode("utf-8")
+    length = len(body) if content_length is None else content_length
+    writer.write(
+        f"POST {path} HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {length}\r\nConnection: close\r\n\r\n".encode("latin-1") + body
+    )
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, body = response.partition(b"\r\n\r\n")
+    status = int(head.split(b" ", 2)[1])
+    return status, json.loads(body.decode("utf-8"))
+
+
+def test_micro_batching() -> bool:
+    print("Test 4.21: MicroBatcher groups concurrent requests")
+
+    async def _run():
+        batcher = MicroBatcher(RuleIndex(RULES_JSON), max_batch_size=8, max_wait_ms=50)
+        results = await asyncio.gather(*(batcher.submit(comment) for comment in COMMENTS))
+        await batcher.stop()
+        return batcher, results
+
+    batcher, results = asyncio.run(_run())
+    expected = [adjudicate_comment(comment, RULES_JSON) for comment in COMMENTS]
+    if results != expected:
+        print("FAIL: Batched verdicts differ from adjudicate_comment")
+        return False
+    if batcher.largest_batch != 8 or batcher.batches != 5:
+        print(f"FAIL: Expected 5 full batches, got {batcher.batches} (largest {batcher.largest_batch})")
+        return False
+    print("PASS: Concurrent requests micro-batched")
+    return True
+
+
+def test_http_analyze() -> bool:
+    print("Test 4.22: HTTP analyze endpoint")
+
+    async def _run():
+        service = AdjudicationService({"reddit": RULES_JSON}, max_batch_size=16, max_wait_ms=20)
+        await service.start(port=0)
+        try:
+            requests = [
+                _post(service.port, ANALYZE_PATH, {
+                    "dispute_id": f"d-{i}",
+                    "rule_set_id": "reddit",
+                    "content": {"type": "text", "data": comment},
+                })
+                for i, comment in enumerate(COMMENTS[:12])
+            ]
+            return await asyncio.gather(*requests), service.health()
+        finally:
+            await service.close()
+
+    responses, health = asyncio.run(_run())
+    for i, (status, body) in enumerate(responses):
+        if status != 200 or body.get("dispute_id") != f"d-{i}":
+            print(f"FAIL: Unexpected response {status} {body}")
+            return False
+        if body["verdict"] != adjudicate_comment(COMMENTS[i], RULES_JSON):
+            print(f"FAIL: Verdict mismatch for {COMMENTS[i]!r}")
+            return False
+    if health["rule_sets"]["reddit"]["largest_batch"] < 2:
+        print("FAIL: Concurrent HTTP requests were not batched")
+        return False
+    print("PASS: HTTP verdicts match and were batched")
+    return True
+
+
+def test_http_errors() -> bool:
+    print("Test 4.23: HTTP error handling")
+
+    async def _run():
+        service = AdjudicationService({"reddit": RULES_JSON})
+        await service.start(port=0)
+        try:
+            return [
+                await _post(service.port, "/nope", {}),
+                await _post(service.port, ANALYZE_PATH, {"rule_set_id": "missing", "content": {"data": "x"}}),
+                await _post(service.port, ANALYZE_PATH, None, raw=b"{not json"),
+                await _post(service.port, ANALYZE_PATH, {"content": {"type": "image", "data": "..."}}),
+                await _post(service.port, ANALYZE_PATH, None, raw=b"{}", content_length=-5),
+            ]
+        finally:
+            await service.close()
+
+    statuses = [status for status, _ in asyncio.run(_run())]
+    if statuses != [404, 404, 400, 400, 400]:
+        print(f"FAIL: Unexpected statuses {statuses}")
+        return False
+    print("PASS: Errors reported with proper status codes")
+    return True
+
+
+def test_http_verdict_cache() -> bool:
+    print("Test 4.28: Repeated requests served from the verdict cache")
+
+    async def _run():
+        cache = VerdictCache(max_entries=100)
+        service = AdjudicationService({"reddit": RULES_JSON}, verdict_cache=cache)
+        await service.start(port=0)
+        try:
+            payload = {"content": {"type": "text", "data": "Buy now, this is spam with a promo"}}
+            responses = [await _post(service.port, ANALYZE_PATH, payload) for _ in range(5)]
+            return responses, service.health()
+        finally:
+            await service.close()
+
+    responses, health = asyncio.run(_run())
+    verdicts = [body["verdict"] for _, body in responses]
+    if any(verdict != verdicts[0] for verdict in verdicts):
+        print("FAIL: Cached responses differ")
+        return False
+    if health["verdict_cache"]["hits"] != 4 or health["rule_sets"]["reddit"]["comments"] != 1:
+        print(f"FAIL: Unexpected cache usage {health}")
+        return False
+    print("PASS: Repeated requests skipped scoring")
+    return True
+
+
+def test_stop_fails_pending() -> bool:
+    print("Test 4.93: Stopping fails queued and batched requests")
+    release = threading.Event()
+
+    async def _run():
+        executor = ThreadPoolExecutor(max_workers=1)
+        executor.submit(release.wait)  # the batch below waits for the only worker thread
+        batcher = MicroBatcher(RuleIndex(RULES_JSON), max_batch_size=2, max_wait_ms=10_000, executor=executor)
+        running = [asyncio.ensure_future(batcher.submit(comment)) for comment in COMMENTS[:3]]
+        await asyncio.sleep(0.05)  # two comments in the executor batch, one left in the queue
+        collecting = MicroBatcher(RuleIndex(RULES_JSON), max_batch_size=8, max_wait_ms=10_000)
+        waiting = [asyncio.ensure_future(collecting.submit(comment)) for comment in COMMENTS[:3]]
+        await asyncio.sleep(0.05)  # all three held in a batch that is still collecting
+        await asyncio.wait_for(asyncio.gather(batcher.stop(), collecting.stop()), 2)
+        outcomes = await asyncio.wait_for(asyncio.gather(*running, *waiting, return_exceptions=True), 2)
+        release.set()
+        executor.shutdown(wait=True)
+
+        service = AdjudicationService({"reddit": RULES_JSON})
+        await service.start(port=0)
+        await service.batchers["reddit"].stop()
+        try:
+            status, body = await service._dispatch(
+                "POST", ANALYZE_PATH, json.dumps({"content": {"type": "text", "data": "spam"}}).encode("utf-8")
+            )
+        finally:
+            await service.close()
+        return outcomes, status
+
+    try:
+        outcomes, status = asyncio.run(_run())
+    except asyncio.TimeoutError:
+        release.set()
+        print("FAIL: Pending requests hung on stop")
+        return False
+    if not all(isinstance(outcome, ServiceUnavailable) for outcome in outcomes):
+        print(f"FAIL: Unexpected outcomes {outcomes}")
+        return False
+    if status != 503:
+        print(f"FAIL: Stopped rule set answered {status}")
+        return False
+    print("PASS: Six pending requests failed with ServiceUnavailable, HTTP 503")
+    return True
+
+
+def main() -> int:
+    print("=" * 70)
+    print("Step 4 - Adjudication Service Tests")
+    print("=" * 70)
+    tests = [
+        test_micro_batching(),
+        test_http_analyze(),
+        test_http_errors(),
+        test_http_verdict_cache(),
+        test_stop_fails_pending(),
+    ]
+    if all(tests):
+        print("\nALL TESTS PASSED")
+        return 0
+    print("\nTESTS FAILED")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Tests for the batched adjudication API (adjudicate_comments).
+
+Covers:
+- Verdict parity with per-comment adjudicate_comment
+- Input order preserved across batch boundaries
+- Empty comments and empty rulebooks inside a batch
+"""
+
+import os
+import sys
+
+from citation_checker import RuleIndex, adjudicate_comment, adjudicate_comments
+from normalizer import normalize_rules_to_json
+
+
+def _load_reddit_rules() -> dict:
+    repo_root = os.path.dirname(__file__)
+    with open(os.path.join(repo_root, "examples", "reddit_rules.txt"), "r", encoding="utf-8") as handle:
+        return normalize_rules_to_json(handle.read())
+
+
+def _load_sample_comments() -> list:
+    repo_root = os.path.dirname(__file__)
+    with open(os.path.join(repo_root, "examples", "sample_comments.txt"), "r", encoding="utf-8") as handle:
+        return [line.strip() for line in handle if line.strip()]
+
+
+def test_batch_matches_single() -> bool:
+    print("Test 4.5: Batched verdicts match per-comment verdicts")
+    rules_json = _load_reddit_rules()
+    index = RuleIndex(rules_json)
+    comments = _load_sample_comments() + [
+        "Check out my affiliate link. This is spam.",
+        "You're such an idiot.",
+        "   ",
+        "I disagree with your technical analysis.",
+    ]
+    expected = [adjudicate_comment(comment, index) for comment in comments]
+    for batch_size in (1, 3, 1024):
+        actual = adjudicate_comments(comments, index, batch_size=batch_size)
+        if actual != expected:
+            print(f"FAIL: Batched verdicts differ (batch_size={batch_size})")
+            return False
+    print(f"PASS: {len(comments)} batched verdicts match")
+    return True
+
+
+def test_batch_thresholds() -> bool:
+    print("Test 4.6: Thresholds applied per comment")
+    rules_json = _load_reddit_rules()
+    comments = ["This is spam.", "Check out my affiliate link. This is spam."]
+    for exact_threshold, semantic_threshold in ((0.2, 0.1), (0.9, 0.9)):
+        expected = [
+            adjudicate_comment(
+                comment,
+                rules_json,
+                exact_threshold=exact_threshold,
+                semantic_threshold=semantic_threshold,
+            )
+            for comment in comments
+        ]
+        actual = adjudicate_comments(
+            comments,
+            rules_json,
+            exact_threshold=exact_threshold,
+            semantic_threshold=semantic_threshold,
+        )
+        if actual != expected:
+            print(f"FAIL: Threshold mismatch at {exact_threshold}/{semantic_threshold}")
+            return False
+    print("PASS: Thresholds applied per comment")
+    return True
+
+
+def test_batch_edge_cases() -> bool:
+    print("Test 4.7: Empty inputs in batch mode")
+    if adjudicate_comments([], {"rules": []}) != []:
+        print("FAIL: Empty batch should return empty list")
+        return False
+    results = adjudicate_comments(["", "Hello"], {"rules": []})
+    flags = [result.get("flags") for result in results]
+    if flags != [["EMPTY_COMMENT"], ["NO_RULES"]]:
+        print(f"FAIL: Unexpected flags {flags}")
+        return False
+    print("PASS: Edge cases handled in batch mode")
+    return True
+
+
+def main() -> int:
+    print("=" * 70)
+    print("Step 4 - Batch Adjudication Tests")
+    print("=" * 70)
+    tests = [
+        test_batch_matches_single(),
+        test_batch_thresholds(),
+        test_batch_edge_cases(),
+    ]
+    if all(tests):
+        print("\nALL TESTS PASSED")
+        return 0
+    print("\nTESTS FAILED")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
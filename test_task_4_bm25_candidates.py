@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Tests for the BM25 inverted-index candidate stage (RuleIndex.top_candidates).
+
+Covers:
+- WAND top-k agrees with exhaustive BM25 scoring
+- Rules sharing no term with the comment are never returned
+- adjudicate_comment(top_k=...) keeps keyword hits and full-scan verdicts
+"""
+
+import math
+import random
+import sys
+from collections import Counter
+
+from citation_checker import RuleIndex, _tokenize, adjudicate_comment
+
+
+VOCABULARY = [
+    "spam", "harassment", "bullying", "links", "promotion", "doxxing", "address",
+    "threats", "violence", "nsfw", "content", "posts", "topic", "respect", "users",
+]
+
+
+def _synthetic_rules(count: int, seed: int = 7) -> dict:
+    rng = random.Random(seed)
+    rules = []
+    for i in range(count):
+        words = rng.sample(VOCABULARY, rng.randint(1, 5))
+        rules.append({
+            "id": f"rule_{i:04d}",
+            "text": f"No {' '.join(words)} clause{i}.",
+            "keywords": [],
+        })
+    return {"rules": rules}
+
+
+def _brute_force_bm25(rules_json: dict, comment: str, k1: float = 1.2, b: float = 0.75) -> list:
+    docs = [Counter(_tokenize(rule["text"])) for rule in rules_json["rules"]]
+    lengths = [sum(doc.values()) for doc in docs]
+    average = sum(lengths) / len(lengths)
+    scores = []
+    for rule_idx, doc in enumerate(docs):
+        score = 0.0
+        for term in set(_tokenize(comment)):
+            if term not in doc:
+                continue
+            df = sum(1 for other in docs if term in other)
+            idf = math.log(1 + (len(docs) - df + 0.5) / (df + 0.5))
+            count = doc[term]
+            norm = k1 * (1 - b + b * lengths[rule_idx] / average)
+            score += idf * count * (k1 + 1) / (count + norm)
+        if score > 0:
+            scores.append((rule_idx, score))
+    scores.sort(key=lambda item: (-item[1], item[0]))
+    return scores
+
+
+def test_wand_matches_exhaustive() -> bool:
+    print("Test 4.10: WAND top-k matches exhaustive BM25")
+    rules_json = _synthetic_rules(400)
+    index = RuleIndex(rules_json)
+    comments = [
+        "spam links and promotion everywhere",
+        "threats of violence against users",
+        "nsfw content",
+        "respect the topic",
+        "completely unrelated words",
+    ]
+    for comment in comments:
+        expected = _brute_force_bm25(rules_json, comment)
+        for k in (1, 5, 25):
+            actual = index.top_candidates(comment, k)
+            if [rule_idx for rule_idx, _ in actual] != [rule_idx for rule_idx, _ in expected[:k]]:
+                print(f"FAIL: Top-{k} mismatch for {comment!r}")
+                return False
+            for (_, got), (_, want) in zip(actual, expected[:k]):
+                if abs(got - want) > 1e-9:
+                    print(f"FAIL: Score mismatch for {comment!r}")
+                    return False
+    print("PASS: WAND top-k matches exhaustive scoring")
+    return True
+
+
+def test_candidates_share_terms() -> bool:
+    print("Test 4.11: Candidates share a term with the comment")
+    index = RuleIndex(_synthetic_rules(200))
+    comment_terms = set(_tokenize("doxxing address"))
+    for rule_idx, _ in index.top_candidates("doxxing address", 50):
+        if not comment_terms & index.rule_token_sets[rule_idx]:
+            print(f"FAIL: Rule {rule_idx} shares no term with the comment")
+            return False
+    if index.top_candidates("zzz qqq", 10):
+        print("FAIL: Unknown terms should yield no candidates")
+        return False
+    print("PASS: Only term-sharing rules returned")
+    return True
+
+
+def test_top_k_adjudication() -> bool:
+    print("Test 4.12: adjudicate_comment with top_k")
+    rules_json = _synthetic_rules(300)
+    rules_json["rules"].append({
+        "id": "rule_promo",
+        "text": "Commercial solicitation is not allowed.",
+        "keywords": ["promo code"],
+    })
+    index = RuleIndex(rules_json)
+    comment = "use my promo code"
+    result = adjudicate_comment(comment, index, top_k=3)
+    if (result.get("citation_anchor") or {}).get("rule_id") != "rule_promo":
+        print("FAIL: Keyword hit pruned from the short list")
+        return False
+    for comment in ("spam links and promotion", "threats of violence", "hello there"):
+        full = adjudicate_comment(comment, index)
+        narrowed = adjudicate_comment(comment, index, top_k=len(rules_json["rules"]))
+        if full != narrowed:
+            print(f"FAIL: top_k covering all rules changed the verdict for {comment!r}")
+            return False
+    print("PASS: top_k adjudication consistent")
+    return True
+
+
+def main() -> int:
+    print("=" * 70)
+    print("Step 4 - BM25 Candidate Tests")
+    print("=" * 70)
+    tests = [
+        test_wand_matches_exhaustive(),
+        test_candidates_share_terms(),
+        test_top_k_adjudication(),
+    ]
+    if all(tests):
+        print("\nALL TESTS PASSED")
+        return 0
+    print("\nTESTS FAILED")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
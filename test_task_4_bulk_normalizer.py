@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Tests for parallel bulk normalization.
+
+Covers:
+- Every input produces normalized JSON identical to normalize_rules_to_json
+- Unreadable and missing files are reported without aborting the run
+- Directory and manifest discovery
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+from bulk_normalizer import discover_inputs, main, normalize_bulk
+from normalizer import normalize_rules_to_json
+
+
+EXAMPLES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "examples")
+
+
+def _rule_files() -> list:
+    return sorted(
+        os.path.join(EXAMPLES_DIR, name)
+        for name in os.listdir(EXAMPLES_DIR)
+        if name.endswith("_rules.txt")
+    )
+
+
+def test_bulk_outputs_match() -> bool:
+    print("Test 4.53: Bulk outputs match normalize_rules_to_json")
+    inputs = _rule_files() * 3
+    with tempfile.TemporaryDirectory() as output_dir:
+        reports = normalize_bulk(inputs, output_dir, workers=2)
+        for path, report in zip(inputs, reports):
+            if report["status"] != "ok" or report["input"] != path:
+                print(f"FAIL: Unexpected report {report}")
+                return False
+            with open(path, "r", encoding="utf-8") as handle:
+                expected = normalize_rules_to_json(handle.read())
+            with open(report["output"], "r", encoding="utf-8") as handle:
+                if json.load(handle) != expected:
+                    print(f"FAIL: Output differs for {path}")
+                    return False
+        if len({report["output"] for report in reports}) != len(inputs):
+            print("FAIL: Repeated input names overwrote each other")
+            return False
+    print(f"PASS: {len(inputs)} rulebooks normalized in parallel")
+    return True
+
+
+def test_failures_isolated() -> bool:
+    print("Test 4.54: Bad files are reported without aborting")
+    with tempfile.TemporaryDirectory() as workdir:
+        bad_path = os.path.join(workdir, "bad_rules.txt")
+        with open(bad_path, "wb") as handle:
+            handle.write(b"1. No spam\n\xff\xfe\xfa broken bytes\n")
+        inputs = [_rule_files()[0], bad_path, os.path.join(workdir, "missing.txt"), _rule_files()[1]]
+        reports = normalize_bulk(inputs, os.path.join(workdir, "out"), workers=2)
+    statuses = [report["status"] for report in reports]
+    if statuses != ["ok", "error", "error", "ok"]:
+        print(f"FAIL: Unexpected statuses {statuses}")
+        return False
+    if "UnicodeDecodeError" not in reports[1]["error"] or "FileNotFoundError" not in reports[2]["error"]:
+        print(f"FAIL: Errors not reported: {reports[1:3]}")
+        return False
+    if any("seconds" not in report for report in reports):
+        print("FAIL: Missing timings")
+        return False
+    print("PASS: Failures isolated and reported")
+    return True
+
+
+def test_manifest_and_cli() -> bool:
+    print("Test 4.55: Manifest discovery and CLI report")
+    with tempfile.TemporaryDirectory() as workdir:
+        for path in _rule_files():
+            shutil.copy(path, workdir)
+        manifest = os.path.join(workdir, "manifest.txt")
+        with open(manifest, "w", encoding="utf-8") as handle:
+            handle.write("# onboarding batch\nreddit_rules.txt\n\ndiscord_rules.txt\n")
+        if [os.path.basename(path) for path in discover_inputs(manifest)] != ["reddit_rules.txt", "discord_rules.txt"]:
+            print("FAIL: Manifest not parsed")
+            return False
+        if len(discover_inputs(workdir, "_rules.txt")) != len(_rule_files()):
+            print("FAIL: Directory discovery missed files")
+            return False
+        report_path = os.path.join(workdir, "report.json")
+        status = main([manifest, "--output-dir", os.path.join(workdir, "out"), "--workers", "2",
+                       "--report", report_path])
+        with open(report_path, "r", encoding="utf-8") as handle:
+            report = json.load(handle)
+    if status != 0 or len(report["files"]) != 2:
+        print(f"FAIL: CLI status {status}, report {report}")
+        return False
+    print("PASS: Manifest processed via CLI")
+    return True
+
+
+def main_tests() -> int:
+    print("=" * 70)
+    print("Step 4 - Bulk Normalizer Tests")
+    print("=" * 70)
+    tests = [test_bulk_outputs_match(), test_failures_isolated(), test_manifest_and_cli()]
+    if all(tests):
+        print("\nALL TESTS PASSED")
+        return 0
+    print("\nTESTS FAILED")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main_tests())
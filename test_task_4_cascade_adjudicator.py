@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Tests for the local-first CascadeAdjudicator.
+
+Covers:
+- Only comments scoring inside the uncertainty band reach the LLM
+- Batched and single adjudication agree, with tiers and escalation rate recorded
+- LLM failures fall back to the local verdict
+- Batches escalate through an async adjudicator when one is given
+- A real AsyncDisputeAdjudicator keeps working across repeated batches
+"""
+
+import asyncio
+import sys
+
+from openai import AsyncOpenAI
+
+from cascade_adjudicator import CascadeAdjudicator
+from citation_checker import adjudicate_comment
+from llm_adjudication import AsyncDisputeAdjudicator
+from test_task_4_llm_adjudication import BackgroundStub
+
+
+RULES_JSON = {
+    "rules": [
+        {"id": "rule_001", "text": "No harassment or bullying of other members.", "keywords": ["idiot", "loser"]},
+        {"id": "rule_002", "text": "No spam or promotional content.", "keywords": ["spam", "promo"]},
+        {"id": "rule_003", "text": "Do not share personal information such as home addresses.",
+         "keywords": ["address"]},
+    ]
+}
+
+COMMENTS = [
+    "you idiot",
+    "spam promo",
+    "nice weather",
+    "bullying members",
+    "stop harassment please",
+    "share information",
+    "I love bullying other members here",
+    "home addresses",
+    "content",
+    "",
+]
+
+BAND = (0.2, 0.45)
+
+
+class FakeLLM:
+    def __init__(self, fail: bool = False):
+        self.calls = []
+        self.fail = fail
+
+    def __call__(self, comment, rules_json):
+        self.calls.append(comment)
+        if self.fail:
+            raise TimeoutError("LLM timed out")
+        return {
+            "verdict": "Violation",
+            "citation_anchor": {"rule_id": rules_json["rules"][0]["id"],
+                                "quoted_rule_text": rules_json["rules"][0]["text"]},
+            "reasoning": f"llm:{comment}",
+            "confidence": 0.8,
+        }
+
+
+class FakeAsyncLLM:
+    """Stands in for AsyncDisputeAdjudicator.adjudicate_many."""
+
+    def __init__(self):
+        self.batches = []
+
+    async def adjudicate_many(self, disputes, return_exceptions=False):
+        disputes = list(disputes)
+        self.batches.append([comment for comment, _ in disputes])
+        await asyncio.sleep(0)
+        return [{"verdict": "No Violation", "reasoning": f"async:{comment}"} for comment, _ in disputes]
+
+
+def _expected_uncertain():
+    uncertain = []
+    for comment in COMMENTS:
+        verdict = adjudicate_comment(comment, RULES_JSON)
+        if comment and BAND[0] <= verdict["confidence"] < BAND[1]:
+            uncertain.append(comment)
+    return uncertain
+
+
+def test_band_escalation() -> bool:
+    print("Test 4.75: Only uncertain comments escalate")
+    llm = FakeLLM()
+    cascade = CascadeAdjudicator(RULES_JSON, uncertainty_band=BAND, llm=llm)
+    verdicts = [cascade.adjudicate(comment) for comment in COMMENTS]
+    uncertain = _expected_uncertain()
+    if not uncertain or len(uncertain) == len(COMMENTS) or llm.calls != uncertain:
+        print(f"FAIL: Escalated {llm.calls}, expected {uncertain}")
+        return False
+    for comment, verdict in zip(COMMENTS, verdicts):
+        if comment in uncertain:
+            if verdict["tier"] != "llm" or verdict["reasoning"] != f"llm:{comment}" or "local_score" not in verdict:
+                print(f"FAIL: {comment!r} not decided by the LLM: {verdict}")
+                return False
+        elif verdict != dict(adjudicate_comment(comment, RULES_JSON), tier="local"):
+            print(f"FAIL: {comment!r} local verdict changed: {verdict}")
+            return False
+    stats = cascade.stats()
+    expected_rate = round(len(uncertain) / len(COMMENTS), 4)
+    if (stats["decided_llm"], stats["escalated"], stats["escalation_rate"]) != (
+        len(uncertain), len(uncertain), expected_rate
+    ):
+        print(f"FAIL: Unexpected stats {stats}")
+        return False
+    print(f"PASS: {len(uncertain)}/{len(COMMENTS)} escalated")
+    return True
+
+
+def test_batch_matches_single() -> bool:
+    print("Test 4.76: Batched cascade matches single adjudication")
+    single = CascadeAdjudicator(RULES_JSON, uncertainty_band=BAND, llm=FakeLLM())
+    batched_llm = FakeLLM()
+    batched = CascadeAdjudicator(RULES_JSON, uncertainty_band=BAND, llm=batched_llm)
+    expected = [single.adjudicate(comment) for comment in COMMENTS]
+    actual = batched.adjudicate_many(COMMENTS)
+    if [v["tier"] for v in actual] != [v["tier"] for v in expected]:
+        print("FAIL: Tiers differ between batched and single adjudication")
+        return False
+    if [v["verdict"] for v in actual] != [v["verdict"] for v in expected]:
+        print("FAIL: Verdicts differ between batched and single adjudication")
+        return False
+    if batched.stats()["escalated"] != single.stats()["escalated"]:
+        print("FAIL: Escalation counts differ")
+        return False
+    everything = CascadeAdjudicator(RULES_JSON, uncertainty_band=(0.0, 2.0), llm=FakeLLM())
+    if everything.adjudicate("")["tier"] != "local":
+        print("FAIL: Empty comments must never escalate")
+        return False
+    print("PASS: Same tiers and verdicts")
+    return True
+
+
+def test_llm_failure_fallback() -> bool:
+    print("Test 4.77: LLM failures keep the local verdict")
+    cascade = CascadeAdjudicator(RULES_JSON, uncertainty_band=BAND, llm=FakeLLM(fail=True))
+    verdicts = cascade.adjudicate_many(COMMENTS)
+    uncertain = set(_expected_uncertain())
+    for comment, verdict in zip(COMMENTS, verdicts):
+        local = adjudicate_comment(comment, RULES_JSON)
+        if verdict["tier"] != "local" or verdict["verdict"] != local["verdict"]:
+            print(f"FAIL: {comment!r} did not fall back: {verdict}")
+            return False
+        if ("LLM_UNAVAILABLE" in verdict["flags"]) != (comment in uncertain):
+            print(f"FAIL: {comment!r} flagged incorrectly: {verdict['flags']}")
+            return False
+    stats = cascade.stats()
+    if stats["llm_errors"] != len(uncertain) or stats["decided_local"] != len(COMMENTS):
+        print(f"FAIL: Unexpected stats {stats}")
+        return False
+    never = CascadeAdjudicator(RULES_JSON, uncertainty_band=(0.0, 0.0), llm=FakeLLM(fail=True))
+    if never.adjudicate_many(COMMENTS) != [dict(v, tier="local") for v in
+                                         (adjudicate_comment(c, RULES_JSON) for c in COMMENTS)]:
+        print("FAIL: An empty band must reproduce the local scorer")
+        return False
+    try:
+        CascadeAdjudicator(RULES_JSON, uncertainty_band=(0.5, 0.2))
+    except ValueError:
+        pass
+    else:
+        print("FAIL: Inverted band accepted")
+        return False
+    print("PASS: Local verdicts stand when the LLM fails")
+    return True
+
+
+def test_async_escalation() -> bool:
+    print("Test 4.78: Batch escalations sent through the async adjudicator")
+    async_llm = FakeAsyncLLM()
+    cascade = CascadeAdjudicator(RULES_JSON, uncertainty_band=BAND, async_llm=async_llm)
+    verdicts = cascade.adjudicate_many(COMMENTS)
+    uncertain = _expected_uncertain()
+    if async_llm.batches != [uncertain]:
+        print(f"FAIL: Expected one concurrent batch, got {async_llm.batches}")
+        return False
+    escalated = [v["reasoning"] for v in verdicts if v["tier"] == "llm"]
+    if escalated != [f"async:{comment}" for comment in uncertain]:
+        print(f"FAIL: Escalated verdicts out of order: {escalated}")
+        return False
+    print("PASS: Escalations batched and kept in order")
+    return True
+
+
+def test_repeated_batches_real_adjudicator() -> bool:
+    print("Test 4.87: Repeated batches through a real AsyncDisputeAdjudicator")
+    uncertain = _expected_uncertain()
+    with BackgroundStub() as stub:
+        client = AsyncOpenAI(api_key="test", base_url=stub.base_url, max_retries=0)
+        async_llm = AsyncDisputeAdjudicator(client, max_concurrency=4, max_retries=0)
+        with CascadeAdjudicator(RULES_JSON, uncertainty_band=BAND, async_llm=async_llm) as cascade:
+            for round_number in range(1, 4):
+                verdicts = cascade.adjudicate_many(COMMENTS)
+                escalated = [v.get("reasoning") for v in verdicts if v["tier"] == "llm"]
+                if escalated != uncertain:
+                    print(f"FAIL: Round {round_number} escalations not decided by the LLM: {escalated}")
+                    return False
+            single = cascade.adjudicate(uncertain[0])
+            stats = cascade.stats()
+    if single["tier"] != "llm" or stats["llm_errors"] != 0:
+        print(f"FAIL: Escalations failed after the first batch: {stats}")
+        return False
+    if stats["decided_llm"] != 3 * len(uncertain) + 1 or stub.server.requests != stats["decided_llm"]:
+        print(f"FAIL: Unexpected stats {stats}, {stub.server.requests} server requests")
+        return False
+    print(f"PASS: {stats['decided_llm']} escalations over 4 calls, no LLM errors")
+    return True
+
+
+def main() -> int:
+    print("=" * 70)
+    print("Step 4 - Cascade Adjudicator Tests")
+    print("=" * 70)
+    tests = [
+        test_band_escalation(),
+        test_batch_matches_single(),
+        test_llm_failure_fallback(),
+        test_async_escalation(),
+        test_repeated_batches_real_adjudicator(),
+    ]
+    if all(tests):
+        print("\nALL TESTS PASSED")
+        return 0
+    print("\nTESTS FAILED")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Tests for chunked map-reduce LLM normalization.
+
+Covers:
+- Long documents are split on section boundaries and normalized concurrently
+- Merged rules keep document order with globally unique IDs
+- Rules repeated across chunks are removed
+- Short documents need one request; a failing chunk fails the call
+"""
+
+import json
+import sys
+import threading
+import time
+from types import SimpleNamespace
+
+import normalizer
+
+
+class FakeClient:
+    """
+    Stands in for openai.OpenAI: every non-heading line of the user message
+    becomes one rule, numbered from "1.0" in each request.
+    """
+
+    def __init__(self, latency: float = 0.02, fail_on: str = None):
+        self.requests = []
+        self.latency = latency
+        self.fail_on = fail_on
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, model, messages, response_format):
+        chunk = messages[1]["content"]
+        with self._lock:
+            self.requests.append(chunk)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(self.latency)
+            if self.fail_on and self.fail_on in chunk:
+                raise RuntimeError("model unavailable")
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+        lines = [line.strip("- ").strip() for line in chunk.splitlines()]
+        rules = [
+            {"id": f"{n}.0", "text": line, "category": "conduct", "keywords": [line.split()[-1].strip(".").lower()]}
+            for n, line in enumerate((line for line in lines if line and not line.startswith("#")), start=1)
+        ]
+        content = json.dumps({"rules": rules})
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+def _document(sections: int = 12, rules_per_section: int = 8) -> str:
+    parts = []
+    for section in range(1, sections + 1):
+        lines = [f"## Section {section}"]
+        lines += [f"- Members must follow guideline {section}.{rule} in every thread."
+                  for rule in range(1, rules_per_section + 1)]
+        parts.append("\n".join(lines))
+    return "\n\n".join(parts) + "\n"
+
+
+def _with_client(client, run):
+    saved = normalizer.client, normalizer.response_cache
+    normalizer.client = client
+    normalizer.set_response_cache(None)
+    try:
+        return run()
+    finally:
+        normalizer.client, normalizer.response_cache = saved
+
+
+def test_section_chunks_merged() -> bool:
+    print("Test 4.83: Sections normalized concurrently and merged in order")
+    document = _document()
+    client = FakeClient()
+    progress = []
+    result = _with_client(client, lambda: normalizer.normalize_rules_chunked(
+        document, max_chunk_chars=1200, max_workers=4, progress=lambda *args: progress.append(args)
+    ))
+    if len(client.requests) < 3:
+        print(f"FAIL: Expected several chunks, got {len(client.requests)}")
+        return False
+    for chunk in client.requests:
+        if len(chunk) > 1200 or not chunk.lstrip().startswith("## Section"):
+            print(f"FAIL: Chunk not section-aligned: {chunk[:40]!r}")
+            return False
+    if "".join(sorted(client.requests, key=document.index)) != document:
+        print("FAIL: Chunks do not cover the document")
+        return False
+    rules = result["rules"]
+    expected = [f"Members must follow guideline {s}.{r} in every thread." for s in range(1, 13) for r in range(1, 9)]
+    if [rule["text"] for rule in rules] != expected:
+        print("FAIL: Merged rules out of order or incomplete")
+        return False
+    if [rule["id"] for rule in rules] != [f"{n}.0" for n in range(1, len(expected) + 1)]:
+        print("FAIL: IDs not unique and sequential")
+        return False
+    if not 1 < client.max_in_flight <= 4:
+        print(f"FAIL: Expected concurrent requests, saw {client.max_in_flight} in flight")
+        return False
+    if sorted(position for position, _, _ in progress) != list(range(len(client.requests))):
+        print("FAIL: Progress not reported once per chunk")
+        return False
+    print(f"PASS: {len(client.requests)} chunks, {len(rules)} rules, {client.max_in_flight} in flight")
+    return True
+
+
+def test_duplicates_removed() -> bool:
+    print("Test 4.84: Rules repeated across chunks removed")
+    merged = normalizer.merge_normalized_chunks([
+        [{"id": "1.0", "text": "No spam.", "keywords": ["spam"]},
+         {"id": "2.0", "text": "Be kind.", "keywords": []}],
+        [{"id": "1.0", "text": "  no   SPAM ", "keywords": ["promotion", "spam"]},
+         {"id": "2.0", "text": "No doxxing.", "keywords": ["doxxing"]},
+         {"id": "3.0", "text": "   "}],
+    ])
+    rules = merged["rules"]
+    if [(rule["id"], rule["text"]) for rule in rules] != [("1.0", "No spam."), ("2.0", "Be kind."),
+                                                           ("3.0", "No doxxing.")]:
+        print(f"FAIL: Unexpected merge {rules}")
+        return False
+    if rules[0]["keywords"] != ["spam", "promotion"]:
+        print(f"FAIL: Duplicate keywords not merged: {rules[0]['keywords']}")
+        return False
+
+    repeated = _document(sections=6) + "\n## Summary\n- Members must follow guideline 1.1 in every thread.\n"
+    client = FakeClient(latency=0)
+    result = _with_client(client, lambda: normalizer.normalize_rules_chunked(repeated, max_chunk_chars=900))
+    if len(result["rules"]) != 48:
+        print(f"FAIL: Repeated rule kept ({len(result['rules'])} rules)")
+        return False
+    print("PASS: Duplicates dropped, keywords merged")
+    return True
+
+
+def test_short_document_and_failures() -> bool:
+    print("Test 4.85: Short documents use one request; chunk failures propagate")
+    short = "No spam.\nBe kind.\n"
+    client = FakeClient(latency=0)
+    chunked = _with_client(client, lambda: normalizer.normalize_rules_chunked(short))
+    single = _with_client(FakeClient(latency=0), lambda: normalizer.normalize_rules(short))
+    if client.requests != [short] or chunked != single:
+        print("FAIL: Short document should match normalize_rules")
+        return False
+    if _with_client(FakeClient(), lambda: normalizer.normalize_rules_chunked("  \n\n")) != {"rules": []}:
+        print("FAIL: Empty document should give no rules")
+        return False
+    try:
+        _with_client(FakeClient(fail_on="Section 3"),
+                     lambda: normalizer.normalize_rules_chunked(_document(), max_chunk_chars=600))
+    except RuntimeError:
+        pass
+    else:
+        print("FAIL: Chunk failure swallowed")
+        return False
+    print("PASS: Single request for short input, failures raised")
+    return True
+
+
+def main() -> int:
+    print("=" * 70)
+    print("Step 4 - Chunked LLM Normalization Tests")
+    print("=" * 70)
+    tests = [
+        test_section_chunks_merged(),
+        test_duplicates_removed(),
+        test_short_document_and_failures(),
+    ]
+    if all(tests):
+        print("\nALL TESTS PASSED")
+        return 0
+    print("\nTESTS FAILED")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Tests for the persistent, memory-mapped compiled rule index.
+
+Covers:
+- Save/load round trip gives identical verdicts
+- Matrix arrays are memory-mapped on load
+- A changed rules JSON invalidates the compiled index
+- Indexes are only written on request, optionally to a separate directory
+"""
+
+import json
+import logging
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+from citation_checker import (
+    RuleIndex,
+    adjudicate_comment,
+    adjudicate_comments,
+    compiled_index_path,
+    load_rule_index,
+)
+from normalizer import normalize_rules_to_json
+
+
+COMMENTS = [
+    "Check out my affiliate link. This is spam.",
+    "You're such an idiot.",
+    "Here is his home address and phone number.",
+    "I disagree with your technical analysis.",
+]
+
+
+def _reddit_rules() -> dict:
+    repo_root = os.path.dirname(__file__)
+    with open(os.path.join(repo_root, "examples", "reddit_rules.txt"), "r", encoding="utf-8") as handle:
+        return normalize_rules_to_json(handle.read())
+
+
+def _write_json(path: str, payload: dict) -> None:
+    with open(path, "w", encoding="utf-8") as handle:
+        json.dump(payload, handle)
+
+
+def _is_memory_mapped(array) -> bool:
+    # scipy may wrap the loaded arrays in views; walk back to the owner.
+    while isinstance(array, np.ndarray):
+        if isinstance(array, np.memmap):
+            return True
+        array = array.base
+    return False
+
+
+def test_round_trip() -> bool:
+    print("Test 4.13: Compiled index round trip")
+    rules_json = _reddit_rules()
+    with tempfile.TemporaryDirectory() as workdir:
+        index_dir = os.path.join(workdir, "rules.index")
+        RuleIndex(rules_json).save(index_dir)
+        loaded = RuleIndex.load(index_dir)
+        for comment in COMMENTS:
+            expected = adjudicate_comment(comment, rules_json)
+            if adjudicate_comment(comment, loaded) != expected:
+                print(f"FAIL: Loaded index verdict differs for {comment!r}")
+                return False
+            if adjudicate_comment(comment, loaded, top_k=3) != adjudicate_comment(
+                comment, rules_json, top_k=3
+            ):
+                print(f"FAIL: Loaded index top-k verdict differs for {comment!r}")
+                return False
+        if adjudicate_comments(COMMENTS, loaded) != adjudicate_comments(COMMENTS, rules_json):
+            print("FAIL: Batched verdicts differ after load")
+            return False
+        if loaded.fingerprint != RuleIndex(rules_json).fingerprint:
+            print("FAIL: Fingerprint not preserved")
+            return False
+    print("PASS: Round trip preserves verdicts")
+    return True
+
+
+def test_memory_mapped() -> bool:
+    print("Test 4.14: Rule matrix is memory-mapped")
+    with tempfile.TemporaryDirectory() as workdir:
+        index_dir = os.path.join(workdir, "rules.index")
+        RuleIndex(_reddit_rules()).save(index_dir)
+        loaded = RuleIndex.load(index_dir)
+        arrays = [loaded.idf, loaded.rule_matrix.data, loaded.rule_matrix.indices]
+        for array in arrays:
+            if not _is_memory_mapped(array):
+                print("FAIL: Expected memory-mapped arrays")
+                return False
+    print("PASS: Arrays are memory-mapped")
+    return True
+
+
+def test_stale_index_rebuilt() -> bool:
+    print("Test 4.15: Stale compiled index is rebuilt")
+    with tempfile.TemporaryDirectory() as workdir:
+        rules_path = os.path.join(workdir, "rules.json")
+        _write_json(rules_path, {"rules": [{"id": "r1", "text": "No spam.", "keywords": ["spam"]}]})
+        first = load_rule_index(rules_path, compile=True)
+        if not os.path.isdir(compiled_index_path(rules_path)):
+            print("FAIL: Compiled index not written next to the rules JSON")
+            return False
+        if load_rule_index(rules_path).fingerprint != first.fingerprint:
+            print("FAIL: Fresh index should be reused")
+            return False
+
+        _write_json(rules_path, {"rules": [{"id": "r9", "text": "No doxxing.", "keywords": ["address"]}]})
+        second = load_rule_index(rules_path, compile=True)
+        result = adjudicate_comment("posting an address", second)
+        if (result.get("citation_anchor") or {}).get("rule_id") != "r9":
+            print("FAIL: Edited rules JSON not picked up")
+            return False
+    print("PASS: Stale index rebuilt")
+    return True
+
+
+class _Records(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+def test_explicit_index_writes() -> bool:
+    print("Test 4.92: Compiled index written only on request")
+    with tempfile.TemporaryDirectory() as workdir:
+        rules_path = os.path.join(workdir, "rules.json")
+        _write_json(rules_path, {"rules": [{"id": "r1", "text": "No spam.", "keywords": ["spam"]}]})
+        load_rule_index(rules_path)
+        if os.listdir(workdir) != ["rules.json"]:
+            print(f"FAIL: Default load wrote files: {sorted(os.listdir(workdir))}")
+            return False
+
+        index_dir = os.path.join(workdir, "indexes")
+        load_rule_index(rules_path, compile=True, index_dir=index_dir)
+        index_path = compiled_index_path(rules_path, index_dir)
+        if os.path.dirname(index_path) != index_dir or not os.path.isdir(index_path):
+            print("FAIL: Index not written to the index directory")
+            return False
+        if os.path.exists(compiled_index_path(rules_path)):
+            print("FAIL: Index written next to the rules JSON")
+            return False
+        reused = load_rule_index(rules_path, index_dir=index_dir)
+        if reused.rule_matrix is None or not _is_memory_mapped(reused.rule_matrix.data):
+            print("FAIL: Index in the index directory not memory-mapped")
+            return False
+
+        blocked = os.path.join(workdir, "not-a-directory")
+        _write_json(blocked, {})
+        handler = _Records()
+        logger = logging.getLogger("citation_checker")
+        logger.addHandler(handler)
+        try:
+            index = load_rule_index(rules_path, compile=True, index_dir=blocked)
+        finally:
+            logger.removeHandler(handler)
+        if len(index) != 1 or not any("Could not save compiled rule index" in m for m in handler.messages):
+            print(f"FAIL: Failed save not logged: {handler.messages}")
+            return False
+    print("PASS: No implicit writes, index directory honoured, failures logged")
+    return True
+
+
+def main() -> int:
+    print("=" * 70)
+    print("Step 4 - Compiled Rule Index Tests")
+    print("=" * 70)
+    tests = [test_round_trip(), test_memory_mapped(), test_stale_index_rebuilt(), test_explicit_index_writes()]
+    if all(tests):
+        print("\nALL TESTS PASSED")
+        return 0
+    print("\nTESTS FAILED")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Tests for incremental re-normalization with stable rule IDs.
+
+Covers:
+- Unchanged text yields identical rules and an empty change set
+- Edited, inserted and deleted clauses are reported; other IDs are kept
+- Unchanged rules are reused as-is rather than re-analyzed
+- New IDs never reuse removed ones, even the highest
+- Reordered clauses keep their IDs
+"""
+
+import copy
+import os
+import sys
+
+from normalizer import normalize_rules_to_json, renormalize_rules_to_json
+
+
+def _reddit_text() -> str:
+    path = os.path.join(os.path.dirname(__file__), "examples", "reddit_rules.txt")
+    with open(path, "r", encoding="utf-8") as handle:
+        return handle.read()
+
+
+def _ids(rules_json: dict) -> list:
+    return [rule["id"] for rule in rules_json["rules"]]
+
+
+def test_unchanged_text() -> bool:
+    print("Test 4.45: Re-normalizing unchanged text is a no-op")
+    text = _reddit_text()
+    previous = normalize_rules_to_json(text)
+    rules, changes = renormalize_rules_to_json(previous, text)
+    if rules["rules"] != previous["rules"] or rules["next_id"] != len(previous["rules"]) + 1:
+        print("FAIL: Rules changed")
+        return False
+    if changes["added"] or changes["modified"] or changes["removed"]:
+        print(f"FAIL: Unexpected changes {changes}")
+        return False
+    print(f"PASS: {changes['unchanged']} rules unchanged")
+    return True
+
+
+def test_edit_insert_delete() -> bool:
+    print("Test 4.46: Edits, insertions and deletions keep other IDs stable")
+    text = _reddit_text()
+    previous = normalize_rules_to_json(text)
+    by_text = {rule["text"]: rule["id"] for rule in previous["rules"]}
+    spam_rule = next(rule for rule in previous["rules"] if "affiliate links" in rule["text"])
+    nsfw_rule = next(rule for rule in previous["rules"] if "NSFW" in rule["text"])
+
+    edited = (
+        text.replace("affiliate links", "affiliate or referral links")
+        .replace("7. Mark NSFW content appropriately\n", "")
+        .replace("1. Be respectful", "0. Be kind to newcomers\n1. Be respectful")
+    )
+    rules, changes = renormalize_rules_to_json(previous, edited)
+
+    if [rule["id"] for rule in changes["modified"]] != [spam_rule["id"]]:
+        print(f"FAIL: Expected {spam_rule['id']} modified, got {changes['modified']}")
+        return False
+    if changes["removed"] != [nsfw_rule["id"]]:
+        print(f"FAIL: Expected {nsfw_rule['id']} removed, got {changes['removed']}")
+        return False
+    added_ids = [rule["id"] for rule in changes["added"]]
+    if len(added_ids) != 1 or added_ids[0] in _ids(previous):
+        print(f"FAIL: Added rule should get a fresh ID, got {added_ids}")
+        return False
+    for rule in rules["rules"]:
+        if rule["text"] in by_text and rule["id"] != by_text[rule["text"]]:
+            print(f"FAIL: Unchanged rule renumbered: {rule}")
+            return False
+    if len(rules["rules"]) != len(normalize_rules_to_json(edited)["rules"]):
+        print("FAIL: Rule count differs from a full normalization")
+        return False
+    print("PASS: Change set reported with stable IDs")
+    return True
+
+
+def test_unchanged_rules_reused() -> bool:
+    print("Test 4.47: Unchanged rules are not re-analyzed")
+    text = _reddit_text()
+    previous = normalize_rules_to_json(text)
+    curated = copy.deepcopy(previous)
+    for rule in curated["rules"]:
+        rule["keywords"] = ["curated"]
+    edited = text.replace("descriptive titles", "clear and descriptive titles")
+    rules, changes = renormalize_rules_to_json(curated, edited)
+    fresh = {rule["id"] for rule in changes["modified"] + changes["added"]}
+    for rule in rules["rules"]:
+        reused = rule["keywords"] == ["curated"]
+        if reused == (rule["id"] in fresh):
+            print(f"FAIL: Unexpected enrichment state for {rule}")
+            return False
+    print(f"PASS: Only {len(fresh)} rule re-analyzed")
+    return True
+
+
+def test_ids_not_reused() -> bool:
+    print("Test 4.48: Removed IDs are never reused")
+    previous = normalize_rules_to_json("1. No spam links\n2. No harassment of users\n3. No doxxing")
+    rules, changes = renormalize_rules_to_json(previous, "1. No spam links\n2. No doxxing")
+    rules, changes = renormalize_rules_to_json(rules, "1. No spam links\n2. No doxxing\n3. Stay on topic always")
+    if _ids(rules) != ["rule_001", "rule_003", "rule_004"]:
+        print(f"FAIL: Unexpected IDs {_ids(rules)}")
+        return False
+    rules, _ = renormalize_rules_to_json(rules, "1. No spam links\n2. No doxxing")
+    rules, changes = renormalize_rules_to_json(rules, "1. No spam links\n2. No doxxing\n3. Be kind to newcomers")
+    if _ids(rules) != ["rule_001", "rule_003", "rule_005"]:
+        print(f"FAIL: Removed highest ID reused: {_ids(rules)}")
+        return False
+    print("PASS: New rules numbered after every ID handed out")
+    return True
+
+
+def test_moved_clauses_keep_ids() -> bool:
+    print("Test 4.96: Reordered clauses keep their IDs")
+    previous = normalize_rules_to_json("1. No spam\n2. Do not harass\n3. Keep posts on topic")
+    by_text = {rule["text"]: rule["id"] for rule in previous["rules"]}
+    rules, changes = renormalize_rules_to_json(
+        previous, "1. Keep posts on topic\n2. No spam\n3. Do not harass"
+    )
+    if changes["added"] or changes["modified"] or changes["removed"] or changes["unchanged"] != 3:
+        print(f"FAIL: Move reported as changes {changes}")
+        return False
+    if any(rule["id"] != by_text[rule["text"]] for rule in rules["rules"]):
+        print(f"FAIL: Moved rule renumbered: {_ids(rules)}")
+        return False
+    rules, changes = renormalize_rules_to_json(
+        previous, "1. Keep posts on topic\n2. No spam\n3. Do not harass anyone"
+    )
+    if [rule["id"] for rule in changes["modified"]] != [by_text["Do not harass"]] or changes["added"]:
+        print(f"FAIL: Edit alongside a move misreported {changes}")
+        return False
+    print("PASS: Moved clauses reused with their IDs")
+    return True
+
+
+def main() -> int:
+    print("=" * 70)
+    print("Step 4 - Incremental Normalizer Tests")
+    print("=" * 70)
+    tests = [
+        test_unchanged_text(),
+        test_edit_insert_delete(),
+        test_unchanged_rules_reused(),
+        test_ids_not_reused(),
+        test_moved_clauses_keep_ids(),
+    ]
+    if all(tests):
+        print("\nALL TESTS PASSED")
+        return 0
+    print("\nTESTS FAILED")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
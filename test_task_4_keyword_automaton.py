@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Tests for the Aho-Corasick KeywordAutomaton used by exact matching.
+
+Covers:
+- Agreement with naive substring search (examples and property test)
+- Overlapping and nested patterns
+- Exact scores per rule unchanged by the compiled keyword stage
+"""
+
+import sys
+
+try:
+    from hypothesis import given, strategies as st, settings
+    HYPOTHESIS_AVAILABLE = True
+except ImportError:
+    HYPOTHESIS_AVAILABLE = False
+
+from citation_checker import KeywordAutomaton, RuleIndex, _normalize_text, _tokenize
+
+
+def _naive_find(patterns, text):
+    return {pattern_id for pattern_id, pattern in enumerate(patterns) if pattern in text}
+
+
+def test_overlapping_patterns() -> bool:
+    print("Test 4.8: Overlapping and nested patterns")
+    patterns = ["he", "she", "his", "hers", "hate speech", "hate", "speech", "e"]
+    texts = ["ushers", "no hate speech here", "this", "", "hhhhe", "speeches hate"]
+    automaton = KeywordAutomaton(patterns)
+    for text in texts:
+        if automaton.find(text) != _naive_find(patterns, text):
+            print(f"FAIL: Automaton disagrees with substring search on {text!r}")
+            return False
+    print("PASS: Overlapping patterns found")
+    return True
+
+
+def test_exact_scores_match_naive() -> bool:
+    print("Test 4.9: Exact scores match per-keyword substring search")
+    rules_json = {
+        "rules": [
+            {"id": "r1", "text": "No spam.", "keywords": ["spam", "promo", "Promo code", "spam"]},
+            {"id": "r2", "text": "No harassment.", "keywords": ["harass", "idiot"]},
+            {"id": "r3", "text": "Do not share personal information.", "keywords": []},
+            {"id": "r4", "text": "", "keywords": []},
+        ]
+    }
+    index = RuleIndex(rules_json)
+    comments = [
+        "Use my PROMO  code for spam!",
+        "stop harassing me, idiot",
+        "I will share your personal information",
+        "nothing to see",
+    ]
+    for comment in comments:
+        comment_lower = _normalize_text(comment)
+        comment_tokens = set(_tokenize(comment))
+        for rule_idx, rule in enumerate(rules_json["rules"]):
+            keywords = rule["keywords"]
+            if keywords:
+                expected = min(1.0, sum(
+                    1 for keyword in keywords if _normalize_text(keyword) in comment_lower
+                ) / len(keywords))
+            else:
+                rule_tokens = set(_tokenize(rule["text"]))
+                expected = (
+                    len(rule_tokens & comment_tokens) / len(rule_tokens) if rule_tokens else 0.0
+                )
+            actual = index.exact_scores(comment_lower, comment_tokens)[rule_idx]
+            single, _ = index.exact_match_score(comment_lower, comment_tokens, rule_idx)
+            if abs(actual - expected) > 1e-12 or abs(single - expected) > 1e-12:
+                print(f"FAIL: Score mismatch for rule {rule['id']} on {comment!r}")
+                return False
+    print("PASS: Exact scores unchanged")
+    return True
+
+
+if HYPOTHESIS_AVAILABLE:
+
+    @given(
+        st.lists(st.text(alphabet="abc ", min_size=1, max_size=4), min_size=1, max_size=8),
+        st.text(alphabet="abc ", max_size=40),
+    )
+    @settings(max_examples=200)
+    def test_automaton_property(patterns, text) -> None:
+        automaton = KeywordAutomaton(patterns)
+        found = {automaton.patterns[pattern_id] for pattern_id in automaton.find(text)}
+        assert found == {pattern for pattern in patterns if pattern in text}
+
+
+def main() -> int:
+    print("=" * 70)
+    print("Step 4 - Keyword Automaton Tests")
+    print("=" * 70)
+    tests = [test_overlapping_patterns(), test_exact_scores_match_naive()]
+    if HYPOTHESIS_AVAILABLE:
+        try:
+            test_automaton_property()
+            print("PASS: Property test for automaton")
+        except AssertionError as exc:
+            print(f"FAIL: Property test failed: {exc}")
+            tests.append(False)
+    if all(tests):
+        print("\nALL TESTS PASSED")
+        return 0
+    print("\nTESTS FAILED")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
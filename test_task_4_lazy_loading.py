@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Tests for lazy spaCy / OpenAI loading in the normalizer.
+
+Covers:
+- Importing normalizer or citation_checker does not import spaCy or OpenAI
+- normalizer import time stays under a budget
+- get_nlp / get_client load once and are reused
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+import normalizer
+
+
+# Seconds allowed for "import normalizer" in a fresh interpreter.
+IMPORT_BUDGET_SECONDS = 0.5
+
+_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started
+print(json.dumps({{
+    "seconds": elapsed,
+    "spacy": "spacy" in sys.modules,
+    "openai": "openai" in sys.modules,
+}}))
+"""
+
+
+def _probe_import(module: str) -> dict:
+    output = subprocess.run(
+        [sys.executable, "-c", _PROBE.format(module=module)],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def test_import_is_lazy() -> bool:
+    print("Test 4.35: Importing normalizer / citation_checker skips spaCy and OpenAI")
+    for module in ("normalizer", "citation_checker"):
+        probe = _probe_import(module)
+        if probe["spacy"] or probe["openai"]:
+            print(f"FAIL: import {module} loaded heavy dependencies: {probe}")
+            return False
+    print("PASS: Heavy dependencies deferred")
+    return True
+
+
+def test_import_budget() -> bool:
+    print("Test 4.36: normalizer import time within budget")
+    seconds = min(_probe_import("normalizer")["seconds"] for _ in range(3))
+    if seconds > IMPORT_BUDGET_SECONDS:
+        print(f"FAIL: import took {seconds:.3f}s (budget {IMPORT_BUDGET_SECONDS}s)")
+        return False
+    print(f"PASS: import took {seconds * 1000:.1f} ms")
+    return True
+
+
+def test_loaders_cache() -> bool:
+    print("Test 4.37: get_nlp / get_client load once")
+    first = normalizer.get_nlp()
+    if normalizer.get_nlp() is not first:
+        print("FAIL: get_nlp reloaded the pipeline")
+        return False
+    if first is not None:
+        missing = set(normalizer.SPACY_EXCLUDE) & set(first.pipe_names)
+        if missing:
+            print(f"FAIL: Excluded components loaded: {missing}")
+            return False
+    if normalizer.get_client() is not normalizer.get_client():
+        print("FAIL: get_client created more than one client")
+        return False
+    print(f"PASS: Loaded once (spaCy {'available' if first is not None else 'unavailable'})")
+    return True
+
+
+def main() -> int:
+    print("=" * 70)
+    print("Step 4 - Lazy Loading Tests")
+    print("=" * 70)
+    tests = [test_import_is_lazy(), test_import_budget(), test_loaders_cache()]
+    if all(tests):
+        print("\nALL TESTS PASSED")
+        return 0
+    print("\nTESTS FAILED")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+Tests for the concurrent LLM adjudicator against a local stub OpenAI server.
+
+Covers:
+- Results come back in input order with bounded in-flight requests
+- 429 responses are retried with backoff (honouring Retry-After)
+- Non-retryable errors and exhausted retries are reported per dispute
+- The token bucket paces requests to the configured rate
+- One adjudicator can be reused across event loops
+"""
+
+import asyncio
+import json
+import os
+import random
+import sys
+import threading
+import time
+
+from openai import AsyncOpenAI
+
+from llm_adjudication import AsyncDisputeAdjudicator, TokenBucket
+
+
+RULES_JSON = {"rules": [{"id": "1.0", "text": "No spam.", "category": "spam", "keywords": ["spam"]}]}
+
+
+class StubOpenAIServer:
+    """
+    Minimal HTTP server speaking the chat completions API.
+
+    Each comment containing "flaky" is answered with 429 ``fail_times`` times
+    before succeeding; "broken" always gets a 400. Every response is delayed
+    by ``latency`` seconds.
+    """
+
+    def __init__(self, latency: float = 0.02, fail_times: int = 2, retry_after: str = None):
+        self.latency = latency
+        self.fail_times = fail_times
+        self.retry_after = retry_after
+        self.attempts = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.requests = 0
+        self._server = None
+        self._writers = set()
+
+    async def start(self) -> int:
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def close(self) -> None:
+        self._server.close()
+        await self._server.wait_closed()
+        # Keep-alive connections outlive the listening socket; end them too.
+        for writer in list(self._writers):
+            writer.close()
+        while self._writers:
+            await asyncio.sleep(0.001)
+
+    async def _handle(self, reader, writer):
+        self._writers.add(writer)
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                length = 0
+                for line in head.decode("latin-1").split("\r\n")[1:]:
+                    name, _, value = line.partition(":")
+                    if name.strip().lower() == "content-length":
+                        length = int(value)
+                body = json.loads(await reader.readexactly(length))
+                status, payload, headers = await self._respond(body)
+                data = json.dumps(payload).encode("utf-8")
+                extra = "".join(f"{name}: {value}\r\n" for name, value in headers.items())
+                writer.write(
+                    f"HTTP/1.1 {status} X\r\nContent-Type: application/json\r\n{extra}"
+                    f"Content-Length: {len(data)}\r\n\r\n".encode("latin-1") + data
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+    async def _respond(self, body):
+        comment = body["messages"][1]["content"]
+        self.requests += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+        finally:
+            self.in_flight -= 1
+        attempt = self.attempts.get(comment, 0)
+        self.attempts[comment] = attempt + 1
+        if "broken" in comment:
+            return 400, {"error": {"message": "bad request", "type": "invalid_request_error"}}, {}
+        if "flaky" in comment and attempt < self.fail_times:
+            headers = {"Retry-After": self.retry_after} if self.retry_after is not None else {}
+            return 429, {"error": {"message": "rate limited", "type": "rate_limit_error"}}, headers
+        verdict = {
+            "verdict": "Violation" if "spam" in comment else "No Violation",
+            "citation_anchor": {"rule_id": "1.0", "quoted_rule_text": "No spam."},
+            "reasoning": comment,
+            "confidence": 0.9,
+        }
+        return 200, {
+            "id": "chatcmpl-stub",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body["model"],
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": json.dumps(verdict)},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": 10, "completion_tokens": 10, "total_tokens": 20},
+        }, {}
+
+
+async def _with_stub(run, **server_options):
+    server = StubOpenAIServer(**server_options)
+    port = await server.start()
+    client = AsyncOpenAI(api_key="test", base_url=f"http://127.0.0.1:{port}/v1", max_retries=0)
+    try:
+        return await run(server, client)
+    finally:
+        await client.close()
+        await server.close()
+
+
+class BackgroundStub:
+    """Runs a StubOpenAIServer on its own loop thread, for callers that use asyncio.run."""
+
+    def __init__(self, **server_options):
+        self.server = StubOpenAIServer(**server_options)
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+
+    def __enter__(self) -> "BackgroundStub":
+        self._thread.start()
+        port = asyncio.run_coroutine_threadsafe(self.server.start(), self._loop).result()
+        self.base_url = f"http://127.0.0.1:{port}/v1"
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        asyncio.run_coroutine_threadsafe(self.server.close(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+
+def test_ordered_bounded_results() -> bool:
+    print("Test 4.71: Ordered results with bounded concurrency")
+    comments = [f"comment {i} {'spam' if i % 3 == 0 else 'fine'}" for i in range(40)]
+
+    async def run(server, client):
+        adjudicator = AsyncDisputeAdjudicator(client, max_concurrency=5, requests_per_minute=None,
+                                              tokens_per_minute=None)
+        results = await adjudicator.adjudicate_many((comment, RULES_JSON) for comment in comments)
+        return server, adjudicator, results
+
+    server, adjudicator, results = asyncio.run(_with_stub(run))
+    if [result["reasoning"] for result in results] != comments:
+        print("FAIL: Results out of order")
+        return False
+    if [result["verdict"] == "Violation" for result in results] != [i % 3 == 0 for i in range(40)]:
+        print("FAIL: Wrong verdicts")
+        return False
+    if server.max_in_flight != 5 or adjudicator.max_in_flight != 5:
+        print(f"FAIL: Expected 5 requests in flight, saw {server.max_in_flight}")
+        return False
+    print("PASS: 40 disputes in order, never more than 5 in flight")
+    return True
+
+
+def test_rate_limit_retries() -> bool:
+    print("Test 4.72: 429 responses retried with backoff")
+    comments = ["flaky spam one", "steady comment", "flaky two"]
+
+    async def run(server, client):
+        adjudicator = AsyncDisputeAdjudicator(client, max_concurrency=3, base_delay=0.01, max_delay=0.05,
+                                              rng=random.Random(7))
+        results = await adjudicator.adjudicate_many((comment, RULES_JSON) for comment in comments)
+        return server, adjudicator, results
+
+    server, adjudicator, results = asyncio.run(_with_stub(run, fail_times=2))
+    stats = adjudicator.stats()
+    if [result["reasoning"] for result in results] != comments:
+        print("FAIL: Retried results out of order")
+        return False
+    if (stats["rate_limited"], stats["retries"], server.requests) != (4, 4, 7):
+        print(f"FAIL: Unexpected retry counts {stats}, {server.requests} server requests")
+        return False
+    if not 0 < stats["backoff_seconds"] <= 4 * 0.05:
+        print(f"FAIL: Backoff outside the jitter bounds: {stats['backoff_seconds']}")
+        return False
+
+    async def run_retry_after(server, client):
+        adjudicator = AsyncDisputeAdjudicator(client, base_delay=5.0, max_delay=10.0)
+        await adjudicator.adjudicate("flaky", RULES_JSON)
+        return adjudicator
+
+    started = time.perf_counter()
+    honoured = asyncio.run(_with_stub(run_retry_after, fail_times=1, retry_after="0.05"))
+    elapsed = time.perf_counter() - started
+    if honoured.stats()["backoff_seconds"] != 0.05 or elapsed > 2:
+        print(f"FAIL: Retry-After not honoured ({honoured.stats()}, {elapsed:.2f}s)")
+        return False
+    print("PASS: Rate-limited requests retried and recovered")
+    return True
+
+
+def test_failures_reported() -> bool:
+    print("Test 4.73: Failed disputes reported in place")
+    comments = ["spam ok", "broken request", "flaky forever"]
+
+    async def run(server, client):
+        adjudicator = AsyncDisputeAdjudicator(client, max_retries=2, base_delay=0.001, max_delay=0.002)
+        results = await adjudicator.adjudicate_many(
+            ((comment, RULES_JSON) for comment in comments), return_exceptions=True
+        )
+        return server, adjudicator, results
+
+    server, adjudicator, results = asyncio.run(_with_stub(run, fail_times=100))
+    if results[0].get("verdict") != "Violation":
+        print(f"FAIL: Healthy dispute failed: {results[0]}")
+        return False
+    if getattr(results[1], "status_code", None) != 400 or server.attempts["broken request"] != 1:
+        print("FAIL: Non-retryable error should fail without retries")
+        return False
+    if getattr(results[2], "status_code", None) != 429 or server.attempts["flaky forever"] != 3:
+        print("FAIL: Exhausted retries not reported")
+        return False
+    if adjudicator.stats()["failures"] != 2:
+        print(f"FAIL: Unexpected failure count {adjudicator.stats()}")
+        return False
+    print("PASS: Errors returned per dispute")
+    return True
+
+
+def test_token_bucket_pacing() -> bool:
+    print("Test 4.74: Token bucket paces requests")
+
+    async def run():
+        bucket = TokenBucket(rate_per_minute=600, capacity=5)  # 10 per second after a burst of 5
+        started = time.perf_counter()
+        await asyncio.gather(*(bucket.acquire() for _ in range(15)))
+        return time.perf_counter() - started, bucket
+
+    elapsed, bucket = asyncio.run(run())
+    if not 0.9 <= elapsed < 2.0:
+        print(f"FAIL: 15 acquisitions took {elapsed:.2f}s, expected about 1s")
+        return False
+    print(f"PASS: Burst of 5 then paced ({elapsed:.2f}s, waited {bucket.waited_seconds:.2f}s)")
+    return True
+
+
+def test_reuse_across_event_loops() -> bool:
+    print("Test 4.86: Adjudicator reused across asyncio.run calls")
+    comments = [f"round comment {i} spam" for i in range(6)]
+    saved_base_url = os.environ.get("OPENAI_BASE_URL")
+    try:
+        with BackgroundStub() as stub:
+            os.environ["OPENAI_BASE_URL"] = stub.base_url
+            adjudicator = AsyncDisputeAdjudicator(max_concurrency=3, max_retries=0, tokens_per_minute=None)
+            for _ in range(3):
+                results = asyncio.run(adjudicator.adjudicate_many(
+                    ((comment, RULES_JSON) for comment in comments), return_exceptions=True
+                ))
+                if [getattr(result, "get", lambda _: None)("reasoning") for result in results] != comments:
+                    print(f"FAIL: Reused adjudicator failed on a new loop: {results}")
+                    return False
+            if (adjudicator.stats()["failures"], stub.server.requests) != (0, 18):
+                print(f"FAIL: Unexpected stats {adjudicator.stats()}")
+                return False
+
+            supplied = AsyncDisputeAdjudicator(AsyncOpenAI(api_key="test", base_url=stub.base_url, max_retries=0))
+            asyncio.run(supplied.adjudicate_many([("fine", RULES_JSON)]))
+            try:
+                asyncio.run(supplied.adjudicate_many([("fine", RULES_JSON)], return_exceptions=True))
+            except RuntimeError as exc:
+                if "event loop" not in str(exc):
+                    raise
+            else:
+                print("FAIL: Supplied client silently used on a second loop")
+                return False
+    finally:
+        if saved_base_url is None:
+            os.environ.pop("OPENAI_BASE_URL", None)
+        else:
+            os.environ["OPENAI_BASE_URL"] = saved_base_url
+    print("PASS: Three rounds on fresh loops, supplied client guarded")
+    return True
+
+
+def main() -> int:
+    print("=" * 70)
+    print("Step 4 - Concurrent LLM Adjudication Tests")
+    print("=" * 70)
+    tests = [
+        test_ordered_bounded_results(),
+        test_rate_limit_retries(),
+        test_failures_reported(),
+        test_token_bucket_pacing(),
+        test_reuse_across_event_loops(),
+    ]
+    if all(tests):
+        print("\nALL TESTS PASSED")
+        return 0
+    print("\nTESTS FAILED")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Tests for the persistent OpenAI response cache.
+
+Covers:
+- Repeated normalize_rules / adjudicate_dispute calls are answered locally
+- Keys separate model, system prompt (rulebook) and user content
+- Responses persist across cache instances on disk
+- LRU eviction by entry count and size, and hit-rate counters
+- The shared client and cache are created once under concurrent first use
+- Writes keep running totals instead of aggregating the table each time
+"""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from unittest import mock
+
+import normalizer
+import llm_cache
+from llm_cache import LLMResponseCache
+
+
+RULES_JSON = {"rules": [{"id": "1.0", "text": "No doxxing.", "category": "doxxing", "keywords": ["address"]}]}
+
+
+class FakeClient:
+    """Stands in for openai.OpenAI: answers from a callable and records requests."""
+
+    def __init__(self, answer):
+        self.requests = []
+        self._answer = answer
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, model, messages, response_format):
+        self.requests.append({"model": model, "messages": messages})
+        content = self._answer(messages[0]["content"], messages[1]["content"])
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        self.now += 1.0
+        return self.now
+
+
+def _answer(system_prompt, user_content):
+    if "Rulebook Normalizer" in system_prompt:
+        return json.dumps({"rules": [{"id": "1.0", "text": user_content, "category": "conduct", "keywords": []}]})
+    verdict = "Violation" if "live" in user_content else "No Violation"
+    return json.dumps({"verdict": verdict, "citation_anchor": {"rule_id": "1.0"}, "confidence": 0.9})
+
+
+def _with_fake_client(run):
+    saved = normalizer.client, normalizer.response_cache
+    fake = FakeClient(_answer)
+    normalizer.client = fake
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            return run(fake, os.path.join(tmp, "llm.sqlite3"))
+    finally:
+        normalizer.client, normalizer.response_cache = saved
+
+
+def test_repeated_calls_cached() -> bool:
+    print("Test 4.67: Repeated OpenAI calls served from the cache")
+
+    def run(fake, path):
+        cache = LLMResponseCache(path)
+        normalizer.set_response_cache(cache)
+        first = normalizer.normalize_rules("No spam.")
+        second = normalizer.normalize_rules("No spam.")
+        verdicts = [normalizer.adjudicate_dispute("I know where you live", RULES_JSON) for _ in range(3)]
+        cache.close()
+        return fake, first, second, verdicts, cache.stats()
+
+    fake, first, second, verdicts, stats = _with_fake_client(run)
+    if first != second or verdicts[0]["verdict"] != "Violation" or any(v != verdicts[0] for v in verdicts):
+        print("FAIL: Cached responses differ from the originals")
+        return False
+    if len(fake.requests) != 2:
+        print(f"FAIL: Expected 2 API requests, got {len(fake.requests)}")
+        return False
+    if (stats["hits"], stats["misses"], stats["hit_rate"]) != (3, 2, 0.6):
+        print(f"FAIL: Unexpected counters {stats}")
+        return False
+    print("PASS: Repeats answered without the API")
+    return True
+
+
+def test_key_components() -> bool:
+    print("Test 4.68: Keys separate model, rulebook and comment")
+
+    def run(fake, path):
+        normalizer.set_response_cache(LLMResponseCache(path))
+        normalizer.adjudicate_dispute("hello", RULES_JSON)
+        normalizer.adjudicate_dispute("hello there", RULES_JSON)
+        edited = {"rules": RULES_JSON["rules"] + [{"id": "2.0", "text": "No spam."}]}
+        normalizer.adjudicate_dispute("hello", edited)
+        normalizer.adjudicate_dispute("hello", RULES_JSON)
+        normalizer.response_cache.close()
+        return fake
+
+    fake = _with_fake_client(run)
+    if len(fake.requests) != 3:
+        print(f"FAIL: Expected 3 distinct requests, got {len(fake.requests)}")
+        return False
+    make_key = LLMResponseCache.make_key
+    if make_key("gpt-4o", "system", "user") == make_key("gpt-4o-mini", "system", "user"):
+        print("FAIL: Model not part of the key")
+        return False
+    if make_key("m", "ab", "c") == make_key("m", "a", "bc"):
+        print("FAIL: Prompt boundaries not part of the key")
+        return False
+    print("PASS: Distinct requests get distinct keys")
+    return True
+
+
+def test_persistence_across_instances() -> bool:
+    print("Test 4.69: Responses persist on disk")
+
+    def run(fake, path):
+        normalizer.set_response_cache(LLMResponseCache(path))
+        normalizer.normalize_rules("Be kind.")
+        normalizer.response_cache.close()
+        reopened = LLMResponseCache(path)
+        normalizer.set_response_cache(reopened)
+        result = normalizer.normalize_rules("Be kind.")
+        reopened.close()
+        return fake, result, reopened.stats()
+
+    fake, result, stats = _with_fake_client(run)
+    if len(fake.requests) != 1 or stats["hits"] != 1 or result["rules"][0]["text"] != "Be kind.":
+        print(f"FAIL: Reopened cache missed ({len(fake.requests)} requests, {stats})")
+        return False
+    print("PASS: Reopened cache answered the request")
+    return True
+
+
+def test_eviction() -> bool:
+    print("Test 4.70: LRU eviction by entries and size")
+    cache = LLMResponseCache(":memory:", max_entries=2, clock=FakeClock())
+    for name in ("a", "b"):
+        cache.put(name, "{}")
+    cache.get("a")
+    cache.put("c", "{}")
+    if cache.get("b") is not None or cache.get("a") is None or len(cache) != 2:
+        print("FAIL: Least recently used entry not evicted")
+        return False
+    sized = LLMResponseCache(":memory:", max_bytes=100, clock=FakeClock())
+    for name in ("x", "y", "z"):
+        sized.put(name, json.dumps({"text": name * 40}))
+    if len(sized) != 1 or sized.size_bytes() > 100 or sized.stats()["evictions"] != 2:
+        print(f"FAIL: Size limit not enforced ({len(sized)} entries, {sized.size_bytes()} bytes)")
+        return False
+    print("PASS: Limits enforced")
+    return True
+
+
+def test_running_totals() -> bool:
+    print("Test 4.95: Writes keep running totals")
+    cache = LLMResponseCache(":memory:", max_entries=50, max_bytes=10_000, clock=FakeClock())
+    statements = []
+    cache._conn.set_trace_callback(statements.append)
+    for n in range(200):
+        cache.put(f"k{n % 60}", json.dumps({"n": n}))
+    scans = sum("SUM(size)" in statement for statement in statements)
+    if scans > 200 // 10:
+        print(f"FAIL: {scans} table scans for 200 writes")
+        return False
+    if len(cache) != 50 or cache.size_bytes() != cache._total_bytes or cache._count != 50:
+        print(f"FAIL: Totals out of step ({len(cache)} entries, {cache.size_bytes()} bytes, "
+              f"tracked {cache._count}, {cache._total_bytes})")
+        return False
+
+    # Another process writing to the same file is noticed at the next rescan.
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "llm.sqlite3")
+        first = LLMResponseCache(path, max_entries=10, clock=FakeClock())
+        second = LLMResponseCache(path, max_entries=10, clock=FakeClock())
+        first.put("first", "{}")
+        for n in range(15):
+            second.put(f"second {n}", "{}")
+        with mock.patch.object(llm_cache, "RESYNC_WRITES", 2):
+            first.put("first again", "{}")
+            first.put("first once more", "{}")
+        count = len(first)
+        first.close()
+        second.close()
+    if count != 10:
+        print(f"FAIL: Shared file holds {count} entries")
+        return False
+    print(f"PASS: {scans} table scan(s) for 200 writes, limits still enforced")
+    return True
+
+
+def test_lazy_globals_thread_safe() -> bool:
+    print("Test 4.90: Client and cache created once under concurrent first use")
+    created = []
+
+    def slow(cls):
+        class Slow(cls):
+            def __init__(self, *args, **kwargs):
+                created.append(cls.__name__)
+                time.sleep(0.05)  # widen the window between the check and the assignment
+                super().__init__(*args, **kwargs)
+        return Slow
+
+    import openai
+
+    barrier = threading.Barrier(8)
+
+    def first_use(getter):
+        barrier.wait()
+        return getter()
+
+    saved = normalizer.client, normalizer.response_cache
+    with tempfile.TemporaryDirectory() as workdir:
+        try:
+            normalizer.client = None
+            normalizer.set_response_cache(None)
+            with mock.patch.dict(os.environ, {"OAP_LLM_CACHE_PATH": os.path.join(workdir, "llm.sqlite3")}), \
+                    mock.patch("llm_cache.LLMResponseCache", slow(LLMResponseCache)), \
+                    mock.patch("openai.OpenAI", slow(openai.OpenAI)), \
+                    ThreadPoolExecutor(max_workers=8) as pool:
+                caches = list(pool.map(first_use, [normalizer.get_response_cache] * 8))
+                clients = list(pool.map(first_use, [normalizer.get_client] * 8))
+            caches[0].close()
+        finally:
+            normalizer.client, normalizer.response_cache = saved
+    if len({id(cache) for cache in caches}) != 1 or len({id(client) for client in clients}) != 1:
+        print(f"FAIL: Several instances created concurrently: {created}")
+        return False
+    if sorted(created) != ["LLMResponseCache", "OpenAI"]:
+        print(f"FAIL: Unexpected constructions {created}")
+        return False
+    print("PASS: One client and one cache for 8 concurrent callers")
+    return True
+
+
+def main() -> int:
+    print("=" * 70)
+    print("Step 4 - LLM Response Cache Tests")
+    print("=" * 70)
+    tests = [
+        test_repeated_calls_cached(),
+        test_key_components(),
+        test_persistence_across_instances(),
+        test_eviction(),
+        test_lazy_globals_thread_safe(),
+        test_running_totals(),
+    ]
+    if all(tests):
+        print("\nALL TESTS PASSED")
+        return 0
+    print("\nTESTS FAILED")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
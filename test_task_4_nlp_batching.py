@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Tests for batched NLP processing in the normalizer.
+
+Covers:
+- extract_keywords_batch matches per-rule extract_keywords
+- normalize_rules_to_json output does not depend on batch_size / n_process
+- Line-based fallback parsing with many lines
+"""
+
+import os
+import sys
+
+from normalizer import (
+    SPACY_AVAILABLE,
+    extract_keywords,
+    extract_keywords_batch,
+    normalize_rules_to_json,
+)
+
+
+def _example_texts() -> list:
+    examples_dir = os.path.join(os.path.dirname(__file__), "examples")
+    texts = []
+    for name in sorted(os.listdir(examples_dir)):
+        if name.endswith("_rules.txt"):
+            with open(os.path.join(examples_dir, name), "r", encoding="utf-8") as handle:
+                texts.append(handle.read())
+    return texts
+
+
+def test_keywords_batch_matches_single() -> bool:
+    print("Test 4.32: Batched keyword extraction matches per-rule extraction")
+    rules = [
+        rule["text"]
+        for text in _example_texts()
+        for rule in normalize_rules_to_json(text)["rules"]
+    ]
+    batched = extract_keywords_batch(rules, batch_size=3)
+    single = [extract_keywords(rule) for rule in rules]
+    if batched != single:
+        print("FAIL: Batched keywords differ")
+        return False
+    print(f"PASS: {len(rules)} rules, identical keywords")
+    return True
+
+
+def test_batch_options_do_not_change_output() -> bool:
+    print("Test 4.33: Output independent of batch_size")
+    texts = _example_texts() + [
+        "\n".join(f"- Users must not post spam link number {i}" for i in range(300)),
+    ]
+    for text in texts:
+        expected = normalize_rules_to_json(text)
+        for batch_size in (1, 16):
+            if normalize_rules_to_json(text, batch_size=batch_size) != expected:
+                print(f"FAIL: batch_size={batch_size} changed the output")
+                return False
+    print("PASS: Output identical across batch sizes")
+    return True
+
+
+def test_multiprocess_pipe() -> bool:
+    print("Test 4.34: nlp.pipe with multiple processes")
+    if not SPACY_AVAILABLE:
+        print("SKIP: spaCy model not available")
+        return True
+    text = _example_texts()[0]
+    if normalize_rules_to_json(text, n_process=2, batch_size=8) != normalize_rules_to_json(text):
+        print("FAIL: n_process=2 changed the output")
+        return False
+    print("PASS: Multi-process output identical")
+    return True
+
+
+def main() -> int:
+    print("=" * 70)
+    print("Step 4 - Batched NLP Tests")
+    print("=" * 70)
+    tests = [
+        test_keywords_batch_matches_single(),
+        test_batch_options_do_not_change_output(),
+        test_multiprocess_pipe(),
+    ]
+    if all(tests):
+        print("\nALL TESTS PASSED")
+        return 0
+    print("\nTESTS FAILED")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
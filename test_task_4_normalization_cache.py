@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Tests for the content-addressed NormalizationCache.
+
+Covers:
+- Cached results equal normalize_rules_to_json and are reused across instances
+- Keys change with the text, ID options and parser signature
+- Size-bounded LRU eviction and recovery from corrupt entries
+- Concurrent processes sharing one cache directory
+- Read-only caches degrade to misses; puts under the bound do not scan
+"""
+
+import json
+import os
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from unittest import mock
+
+from bulk_normalizer import discover_inputs, normalize_bulk
+from normalization_cache import NormalizationCache
+from normalizer import normalize_rules_to_json
+
+
+RULES_TEXT = "1. No harassment or bullying\n2. No spam or self-promotion\n3. Stay on topic"
+
+
+def _normalize_in_process(args) -> dict:
+    directory, text = args
+    return NormalizationCache(directory).normalize(text)
+
+
+def test_hits_across_instances() -> bool:
+    print("Test 4.56: Cached normalization reused across instances")
+    with tempfile.TemporaryDirectory() as directory:
+        first = NormalizationCache(directory).normalize(RULES_TEXT)
+        cache = NormalizationCache(directory)
+        second = cache.normalize(RULES_TEXT)
+        if first != second or first != normalize_rules_to_json(RULES_TEXT):
+            print("FAIL: Cached result differs")
+            return False
+        if cache.stats()["hits"] != 1 or cache.stats()["misses"] != 0:
+            print(f"FAIL: Expected a hit, got {cache.stats()}")
+            return False
+        if cache.normalize(RULES_TEXT, prefix="r", padding=2) != normalize_rules_to_json(RULES_TEXT, "r", 1, 2):
+            print("FAIL: Options not applied on a miss")
+            return False
+    print("PASS: Results reused from disk")
+    return True
+
+
+def test_key_components() -> bool:
+    print("Test 4.57: Keys depend on text, options and parser")
+    base = NormalizationCache.make_key(RULES_TEXT, parser="regex")
+    variants = [
+        NormalizationCache.make_key(RULES_TEXT + " ", parser="regex"),
+        NormalizationCache.make_key(RULES_TEXT, prefix="r", parser="regex"),
+        NormalizationCache.make_key(RULES_TEXT, start_num=5, parser="regex"),
+        NormalizationCache.make_key(RULES_TEXT, padding=4, parser="regex"),
+        NormalizationCache.make_key(RULES_TEXT, linguistic_features=True, parser="regex"),
+        NormalizationCache.make_key(RULES_TEXT, parser="spacy:core_web_sm:3.8.0:3.8.16"),
+    ]
+    if base in variants or len(set(variants)) != len(variants):
+        print("FAIL: Key collision between different inputs")
+        return False
+    if base != NormalizationCache.make_key(RULES_TEXT, parser="regex"):
+        print("FAIL: Key is not deterministic")
+        return False
+    print("PASS: Every key component is significant")
+    return True
+
+
+def test_eviction_and_corruption() -> bool:
+    print("Test 4.58: Size-bounded eviction and corrupt entries")
+    with tempfile.TemporaryDirectory() as directory:
+        cache = NormalizationCache(directory, max_bytes=1500)
+        texts = [f"{RULES_TEXT}\n4. Rule variant {i} must be followed" for i in range(6)]
+        for i, text in enumerate(texts):
+            cache.normalize(text)
+            os.utime(cache._path(cache.make_key(text)), (i, i))
+        cache.normalize(texts[-1])
+        if cache.size_bytes() > 1500 or cache.stats()["evictions"] == 0:
+            print(f"FAIL: Cache exceeds bound: {cache.size_bytes()} bytes, {cache.stats()}")
+            return False
+        if cache.get(cache.make_key(texts[0])) is not None:
+            print("FAIL: Oldest entry should be evicted first")
+            return False
+
+        key = cache.make_key(texts[-1])
+        with open(cache._path(key), "w", encoding="utf-8") as handle:
+            handle.write("{truncated")
+        if cache.normalize(texts[-1]) != normalize_rules_to_json(texts[-1]):
+            print("FAIL: Corrupt entry not recomputed")
+            return False
+        with open(cache._path(key), "r", encoding="utf-8") as handle:
+            json.load(handle)
+    print("PASS: Eviction bounded and corrupt entries replaced")
+    return True
+
+
+def test_read_only_and_running_size() -> bool:
+    print("Test 4.89: Read-only failures and running size total")
+    with tempfile.TemporaryDirectory() as directory:
+        cache = NormalizationCache(directory)
+        key = cache.make_key(RULES_TEXT)
+        cache.normalize(RULES_TEXT)
+        with mock.patch("normalization_cache.os.utime", side_effect=PermissionError("read-only")):
+            if cache.get(key) is None or not os.path.exists(cache._path(key)):
+                print("FAIL: Entry dropped when its mtime could not be refreshed")
+                return False
+        with open(cache._path(key), "w", encoding="utf-8") as handle:
+            handle.write("{truncated")
+        with mock.patch("normalization_cache.os.unlink", side_effect=PermissionError("read-only")):
+            if cache.get(key) is not None:
+                print("FAIL: Corrupt entry returned")
+                return False
+
+    with tempfile.TemporaryDirectory() as directory:
+        cache = NormalizationCache(directory)
+        cache.normalize(RULES_TEXT)
+        scans = []
+        entries = cache._entries
+        cache._entries = lambda: scans.append(1) or entries()
+        texts = [f"{RULES_TEXT}\n4. Rule variant {i} must be followed" for i in range(20)]
+        for text in texts:
+            cache.normalize(text)
+        if scans:
+            print(f"FAIL: {len(scans)} directory scans for puts under the bound")
+            return False
+        if cache._total_bytes != cache.size_bytes():
+            print(f"FAIL: Running total {cache._total_bytes} differs from {cache.size_bytes()} on disk")
+            return False
+        cache.max_bytes = cache._total_bytes
+        cache.normalize("1. One more rule to push the cache over its bound")
+        if len(scans) != 2 or cache.size_bytes() > cache.max_bytes:  # the size_bytes above, then evict
+            print(f"FAIL: Expected one eviction scan, saw {len(scans) - 1}")
+            return False
+    print("PASS: Read-only errors are misses, no scans under the bound")
+    return True
+
+
+def test_shared_directory() -> bool:
+    print("Test 4.59: Concurrent processes share a cache directory")
+    with tempfile.TemporaryDirectory() as directory:
+        texts = [f"{RULES_TEXT}\n4. Shared rule {i % 4} must be followed" for i in range(32)]
+        with ProcessPoolExecutor(max_workers=4) as pool:
+            results = list(pool.map(_normalize_in_process, [(directory, text) for text in texts]))
+        if results != [normalize_rules_to_json(text) for text in texts]:
+            print("FAIL: Concurrent results differ")
+            return False
+        leftovers = [
+            name
+            for _, _, files in os.walk(directory)
+            for name in files
+            if not name.endswith(".json")
+        ]
+        if leftovers or len(list(NormalizationCache(directory)._entries())) != 4:
+            print(f"FAIL: Unexpected cache contents {leftovers}")
+            return False
+    print("PASS: Shared directory stays consistent")
+    return True
+
+
+def test_bulk_normalizer_cache() -> bool:
+    print("Test 4.60: Bulk normalizer reuses the shared cache")
+    examples_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "examples")
+    inputs = discover_inputs(examples_dir, "_rules.txt")
+    with tempfile.TemporaryDirectory() as workdir:
+        cache_dir = os.path.join(workdir, "cache")
+        first = normalize_bulk(inputs, os.path.join(workdir, "a"), workers=2, cache_dir=cache_dir)
+        second = normalize_bulk(inputs, os.path.join(workdir, "b"), workers=2, cache_dir=cache_dir)
+    if any(report["cached"] for report in first) or not all(report["cached"] for report in second):
+        print(f"FAIL: Unexpected cache use {first} {second}")
+        return False
+    print("PASS: Second run served from cache")
+    return True
+
+
+def main() -> int:
+    print("=" * 70)
+    print("Step 4 - Normalization Cache Tests")
+    print("=" * 70)
+    tests = [
+        test_hits_across_instances(),
+        test_key_components(),
+        test_eviction_and_corruption(),
+        test_read_only_and_running_size(),
+        test_shared_directory(),
+        test_bulk_normalizer_cache(),
+    ]
+    if all(tests):
+        print("\nALL TESTS PASSED")
+        return 0
+    print("\nTESTS FAILED")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Tests for the normalizer benchmark suite.
+
+Covers:
+- Generated corpora are deterministic and parse to the requested rule count
+- The regex path can be forced and is restored afterwards
+- Results are saved as JSON and compared across runs
+- Corpora over spaCy's max_length are chunked; failing cases are skipped
+"""
+
+import os
+import sys
+import tempfile
+
+import spacy
+
+import normalizer
+from normalizer_benchmark import (
+    FORMATS,
+    FUNCTIONS,
+    compare_results,
+    generate_corpus,
+    load_results,
+    parsing_path,
+    run_benchmarks,
+    save_results,
+)
+
+
+def test_corpus_generation() -> bool:
+    print("Test 4.64: Synthetic corpora in every format")
+    for fmt in FORMATS:
+        corpus = generate_corpus(200, fmt, seed=3)
+        if corpus != generate_corpus(200, fmt, seed=3) or corpus == generate_corpus(200, fmt, seed=4):
+            print(f"FAIL: {fmt} corpus is not determined by its seed")
+            return False
+        if "rule 200" not in corpus or "rule 201" in corpus:
+            print(f"FAIL: {fmt} corpus does not hold exactly 200 rules")
+            return False
+    with parsing_path("regex"):
+        for fmt in ("numbered", "bulleted", "paragraph"):
+            clauses = normalizer.parse_rule_clauses(generate_corpus(1000, fmt))
+            if len(clauses) != 1000:
+                print(f"FAIL: {fmt} corpus parsed to {len(clauses)} clauses")
+                return False
+    try:
+        generate_corpus(10, "tabular")
+    except ValueError:
+        pass
+    else:
+        print("FAIL: Unknown format accepted")
+        return False
+    print("PASS: Corpora generated deterministically")
+    return True
+
+
+def test_regex_path_forced() -> bool:
+    print("Test 4.65: Regex path forced and restored")
+    before = normalizer.nlp, normalizer.SPACY_AVAILABLE
+    with parsing_path("regex") as available:
+        if not available or normalizer.parser_signature() != "regex":
+            print("FAIL: Regex path not in effect")
+            return False
+    if (normalizer.nlp, normalizer.SPACY_AVAILABLE) != before:
+        print("FAIL: Parser state not restored")
+        return False
+    print("PASS: Parser state restored")
+    return True
+
+
+def test_results_saved_and_compared() -> bool:
+    print("Test 4.66: Results saved as JSON and compared")
+    report = run_benchmarks(sizes=[10, 100], formats=["numbered", "mixed"], paths=["regex", "spacy"])
+    expected = 2 * 2 * len(FUNCTIONS)
+    if len(report["results"]) != expected:
+        print(f"FAIL: Expected {expected} regex results, got {len(report['results'])}")
+        return False
+    for result in report["results"]:
+        if result["seconds"] <= 0 or not result["peak_memory_bytes"] or not result["rules_per_second"]:
+            print(f"FAIL: Incomplete result {result}")
+            return False
+    if normalizer.get_nlp() is None and [entry["path"] for entry in report["skipped"]] != ["spacy"]:
+        print(f"FAIL: Unavailable spaCy path not reported: {report['skipped']}")
+        return False
+    if report["metadata"]["parsers"].get("regex") != "regex":
+        print(f"FAIL: Parser not recorded: {report['metadata']}")
+        return False
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench", "results.json")
+        save_results(report, path)
+        loaded = load_results(path)
+    if loaded != report:
+        print("FAIL: Saved results differ")
+        return False
+    rows = compare_results(loaded, report)
+    if len(rows) != expected or any(row["speedup"] != 1.0 for row in rows):
+        print(f"FAIL: Unexpected comparison {rows[:2]}")
+        return False
+    loaded["metadata"]["benchmark_version"] = -1
+    try:
+        compare_results(loaded, report)
+    except ValueError:
+        pass
+    else:
+        print("FAIL: Results from another suite version compared")
+        return False
+    print("PASS: Results round-trip and compare")
+    return True
+
+
+def test_long_corpora_chunked() -> bool:
+    print("Test 4.98: Long corpora chunked on the spaCy path, failures skipped")
+    # A real (blank) spaCy pipeline with a small max_length; it has no parser,
+    # so keyword extraction fails on it and must be reported, not fatal.
+    pipeline = spacy.blank("en")
+    pipeline.add_pipe("sentencizer")
+    pipeline.max_length = 5000
+    saved = normalizer.nlp
+    normalizer.nlp = pipeline
+    try:
+        report = run_benchmarks(sizes=[10, 200], formats=["bulleted"], paths=["spacy"],
+                                functions=["parse_rule_clauses", "extract_keywords"], memory=False)
+    finally:
+        normalizer.nlp = saved
+    parsed = [(result["rules"], result["chunked"]) for result in report["results"]]
+    if parsed != [(10, False), (200, True)]:
+        print(f"FAIL: Unexpected results {parsed}")
+        return False
+    failed = [(entry.get("function"), entry["rules"]) for entry in report["skipped"]]
+    if failed != [("extract_keywords", 10), ("extract_keywords", 200)]:
+        print(f"FAIL: Failing cases not skipped: {report['skipped']}")
+        return False
+    print("PASS: 200-rule corpus parsed in chunks, failing cases recorded")
+    return True
+
+
+def main() -> int:
+    print("=" * 70)
+    print("Step 4 - Normalizer Benchmark Tests")
+    print("=" * 70)
+    tests = [
+        test_corpus_generation(),
+        test_regex_path_forced(),
+        test_results_saved_and_compared(),
+        test_long_corpora_chunked(),
+    ]
+    if all(tests):
+        print("\nALL TESTS PASSED")
+        return 0
+    print("\nTESTS FAILED")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Tests for the precompiled, linear-time clause parsing in the normalizer.
+
+Covers:
+- The regex parser matches the original per-line implementation
+- On the regex path, normalize_rules_to_json time grows linearly with
+  rulebook size (10k vs 100k lines)
+- The NLP fallback keeps first occurrences of repeated lines, in order
+"""
+
+import random
+import re
+import sys
+import time
+
+import normalizer
+from normalizer import _parse_clause_spans, _parse_with_regex, get_nlp, normalize_rules_to_json
+from normalizer_benchmark import parsing_path
+
+
+_PIECES = [
+    "No spam.", "Be nice", "1. Do not harass others.", "- Must follow rules", "* ok",
+    "2) Never post links", "Users should be civil. All posts must be on topic.", "Short one",
+    "Don't dox people. Cannot share addresses.", "• Keep it clean", "Respect others at all times.",
+    "x", "3.Spam", "   ",
+]
+
+
+def _reference_line_clauses(text: str) -> list:
+    """Line-formatted branch and merge step of _parse_with_regex as originally written."""
+    numbered_pattern = r'^\s*(\d+[\.\)]\s*|[-*•]\s*)'
+    non_empty_lines = [line.strip() for line in text.split('\n') if line.strip()]
+    clauses = []
+    for line in non_empty_lines:
+        cleaned = re.sub(numbered_pattern, '', line).strip()
+        if cleaned:
+            clauses.append(cleaned)
+    merged_clauses = []
+    for clause in clauses:
+        is_complete_rule = (
+            clause.strip().startswith(('No ', 'Do not ', "Don't ", 'Never ', 'Always ')) or
+            any(word in clause.lower() for word in ['must', 'should', 'prohibited', 'required', 'allowed'])
+        )
+        if len(clause) < 15 and merged_clauses and not is_complete_rule:
+            merged_clauses[-1] = merged_clauses[-1] + ' ' + clause
+        else:
+            merged_clauses.append(clause)
+    return merged_clauses
+
+
+def _bulleted(count: int) -> str:
+    return "\n".join(f"- Be nice {i}" for i in range(count))
+
+
+def test_regex_matches_reference() -> bool:
+    print("Test 4.61: Regex parser matches the original line-by-line parsing")
+    rng = random.Random(19)
+    checked = 0
+    for _ in range(2000):
+        lines = [rng.choice(_PIECES) for _ in range(rng.randint(2, 15))]
+        # Force line formatting so the reference branch applies
+        text = "\n".join(f"- {line}" for line in lines)
+        if _parse_with_regex(text) != _reference_line_clauses(text):
+            print(f"FAIL: {text!r}")
+            return False
+        checked += 1
+    print(f"PASS: {checked} bulleted rulebooks parsed identically")
+    return True
+
+
+def _best_time(run, repeats: int = 3):
+    best, result = None, None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = run()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def test_linear_scaling() -> bool:
+    print("Test 4.62: normalize_rules_to_json scales linearly up to 100,000 lines (regex path)")
+    timings = []
+    # The 100k-line text is over spaCy's max_length, and the merge of short
+    # lines checked below is the regex parser's, so force that path.
+    with parsing_path("regex"):
+        if normalizer.parser_signature() != "regex":
+            print("FAIL: Regex path not in effect")
+            return False
+        for count in (10_000, 100_000):
+            text = _bulleted(count)
+            elapsed, rules_json = _best_time(lambda: normalize_rules_to_json(text))
+            timings.append(elapsed)
+    # The regex parser merges every short, incomplete line into the first rule
+    rules = rules_json["rules"]
+    if len(rules) != 1 or not rules[0]["text"].endswith("Be nice 99999"):
+        print(f"FAIL: Unexpected rules for the large rulebook ({len(rules)})")
+        return False
+    ratio = timings[1] / max(timings[0], 1e-6)
+    print(f"10k lines: {timings[0]:.3f}s, 100k lines: {timings[1]:.3f}s ({ratio:.1f}x)")
+    # Linear growth is ~10x and the old string-concatenating merge was ~100x;
+    # the bound leaves room for noisy machines (best of 3 runs each).
+    if ratio > 40:
+        print("FAIL: Parsing time grows faster than linearly")
+        return False
+    print("PASS: Linear scaling")
+    return True
+
+
+def test_nlp_fallback_dedupe() -> bool:
+    print("Test 4.63: NLP fallback keeps first occurrences in order")
+    if get_nlp() is None:
+        print("SKIP: spaCy model not available")
+        return True
+    text = "\n".join(["1. No spam.", "2. Be respectful.", "3. No spam.", "4. Do not harass.", "5. Be respectful."] * 50)
+    clauses = [clause for clause, _ in _parse_clause_spans(text)]
+    if len(clauses) != len(set(clauses)):
+        print(f"FAIL: Duplicate clauses {clauses}")
+        return False
+    order = [clause for clause in ("No spam.", "Be respectful.", "Do not harass.") if clause in clauses]
+    if [clause for clause in clauses if clause in order] != order:
+        print(f"FAIL: Clause order changed {clauses}")
+        return False
+    print("PASS: Duplicates removed, order preserved")
+    return True
+
+
+def main() -> int:
+    print("=" * 70)
+    print("Step 4 - Parse Scaling Tests")
+    print("=" * 70)
+    tests = [
+        test_regex_matches_reference(),
+        test_linear_scaling(),
+        test_nlp_fallback_dedupe(),
+    ]
+    if all(tests):
+        print("\nALL TESTS PASSED")
+        return 0
+    print("\nTESTS FAILED")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Tests for retrieval-narrowed adjudication prompts.
+
+Covers:
+- The local scorer picks the relevant rules out of a large rulebook
+- Only the top-k rules are sent, with a token savings report
+- Citations outside the sent rules (or misquoted) are rejected
+- The async adjudicator sends the same narrowed prompt, and sees in-place rulebook edits
+- The rule index and full-prompt size are built once per rulebook
+"""
+
+import asyncio
+import copy
+import json
+import sys
+from types import SimpleNamespace
+from unittest import mock
+
+import normalizer
+from citation_checker import RuleIndex
+from llm_adjudication import AsyncDisputeAdjudicator
+
+
+FILLER_TOPICS = ["gardening", "cooking", "travel", "music", "movies", "sports", "books", "cars"]
+
+RULES_JSON = {
+    "rules": [
+        {"id": f"rule_{i:03d}", "text": f"Keep {FILLER_TOPICS[i % 8]} threads tidy and follow thread guideline {i}.",
+         "category": "general", "keywords": []}
+        for i in range(1, 401)
+    ] + [
+        {"id": "rule_401", "text": "Do not share personal information such as home addresses.",
+         "category": "doxxing", "keywords": ["address", "where you live"]},
+        {"id": "rule_402", "text": "No spam or promotional content.", "category": "spam", "keywords": ["spam"]},
+    ]
+}
+
+COMMENT = "I know where you live, your home address is 42 Wallaby Way."
+
+
+class FakeClient:
+    """Stands in for openai.OpenAI; ``answer(system_prompt, comment)`` builds the reply."""
+
+    def __init__(self, answer):
+        self.prompts = []
+        self._answer = answer
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, model, messages, response_format):
+        self.prompts.append(messages[0]["content"])
+        content = json.dumps(self._answer(messages[0]["content"], messages[1]["content"]))
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+class FakeAsyncClient(FakeClient):
+    async def _async_create(self, **kwargs):
+        return self._create(**kwargs)
+
+    def __init__(self, answer):
+        super().__init__(answer)
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._async_create))
+
+
+def _cite(rule_id, quote):
+    def answer(system_prompt, comment):
+        return {
+            "verdict": "Violation",
+            "citation_anchor": {"rule_id": rule_id, "quoted_rule_text": quote},
+            "reasoning": "Shares a home address.",
+            "confidence": 0.9,
+        }
+    return answer
+
+
+def _with_client(client, run):
+    saved = normalizer.client, normalizer.response_cache
+    normalizer.client = client
+    normalizer.set_response_cache(None)
+    try:
+        return run()
+    finally:
+        normalizer.client, normalizer.response_cache = saved
+
+
+def test_candidate_retrieval() -> bool:
+    print("Test 4.79: Relevant rules retrieved from a large rulebook")
+    index = RuleIndex(RULES_JSON)
+    sent = normalizer.retrieve_candidate_rules(COMMENT, RULES_JSON, 5, index)
+    ids = [rule["id"] for rule in sent["rules"]]
+    if len(ids) != 5 or "rule_401" not in ids:
+        print(f"FAIL: Unexpected candidates {ids}")
+        return False
+    if ids != sorted(ids):
+        print("FAIL: Candidates not in rulebook order")
+        return False
+    if sent != normalizer.retrieve_candidate_rules(COMMENT, RULES_JSON, 5):
+        print("FAIL: Prebuilt index changed the candidates")
+        return False
+    small = {"rules": RULES_JSON["rules"][-2:]}
+    if normalizer.retrieve_candidate_rules(COMMENT, small, 5) != small:
+        print("FAIL: Small rulebooks should be sent whole")
+        return False
+    if len(normalizer.retrieve_candidate_rules("", RULES_JSON, 3)["rules"]) != 3:
+        print("FAIL: Empty comment should still get top_k rules")
+        return False
+    print(f"PASS: Candidates {ids}")
+    return True
+
+
+def test_narrowed_prompt_savings() -> bool:
+    print("Test 4.80: Narrowed prompt and token savings report")
+    quote = "Do not share personal information such as home addresses."
+    client = FakeClient(_cite("rule_401", quote))
+    verdict = _with_client(client, lambda: normalizer.adjudicate_dispute(COMMENT, RULES_JSON, top_k=5))
+    prompt = client.prompts[0]
+    if prompt.count('"id": "rule_') != 5 or "rule_401" not in prompt:
+        print("FAIL: Prompt does not hold exactly the 5 candidate rules")
+        return False
+    if verdict["verdict"] != "Violation" or verdict["citation_anchor"]["rule_id"] != "rule_401":
+        print(f"FAIL: Anchored verdict rejected: {verdict}")
+        return False
+    report = verdict["retrieval"]
+    if (report["rules_sent"], report["rules_total"]) != (5, 402) or report["savings"] < 0.9:
+        print(f"FAIL: Unexpected report {report}")
+        return False
+    if report["full_prompt_tokens"] - report["prompt_tokens"] != report["tokens_saved"]:
+        print("FAIL: Inconsistent token report")
+        return False
+    full = FakeClient(_cite("rule_401", quote))
+    _with_client(full, lambda: normalizer.adjudicate_dispute(COMMENT, RULES_JSON))
+    if normalizer.estimate_tokens(full.prompts[0], COMMENT) != report["full_prompt_tokens"]:
+        print("FAIL: Full prompt estimate does not match the unnarrowed request")
+        return False
+    print(f"PASS: {report['tokens_saved']} of {report['full_prompt_tokens']} prompt tokens saved")
+    return True
+
+
+def test_citation_anchoring_enforced() -> bool:
+    print("Test 4.81: Citations must come from the rules sent")
+    cases = [
+        (_cite("rule_402", "No spam or promotional content."), False),  # real rule, not sent
+        (_cite("rule_401", "Doxxing is strictly forbidden."), False),  # misquoted
+        (_cite("rule_999", "Do not share personal information"), False),  # unknown rule
+        (_cite("rule_401", "share personal   information such as HOME addresses"), True),
+    ]
+    for answer, anchored in cases:
+        verdict = _with_client(FakeClient(answer),
+                               lambda: normalizer.adjudicate_dispute(COMMENT, RULES_JSON, top_k=5))
+        if (verdict["verdict"] == "Violation") != anchored:
+            print(f"FAIL: Unexpected verdict {verdict}")
+            return False
+        if not anchored and ("UNANCHORED_CITATION" not in verdict["flags"] or verdict["citation_anchor"]):
+            print(f"FAIL: Rejected citation not flagged: {verdict}")
+            return False
+    no_violation = {"verdict": "No Violation", "citation_anchor": None}
+    if normalizer.check_citation(no_violation, RULES_JSON) is not no_violation:
+        print("FAIL: No Violation verdicts should pass through")
+        return False
+    print("PASS: Unanchored citations downgraded")
+    return True
+
+
+def test_async_narrowed_prompts() -> bool:
+    print("Test 4.82: Async adjudicator sends the same narrowed prompt")
+    quote = "Do not share personal information such as home addresses."
+    sync_client = FakeClient(_cite("rule_401", quote))
+    expected = _with_client(sync_client, lambda: normalizer.adjudicate_dispute(COMMENT, RULES_JSON, top_k=5))
+    async_client = FakeAsyncClient(_cite("rule_402", "No spam or promotional content."))
+    adjudicator = AsyncDisputeAdjudicator(async_client, top_k=5, requests_per_minute=None, tokens_per_minute=None)
+    comments = [COMMENT] * 3
+
+    def run():
+        return asyncio.run(adjudicator.adjudicate_many((comment, RULES_JSON) for comment in comments))
+
+    normalizer._rulebook_states.clear()
+    with mock.patch("citation_checker.RuleIndex", wraps=RuleIndex) as built:
+        verdicts = _with_client(None, run)
+    if async_client.prompts != sync_client.prompts * 3:
+        print("FAIL: Async prompts differ from adjudicate_dispute")
+        return False
+    if any(v["verdict"] != "No Violation" or v["retrieval"] != expected["retrieval"] for v in verdicts):
+        print("FAIL: Async verdicts not checked against the sent rules")
+        return False
+    if built.call_count != 1:
+        print(f"FAIL: Rule index built {built.call_count} times for one rulebook")
+        return False
+
+    edited = copy.deepcopy(RULES_JSON)
+    lottery = "Do not run lottery or raffle giveaways."
+
+    async def run_edited():
+        first = await adjudicator.adjudicate("win the lottery raffle", edited)
+        edited["rules"].append({"id": "rule_403", "text": lottery, "category": "spam", "keywords": ["lottery"]})
+        return first, await adjudicator.adjudicate("win the lottery raffle", edited)
+
+    adjudicator = AsyncDisputeAdjudicator(async_client, top_k=5, requests_per_minute=None, tokens_per_minute=None)
+    before, after = _with_client(None, lambda: asyncio.run(run_edited()))
+    if (before["retrieval"]["rules_total"], after["retrieval"]["rules_total"]) != (402, 403) \
+            or lottery not in async_client.prompts[-1]:
+        print("FAIL: Rulebook edited in place served a stale index")
+        return False
+    print("PASS: Same prompts, citations checked, edits picked up")
+    return True
+
+
+def test_rulebook_state_cached() -> bool:
+    print("Test 4.91: Rule index and full prompt built once per rulebook")
+    quote = "Do not share personal information such as home addresses."
+    normalizer._rulebook_states.clear()
+    full_prompts = []
+    real_prompt = normalizer.adjudication_prompt
+
+    def counting_prompt(rules_json):
+        if len(rules_json["rules"]) == len(RULES_JSON["rules"]):
+            full_prompts.append(1)
+        return real_prompt(rules_json)
+
+    def run():
+        return [normalizer.adjudicate_dispute(comment, RULES_JSON, top_k=5) for comment in
+                (COMMENT, "Spam spam spam, buy now!", COMMENT)]
+
+    with mock.patch("citation_checker.RuleIndex", wraps=RuleIndex) as built, \
+            mock.patch("normalizer.adjudication_prompt", side_effect=counting_prompt):
+        verdicts = _with_client(FakeClient(_cite("rule_401", quote)), run)
+        copied = copy.deepcopy(RULES_JSON)
+        copied_report = normalizer.retrieval_report(copied, {"rules": []}, "", COMMENT)
+    if built.call_count != 1 or len(full_prompts) != 1:
+        print(f"FAIL: {built.call_count} indexes and {len(full_prompts)} full prompts for one rulebook")
+        return False
+    if copied_report["full_prompt_tokens"] != verdicts[0]["retrieval"]["full_prompt_tokens"]:
+        print("FAIL: Equal rulebook did not reuse the cached prompt size")
+        return False
+    changed = copy.deepcopy(RULES_JSON)
+    changed["rules"][0]["text"] += " Extra words change the rulebook."
+    if normalizer.retrieval_report(changed, {"rules": []}, "", COMMENT)["full_prompt_tokens"] \
+            == copied_report["full_prompt_tokens"]:
+        print("FAIL: Changed rulebook served a stale prompt size")
+        return False
+    print("PASS: One index and one full prompt for three disputes")
+    return True
+
+
+def main() -> int:
+    print("=" * 70)
+    print("Step 4 - Retrieval-Narrowed Prompt Tests")
+    print("=" * 70)
+    tests = [
+        test_candidate_retrieval(),
+        test_narrowed_prompt_savings(),
+        test_citation_anchoring_enforced(),
+        test_async_narrowed_prompts(),
+        test_rulebook_state_cached(),
+    ]
+    if all(tests):
+        print("\nALL TESTS PASSED")
+        return 0
+    print("\nTESTS FAILED")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
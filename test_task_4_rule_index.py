@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Tests for the compiled, reusable RuleIndex in citation_checker.
+
+Covers:
+- Verdict parity between a raw rules dict and a prebuilt RuleIndex
+- Reuse of one index across many comments
+- Degenerate rulebooks (no rules, stop-word only rule texts)
+"""
+
+import sys
+
+from citation_checker import RuleIndex, adjudicate_comment
+
+
+RULES_JSON = {
+    "rules": [
+        {
+            "id": "rule_001",
+            "text": "No harassment or bullying.",
+            "category": "harassment",
+            "keywords": ["harassment", "bullying", "idiot", "loser"],
+        },
+        {
+            "id": "rule_002",
+            "text": "No spam or promotional content.",
+            "category": "spam",
+            "keywords": ["spam", "promotional", "discount", "promo"],
+        },
+        {
+            "id": "rule_003",
+            "text": "Do not share personal information about others.",
+            "category": "doxxing",
+            "keywords": [],
+        },
+    ]
+}
+
+COMMENTS = [
+    "This is spam. Use my promo code for a discount.",
+    "You're such an idiot and a loser.",
+    "I will share personal information about others here.",
+    "I disagree with your technical analysis.",
+    "",
+]
+
+
+def test_index_matches_dict() -> bool:
+    print("Test 4.1: RuleIndex verdicts match raw rules dict")
+    index = RuleIndex(RULES_JSON)
+    for comment in COMMENTS:
+        from_dict = adjudicate_comment(comment, RULES_JSON, exact_threshold=0.2)
+        from_index = adjudicate_comment(comment, index, exact_threshold=0.2)
+        if from_dict != from_index:
+            print(f"FAIL: Verdict mismatch for {comment!r}")
+            return False
+    print("PASS: RuleIndex verdicts match")
+    return True
+
+
+def test_index_reuse() -> bool:
+    print("Test 4.2: One RuleIndex reused across comments")
+    index = RuleIndex(RULES_JSON)
+    first = adjudicate_comment(COMMENTS[0], index, exact_threshold=0.2)
+    for comment in COMMENTS[1:]:
+        adjudicate_comment(comment, index)
+    again = adjudicate_comment(COMMENTS[0], index, exact_threshold=0.2)
+    if first != again:
+        print("FAIL: Index state changed between comments")
+        return False
+    if (first.get("citation_anchor") or {}).get("rule_id") != "rule_002":
+        print("FAIL: Expected spam rule to be cited")
+        return False
+    print("PASS: RuleIndex is reusable")
+    return True
+
+
+def test_semantic_scores_bounded() -> bool:
+    print("Test 4.3: Semantic scores are cosine similarities")
+    index = RuleIndex(RULES_JSON)
+    scores = index.semantic_scores("No spam or promotional content.")
+    if len(scores) != len(RULES_JSON["rules"]):
+        print("FAIL: One score expected per rule")
+        return False
+    if any(score < 0.0 or score > 1.0 + 1e-9 for score in scores):
+        print(f"FAIL: Scores out of range: {scores}")
+        return False
+    if max(range(len(scores)), key=scores.__getitem__) != 1:
+        print("FAIL: Identical text should score highest")
+        return False
+    print("PASS: Semantic scores bounded")
+    return True
+
+
+def test_degenerate_rulebooks() -> bool:
+    print("Test 4.4: Degenerate rulebooks")
+    result = adjudicate_comment("Hello", RuleIndex(None))
+    if "NO_RULES" not in result.get("flags", []):
+        print("FAIL: Expected NO_RULES for empty index")
+        return False
+    index = RuleIndex({"rules": [{"id": "r1", "text": "a", "keywords": []}]})
+    result = adjudicate_comment("Hello there", index)
+    if result.get("verdict") != "No Violation":
+        print("FAIL: Stop-word only rulebook should not produce a violation")
+        return False
+    print("PASS: Degenerate rulebooks handled")
+    return True
+
+
+def main() -> int:
+    print("=" * 70)
+    print("Step 4 - RuleIndex Tests")
+    print("=" * 70)
+    tests = [
+        test_index_matches_dict(),
+        test_index_reuse(),
+        test_semantic_scores_bounded(),
+        test_degenerate_rulebooks(),
+    ]
+    if all(tests):
+        print("\nALL TESTS PASSED")
+        return 0
+    print("\nTESTS FAILED")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Tests for the module-level rule vocabularies in the normalizer.
+
+Covers:
+- categorize_rule keeps its first-match category priority (reference comparison)
+- _is_likely_rule keyword detection matches the original indicator scan
+- Benchmark of categorization on a large rulebook
+"""
+
+import random
+import sys
+import time
+
+try:
+    from hypothesis import given, strategies as st, settings
+    HYPOTHESIS_AVAILABLE = True
+except ImportError:
+    HYPOTHESIS_AVAILABLE = False
+
+from normalizer import CATEGORY_KEYWORDS, RULE_INDICATORS, _is_likely_rule, categorize_rule
+
+
+def _reference_categorize(rule_text: str) -> str:
+    """categorize_rule as originally written: patterns rebuilt on every call."""
+    text_lower = rule_text.lower()
+    category_patterns = {
+        "hate_speech": ["hate speech", "hate", "discriminat", "racist", "sexist", "slur", "bigot"],
+        "harassment": ["harass", "bully", "intimidat", "threaten", "stalk", "abuse"],
+        "doxxing": ["doxx", "personal information", "private information", "address", "phone number", "real name"],
+        "spam": ["spam", "promotional", "advertis", "self-promotion", "commercial"],
+        "violence": ["violence", "violent", "harm", "attack", "assault", "threat"],
+        "nsfw": ["nsfw", "explicit", "sexual", "pornograph", "adult content", "nudity"],
+        "misinformation": ["misinformation", "false information", "fake news", "misleading"],
+        "relevance": ["relevant", "on topic", "off topic", "community topic", "subject matter"],
+        "respect": ["respect", "polite", "civil", "courteous", "kind"],
+        "conduct": ["conduct", "behavior", "behave", "appropriate", "inappropriate"],
+    }
+    for category, keywords in category_patterns.items():
+        for keyword in keywords:
+            if keyword in text_lower:
+                return category
+    return "general"
+
+
+def _reference_is_rule(text: str) -> bool:
+    text_lower = text.lower()
+    rule_indicators = [
+        'must', 'should', 'cannot', "can't", "don't", 'do not',
+        'never', 'always', 'prohibited', 'allowed', 'required',
+        'no ', 'not ', 'please', 'be ', 'keep', 'avoid',
+        'shall', 'will not', "won't", 'forbidden', 'banned',
+        'ensure', 'make sure', 'refrain', 'respect', 'report'
+    ]
+    intro_phrases = ['welcome', 'introduction', 'about us', 'overview', 'thank you']
+    if any(phrase in text_lower for phrase in intro_phrases):
+        return False
+    return any(indicator in text_lower for indicator in rule_indicators)
+
+
+_FRAGMENTS = [keyword for _, keywords in CATEGORY_KEYWORDS for keyword in keywords]
+_FRAGMENTS += list(RULE_INDICATORS) + ["Welcome", "THREATENING", "the", "users", "mankind", "x"]
+
+
+def _random_rule(rng: random.Random) -> str:
+    return " ".join(rng.choice(_FRAGMENTS) for _ in range(rng.randint(0, 8)))
+
+
+def test_category_priority() -> bool:
+    print("Test 4.41: categorize_rule matches the reference priority order")
+    rng = random.Random(14)
+    samples = [_random_rule(rng) for _ in range(5000)] + [
+        "Do not threaten people",  # harassment wins over violence ("threat")
+        "No hate speech or violent threats",
+        "Be kind and stay on topic",
+        "",
+    ]
+    for text in samples:
+        if categorize_rule(text) != _reference_categorize(text):
+            print(f"FAIL: {text!r}: {categorize_rule(text)} != {_reference_categorize(text)}")
+            return False
+    print(f"PASS: {len(samples)} rules categorized identically")
+    return True
+
+
+def test_rule_indicators() -> bool:
+    print("Test 4.42: _is_likely_rule keyword detection unchanged")
+    rng = random.Random(15)
+    for text in (_random_rule(rng) for _ in range(5000)):
+        if _is_likely_rule(text) != _reference_is_rule(text):
+            print(f"FAIL: {text!r}")
+            return False
+    print("PASS: Indicator detection identical")
+    return True
+
+
+def test_category_property() -> bool:
+    print("Test 4.43: Property - categorization equivalent on arbitrary text")
+    if not HYPOTHESIS_AVAILABLE:
+        print("SKIP: hypothesis not installed")
+        return True
+
+    failures = []
+
+    @settings(max_examples=300, deadline=None)
+    @given(st.lists(st.one_of(st.sampled_from(_FRAGMENTS), st.text(max_size=8)), max_size=10))
+    def _check(parts):
+        text = " ".join(parts)
+        if categorize_rule(text) != _reference_categorize(text):
+            failures.append(text)
+
+    _check()
+    if failures:
+        print(f"FAIL: {failures[0]!r}")
+        return False
+    print("PASS: Equivalent on generated text")
+    return True
+
+
+def test_categorize_benchmark() -> bool:
+    print("Test 4.44: Categorization benchmark (50,000 rules)")
+    rng = random.Random(16)
+    rules = [_random_rule(rng) for _ in range(50000)]
+    start = time.perf_counter()
+    expected = [_reference_categorize(rule) for rule in rules]
+    reference_time = time.perf_counter() - start
+    start = time.perf_counter()
+    actual = [categorize_rule(rule) for rule in rules]
+    current_time = time.perf_counter() - start
+    if actual != expected:
+        print("FAIL: Benchmark categories differ")
+        return False
+    print(f"Reference: {reference_time:.3f}s, module vocabularies: {current_time:.3f}s "
+          f"({reference_time / current_time:.2f}x)")
+    print("PASS: Benchmark completed")
+    return True
+
+
+def main() -> int:
+    print("=" * 70)
+    print("Step 4 - Rule Vocabulary Tests")
+    print("=" * 70)
+    tests = [
+        test_category_priority(),
+        test_rule_indicators(),
+        test_category_property(),
+        test_categorize_benchmark(),
+    ]
+    if all(tests):
+        print("\nALL TESTS PASSED")
+        return 0
+    print("\nTESTS FAILED")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
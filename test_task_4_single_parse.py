@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Tests for single-parse rule enrichment in the normalizer.
+
+Covers:
+- Keywords and categories from normalize_rules_to_json match format_rules_json
+- linguistic_features adds lemmas and noun chunks on the NLP path
+- linguistic_features is a no-op on the regex path
+- With span_keywords, keywords come from the clause spans of a single parse
+  (fake pipeline, no model)
+- Default keywords match extract_keywords on the example rulebooks
+"""
+
+import os
+import sys
+
+import spacy
+from spacy.tokens import Doc
+
+import normalizer
+from normalizer import (
+    SPACY_AVAILABLE,
+    extract_keywords,
+    format_rules_json,
+    get_nlp,
+    normalize_rules_to_json,
+    parse_rule_clauses,
+)
+
+
+def _reddit_text() -> str:
+    path = os.path.join(os.path.dirname(__file__), "examples", "reddit_rules.txt")
+    with open(path, "r", encoding="utf-8") as handle:
+        return handle.read()
+
+
+def test_enrichment_consistent() -> bool:
+    print("Test 4.38: Enriched rules agree with format_rules_json")
+    text = _reddit_text()
+    result = normalize_rules_to_json(text)
+    reference = format_rules_json(parse_rule_clauses(text))
+    texts = [rule["text"] for rule in result["rules"]]
+    if texts != [rule["text"] for rule in reference["rules"]]:
+        print("FAIL: Clauses differ")
+        return False
+    if [rule["category"] for rule in result["rules"]] != [rule["category"] for rule in reference["rules"]]:
+        print("FAIL: Categories differ")
+        return False
+    if any(not isinstance(rule["keywords"], list) or len(rule["keywords"]) > 5 for rule in result["rules"]):
+        print("FAIL: Keywords malformed")
+        return False
+    print(f"PASS: {len(texts)} rules enriched consistently")
+    return True
+
+
+def test_linguistic_features() -> bool:
+    print("Test 4.39: linguistic_features output")
+    text = _reddit_text()
+    result = normalize_rules_to_json(text, linguistic_features=True)
+    if get_nlp() is None:
+        if result != normalize_rules_to_json(text):
+            print("FAIL: Regex path output changed")
+            return False
+        print("PASS: Regex path unchanged (spaCy model not available)")
+        return True
+    for rule in result["rules"]:
+        if not isinstance(rule.get("lemmas"), list) or not isinstance(rule.get("noun_chunks"), list):
+            print(f"FAIL: Missing linguistic features in {rule}")
+            return False
+    if not any(rule["noun_chunks"] for rule in result["rules"]):
+        print("FAIL: No noun chunks found")
+        return False
+    print("PASS: Lemmas and noun chunks attached")
+    return True
+
+
+def test_default_output_has_no_extras() -> bool:
+    print("Test 4.40: Default output keeps the rule schema")
+    result = normalize_rules_to_json(_reddit_text())
+    keys = {key for rule in result["rules"] for key in rule}
+    if keys != {"id", "text", "category", "keywords"}:
+        print(f"FAIL: Unexpected keys {keys} (spaCy {SPACY_AVAILABLE})")
+        return False
+    print("PASS: Schema unchanged by default")
+    return True
+
+
+class FakePipeline:
+    """
+    Stands in for the spaCy model: returns a hand-annotated parse of one
+    known text, so the span-based code paths run without a model installed.
+    """
+
+    # word, trailing space, POS, tag, dependency, head index
+    TOKENS = [
+        ("Do", True, "AUX", "VB", "aux", 2),
+        ("not", True, "PART", "RB", "neg", 2),
+        ("post", True, "VERB", "VB", "ROOT", 2),
+        ("personal", True, "ADJ", "JJ", "amod", 4),
+        ("information", False, "NOUN", "NN", "dobj", 2),
+        (".", True, "PUNCT", ".", "punct", 2),
+        ("Users", True, "NOUN", "NNS", "nsubj", 8),
+        ("must", True, "AUX", "MD", "aux", 8),
+        ("avoid", True, "VERB", "VB", "ROOT", 8),
+        ("spam", True, "NOUN", "NN", "compound", 10),
+        ("links", False, "NOUN", "NNS", "dobj", 8),
+        (".", False, "PUNCT", ".", "punct", 8),
+    ]
+    TEXT = "Do not post personal information. Users must avoid spam links."
+
+    def __init__(self):
+        self.vocab = spacy.blank("en").vocab
+        self.disabled = []
+        self.calls = 0
+        self.piped = []
+
+    def __call__(self, text):
+        assert text == self.TEXT, text
+        self.calls += 1
+        words, spaces, pos, tags, deps, heads = zip(*self.TOKENS)
+        return Doc(self.vocab, words=list(words), spaces=list(spaces), pos=list(pos), tags=list(tags),
+                   deps=list(deps), heads=list(heads))
+
+    def pipe(self, texts, **options):
+        # Re-tags keyword text word by word; a flat parse, so no noun chunks.
+        tags = {word.lower(): (pos, tag) for word, _, pos, tag, _, _ in self.TOKENS}
+        for text in texts:
+            self.piped.append(text)
+            words = text.split()
+            yield Doc(self.vocab, words=words, pos=[tags[word][0] for word in words],
+                      tags=[tags[word][1] for word in words], deps=["dep"] * len(words),
+                      heads=list(range(len(words))))
+
+
+def test_keywords_from_clause_spans() -> bool:
+    print("Test 4.94: Keywords read from clause spans of one parse")
+    fake = FakePipeline()
+    saved = normalizer.nlp
+    normalizer.nlp = fake
+    try:
+        pairs = normalizer._parse_clause_spans(fake.TEXT)
+        keywords = [normalizer._keywords_from_span(span) for _, span in pairs]
+        fake.calls = 0
+        result = normalize_rules_to_json(fake.TEXT, linguistic_features=True, span_keywords=True)
+        span_calls, span_piped = fake.calls, list(fake.piped)
+        default = normalize_rules_to_json(fake.TEXT)
+    finally:
+        normalizer.nlp = saved
+    if [span.text for _, span in pairs] != ["Do not post personal information.", "Users must avoid spam links."]:
+        print(f"FAIL: Unexpected clause spans {pairs}")
+        return False
+    expected = [
+        ["post", "personal", "information", "personal information"],
+        ["users", "avoid", "spam", "links", "spam links"],
+    ]
+    if keywords != expected:
+        print(f"FAIL: Unexpected span keywords {keywords}")
+        return False
+    if [rule["keywords"] for rule in result["rules"]] != expected or span_calls != 1 or span_piped:
+        print(f"FAIL: Rules not enriched from one parse ({span_calls} calls): {result}")
+        return False
+    if fake.piped != ["do not post personal information", "users must avoid spam links"] \
+            or [rule["keywords"] for rule in default["rules"]] != [["post", "personal", "information"],
+                                                                  ["users", "avoid", "spam", "links"]]:
+        print(f"FAIL: Default keywords not re-tagged from the cleaned text: {fake.piped}, {default}")
+        return False
+    if [rule["noun_chunks"] for rule in result["rules"]] != [["personal information"], ["Users", "spam links"]]:
+        print(f"FAIL: Unexpected noun chunks {result}")
+        return False
+    print("PASS: Keywords lowercased from the clause parse, pipeline run once")
+    return True
+
+
+def test_default_keywords_match_extract_keywords() -> bool:
+    print("Test 4.97: Default keywords match extract_keywords")
+    examples = os.path.join(os.path.dirname(__file__), "examples")
+    checked = 0
+    for name in ("reddit_rules.txt", "discord_rules.txt", "twitter_rules.txt"):
+        with open(os.path.join(examples, name), "r", encoding="utf-8") as handle:
+            result = normalize_rules_to_json(handle.read())
+        for rule in result["rules"]:
+            if rule["keywords"] != extract_keywords(rule["text"]):
+                print(f"FAIL: {name} {rule['id']} keywords {rule['keywords']} != {extract_keywords(rule['text'])}")
+                return False
+            checked += 1
+    print(f"PASS: {checked} rules agree (spaCy {'on' if get_nlp() is not None else 'off'})")
+    return True
+
+
+def main() -> int:
+    print("=" * 70)
+    print("Step 4 - Single-Parse Enrichment Tests")
+    print("=" * 70)
+    tests = [
+        test_enrichment_consistent(),
+        test_linguistic_features(),
+        test_default_output_has_no_extras(),
+        test_keywords_from_clause_spans(),
+        test_default_keywords_match_extract_keywords(),
+    ]
+    if all(tests):
+        print("\nALL TESTS PASSED")
+        return 0
+    print("\nTESTS FAILED")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Tests for opt-in per-stage timing of adjudicate_comment.
+
+Covers:
+- Timings are attached to match_details and sent to a sink when enabled
+- Candidate counts reflect full scans and top-k short lists
+- Verdicts are unchanged, and nothing is recorded outside the context
+"""
+
+import sys
+
+from citation_checker import RuleIndex, adjudicate_comment, record_stage_timings
+
+
+RULES_JSON = {
+    "rules": [
+        {"id": "rule_001", "text": "No harassment or bullying.", "keywords": ["idiot", "loser"]},
+        {"id": "rule_002", "text": "No spam or promotional content.", "keywords": ["spam", "promo"]},
+        {"id": "rule_003", "text": "Stay on topic in discussion threads.", "keywords": []},
+        {"id": "rule_004", "text": "Do not share personal information.", "keywords": ["address"]},
+    ]
+}
+
+
+def test_timings_recorded() -> bool:
+    print("Test 4.29: Stage timings attached and sent to a sink")
+    index = RuleIndex(RULES_JSON)
+    records = []
+    with record_stage_timings(records.append, attach=True) as timings:
+        verdict = adjudicate_comment("You're such an idiot", index)
+        adjudicate_comment("Nice weather today", index)
+
+    if len(records) != 2 or timings.calls != 2:
+        print(f"FAIL: Expected 2 records, got {len(records)}")
+        return False
+    details = verdict.get("match_details", {})
+    if details.get("timings") != records[0]:
+        print("FAIL: Attached timings differ from the sink record")
+        return False
+    expected = {"index", "tokenize", "keyword_match", "exact_score", "semantic_score",
+                "assemble", "select", "verdict"}
+    stages = records[0]["stages_ns"]
+    if set(stages) != expected or any(not isinstance(ns, int) or ns < 0 for ns in stages.values()):
+        print(f"FAIL: Unexpected stages {stages}")
+        return False
+    if records[0]["total_ns"] != sum(stages.values()) or records[0]["candidates"] != 4:
+        print(f"FAIL: Unexpected totals {records[0]}")
+        return False
+    if set(timings.summary()["mean_stage_ns"]) != expected:
+        print("FAIL: Summary does not cover every stage")
+        return False
+    print("PASS: Timings recorded per stage")
+    return True
+
+
+def test_top_k_candidates() -> bool:
+    print("Test 4.30: Candidate counts reflect the top-k short list")
+    index = RuleIndex(RULES_JSON)
+    records = []
+    with record_stage_timings(records.append):
+        verdict = adjudicate_comment("Stay on topic please", index, top_k=1)
+    record = records[0]
+    if "candidate_selection" not in record["stages_ns"] or record["candidates"] != 1:
+        print(f"FAIL: Unexpected top-k record {record}")
+        return False
+    if "timings" in verdict.get("match_details", {}):
+        print("FAIL: Timings attached without attach=True")
+        return False
+    print("PASS: Top-k candidate count recorded")
+    return True
+
+
+def test_disabled_by_default() -> bool:
+    print("Test 4.31: No timings outside the context; verdicts unchanged")
+    index = RuleIndex(RULES_JSON)
+    comments = ["You're such an idiot", "spam promo", "Here is his address", "", "hello"]
+    plain = [adjudicate_comment(comment, index) for comment in comments]
+    with record_stage_timings() as timings:
+        timed = [adjudicate_comment(comment, index) for comment in comments]
+    after = adjudicate_comment(comments[0], index)
+    if plain != timed or "timings" in after.get("match_details", {}):
+        print("FAIL: Timing changed verdicts or leaked outside the context")
+        return False
+    if timings.calls != len(comments):
+        print(f"FAIL: Expected {len(comments)} calls, got {timings.calls}")
+        return False
+    print("PASS: Timing is opt-in and verdict-neutral")
+    return True
+
+
+def main() -> int:
+    print("=" * 70)
+    print("Step 4 - Stage Timing Tests")
+    print("=" * 70)
+    tests = [test_timings_recorded(), test_top_k_candidates(), test_disabled_by_default()]
+    if all(tests):
+        print("\nALL TESTS PASSED")
+        return 0
+    print("\nTESTS FAILED")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
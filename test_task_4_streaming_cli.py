@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Tests for the streaming NDJSON bulk mode of citation_checker.
+
+Covers:
+- Plain-text and JSON record input, ids and order preserved
+- Verdicts identical to adjudicate_comment
+- CLI reading stdin, writing NDJSON and a throughput summary
+"""
+
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from citation_checker import LatencyHistogram, adjudicate_comment, adjudicate_stream
+
+
+RULES_JSON = {
+    "rules": [
+        {"id": "rule_001", "text": "No harassment or bullying.", "keywords": ["idiot", "loser"]},
+        {"id": "rule_002", "text": "No spam or promotional content.", "keywords": ["spam", "promo"]},
+    ]
+}
+
+INPUT_LINES = [
+    "You're such an idiot",
+    "",
+    json.dumps({"id": "c-42", "comment": "Buy now, this is spam with a promo"}),
+    json.dumps({"text": "Nice weather today"}),
+    "{not json but still a comment",
+]
+
+
+def test_stream_output() -> bool:
+    print("Test 4.16: Streaming adjudication output")
+    sink = io.StringIO()
+    summary = adjudicate_stream(INPUT_LINES, RULES_JSON, sink, batch_size=2)
+    records = [json.loads(line) for line in sink.getvalue().splitlines()]
+    if [record["comment_id"] for record in records] != [1, "c-42", 4, 5]:
+        print(f"FAIL: Unexpected ids {[record['comment_id'] for record in records]}")
+        return False
+    comments = [
+        "You're such an idiot",
+        "Buy now, this is spam with a promo",
+        "Nice weather today",
+        "{not json but still a comment",
+    ]
+    for record, comment in zip(records, comments):
+        record.pop("comment_id")
+        if record != adjudicate_comment(comment, RULES_JSON):
+            print(f"FAIL: Verdict mismatch for {comment!r}")
+            return False
+    if summary["comments"] != 4 or summary["violations"] != 2 or summary["batches"] != 2:
+        print(f"FAIL: Unexpected summary {summary}")
+        return False
+    print("PASS: Streaming output matches single verdicts")
+    return True
+
+
+def test_latency_histogram() -> bool:
+    print("Test 4.17: Latency percentiles")
+    histogram = LatencyHistogram()
+    for millis in range(1, 101):
+        histogram.record(millis / 1000)
+    p50 = histogram.percentile(0.50) * 1000
+    p99 = histogram.percentile(0.99) * 1000
+    if not (49 <= p50 <= 52 and 98 <= p99 <= 102):
+        print(f"FAIL: Percentiles off: p50={p50:.2f} p99={p99:.2f}")
+        return False
+    print("PASS: Percentiles within bucket error")
+    return True
+
+
+def test_cli_stdin() -> bool:
+    print("Test 4.18: CLI bulk mode from stdin")
+    repo_root = os.path.dirname(os.path.abspath(__file__))
+    with tempfile.TemporaryDirectory() as workdir:
+        rules_path = os.path.join(workdir, "rules.json")
+        output_path = os.path.join(workdir, "verdicts.ndjson")
+        with open(rules_path, "w", encoding="utf-8") as handle:
+            json.dump(RULES_JSON, handle)
+        completed = subprocess.run(
+            [
+                sys.executable,
+                os.path.join(repo_root, "citation_checker.py"),
+                "--rules-json", rules_path,
+                "--comments-file", "-",
+                "--output", output_path,
+            ],
+            input="\n".join(INPUT_LINES) + "\n",
+            capture_output=True,
+            text=True,
+            cwd=repo_root,
+        )
+        if completed.returncode != 0:
+            print(f"FAIL: CLI exited with {completed.returncode}: {completed.stderr}")
+            return False
+        with open(output_path, "r", encoding="utf-8") as handle:
+            lines = handle.read().splitlines()
+        if len(lines) != 4:
+            print(f"FAIL: Expected 4 NDJSON lines, got {len(lines)}")
+            return False
+        if "comments/sec" not in completed.stderr or "p99" not in completed.stderr:
+            print("FAIL: Missing throughput summary")
+            return False
+    print("PASS: CLI bulk mode")
+    return True
+
+
+def main() -> int:
+    print("=" * 70)
+    print("Step 4 - Streaming CLI Tests")
+    print("=" * 70)
+    tests = [test_stream_output(), test_latency_histogram(), test_cli_stdin()]
+    if all(tests):
+        print("\nALL TESTS PASSED")
+        return 0
+    print("\nTESTS FAILED")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
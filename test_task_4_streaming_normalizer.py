@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Tests for the streaming normalizer.
+
+Covers:
+- Small documents stream the same rules as normalize_rules_to_json
+- Chunks stay under the size limit and end on section boundaries
+- Mixed line lengths never push a chunk over the limit
+- Multi-megabyte documents stream to NDJSON/JSON with bounded memory
+"""
+
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import tracemalloc
+
+from normalizer import (
+    _iter_text_chunks,
+    iter_normalized_rules,
+    normalize_rules_file,
+    normalize_rules_to_json,
+    write_rules_stream,
+)
+
+
+def _large_document(sections: int, headings: bool = True) -> str:
+    parts = []
+    for section in range(sections):
+        if headings:
+            parts.append(f"## Section {section}\n")
+        parts.append("\n")
+        parts.extend(
+            f"{item}. Users must not post spam or affiliate links in thread {section}-{item}\n"
+            for item in range(1, 41)
+        )
+        parts.append("\n")
+    return "".join(parts)
+
+
+def test_small_documents_match() -> bool:
+    print("Test 4.49: Streaming matches normalize_rules_to_json on small documents")
+    examples_dir = os.path.join(os.path.dirname(__file__), "examples")
+    for name in sorted(os.listdir(examples_dir)):
+        path = os.path.join(examples_dir, name)
+        with open(path, "r", encoding="utf-8") as handle:
+            text = handle.read()
+        expected = normalize_rules_to_json(text)["rules"]
+        if list(iter_normalized_rules(path)) != expected:
+            print(f"FAIL: Streamed rules differ for {name}")
+            return False
+        if list(iter_normalized_rules(io.StringIO(text))) != expected:
+            print(f"FAIL: Streamed rules from a stream differ for {name}")
+            return False
+    print("PASS: Identical rules for bundled examples")
+    return True
+
+
+def test_chunk_boundaries() -> bool:
+    print("Test 4.50: Chunks are bounded and section-aligned")
+    text = _large_document(40)
+    chunks = list(_iter_text_chunks(io.StringIO(text), 4000))
+    if "".join(chunks) != text:
+        print("FAIL: Chunks do not reassemble the document")
+        return False
+    if max(len(chunk) for chunk in chunks) > 4000:
+        print("FAIL: Chunk exceeds the size limit")
+        return False
+    if not all(chunk.lstrip("\n").startswith("## Section") for chunk in chunks):
+        print("FAIL: Chunk does not start at a section")
+        return False
+    long_line = ["word " * 5000 + "\n"]
+    if max(len(chunk) for chunk in _iter_text_chunks(long_line, 1000)) > 1000:
+        print("FAIL: Long line not split")
+        return False
+    print(f"PASS: {len(chunks)} section-aligned chunks")
+    return True
+
+
+def test_mixed_line_lengths() -> bool:
+    print("Test 4.88: Chunks stay bounded with mixed line lengths")
+    text = "a" * 49 + "\n" + "\n" + "b" * 44 + "\n" + "c" * 59 + "\n"
+    chunks = list(_iter_text_chunks(io.StringIO(text), 100))
+    if "".join(chunks) != text or max(len(chunk) for chunk in chunks) > 100:
+        print(f"FAIL: Carried-over paragraph overflowed: {[len(chunk) for chunk in chunks]}")
+        return False
+    rng = random.Random(16)
+    for _ in range(300):
+        lines = [
+            "\n" if rng.random() < 0.2 else ("# Heading\n" if rng.random() < 0.1 else "x" * rng.randint(1, 99) + "\n")
+            for _ in range(rng.randint(1, 60))
+        ]
+        text = "".join(lines)
+        chunks = list(_iter_text_chunks(lines, 100))
+        if "".join(chunks) != text or max(len(chunk) for chunk in chunks) > 100:
+            print(f"FAIL: Chunk over the limit: {max(len(chunk) for chunk in chunks)}")
+            return False
+    print("PASS: 300 random documents chunked within the limit")
+    return True
+
+
+def _stream_file(sections: int, workdir: str):
+    text = _large_document(sections, headings=False)
+    input_path = os.path.join(workdir, f"tos_{sections}.txt")
+    output_path = os.path.join(workdir, f"rules_{sections}.ndjson")
+    with open(input_path, "w", encoding="utf-8") as handle:
+        handle.write(text)
+
+    tracemalloc.start()
+    count = normalize_rules_file(input_path, output_path, max_chunk_chars=20_000)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    with open(output_path, "r", encoding="utf-8") as handle:
+        rules = [json.loads(line) for line in handle]
+    return os.path.getsize(input_path), peak, count, rules
+
+
+def test_large_document_bounded_memory() -> bool:
+    print("Test 4.51: Multi-megabyte document streamed with bounded memory")
+    with tempfile.TemporaryDirectory() as workdir:
+        small_size, small_peak, _, _ = _stream_file(200, workdir)
+        size, peak, count, rules = _stream_file(800, workdir)
+
+    if count != 800 * 40 or len(rules) != count:
+        print(f"FAIL: Expected {800 * 40} rules, got {count}")
+        return False
+    if [rule["id"] for rule in rules[:2]] != ["rule_001", "rule_002"] or rules[-1]["id"] != f"rule_{count}":
+        print("FAIL: IDs are not sequential across chunks")
+        return False
+    if peak > small_peak * 1.25 or peak > size / 4:
+        print(f"FAIL: Peak memory grew to {peak / 1e6:.2f} MB "
+              f"({small_peak / 1e6:.2f} MB for a {small_size / size:.0%} document)")
+        return False
+    print(f"PASS: {count} rules from {size / 1e6:.1f} MB, peak {peak / 1e6:.2f} MB "
+          f"(vs {small_peak / 1e6:.2f} MB for {small_size / 1e6:.1f} MB)")
+    return True
+
+
+def test_json_sink() -> bool:
+    print("Test 4.52: JSON sink writes a complete rules document")
+    rules = list(iter_normalized_rules(io.StringIO(_large_document(3))))
+    output = io.StringIO()
+    write_rules_stream(iter(rules), output, fmt="json")
+    if json.loads(output.getvalue()) != {"rules": rules}:
+        print("FAIL: JSON document differs")
+        return False
+    empty = io.StringIO()
+    write_rules_stream([], empty, fmt="json")
+    if json.loads(empty.getvalue()) != {"rules": []}:
+        print("FAIL: Empty JSON document invalid")
+        return False
+    print("PASS: JSON sink output valid")
+    return True
+
+
+def main() -> int:
+    print("=" * 70)
+    print("Step 4 - Streaming Normalizer Tests")
+    print("=" * 70)
+    tests = [
+        test_small_documents_match(),
+        test_chunk_boundaries(),
+        test_mixed_line_lengths(),
+        test_large_document_bounded_memory(),
+        test_json_sink(),
+    ]
+    if all(tests):
+        print("\nALL TESTS PASSED")
+        return 0
+    print("\nTESTS FAILED")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
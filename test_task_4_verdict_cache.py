@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Tests for the LRU + TTL VerdictCache.
+
+Covers:
+- Repeated (normalized) comments are served from the cache
+- Rulebook edits change the key and bypass stale verdicts
+- LRU eviction, TTL expiry and counters
+- Batched lookups score each unseen comment once
+"""
+
+import sys
+
+from citation_checker import RuleIndex, adjudicate_comment
+from verdict_cache import VerdictCache
+
+
+RULES_JSON = {
+    "rules": [
+        {"id": "rule_001", "text": "No harassment or bullying.", "keywords": ["idiot", "loser"]},
+        {"id": "rule_002", "text": "No spam or promotional content.", "keywords": ["spam", "promo"]},
+    ]
+}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_hits_on_repeated_comments() -> bool:
+    print("Test 4.24: Repeated comments hit the cache")
+    cache = VerdictCache(max_entries=10)
+    index = RuleIndex(RULES_JSON)
+    first = cache.adjudicate("Buy my PROMO now", index)
+    second = cache.adjudicate("  buy my promo   now ", index)
+    if first != second or first != adjudicate_comment("Buy my PROMO now", index):
+        print("FAIL: Cached verdict differs")
+        return False
+    stats = cache.stats()
+    if (stats["hits"], stats["misses"]) != (1, 1):
+        print(f"FAIL: Unexpected counters {stats}")
+        return False
+    second["verdict"] = "tampered"
+    if cache.adjudicate("buy my promo now", index)["verdict"] == "tampered":
+        print("FAIL: Callers can mutate cached verdicts")
+        return False
+    print("PASS: Repeated comments served from cache")
+    return True
+
+
+def test_rulebook_change_invalidates() -> bool:
+    print("Test 4.25: Rulebook edits invalidate cached verdicts")
+    cache = VerdictCache()
+    comment = "Here is his home address"
+    before = cache.adjudicate(comment, RULES_JSON)
+    edited = {"rules": RULES_JSON["rules"] + [
+        {"id": "rule_003", "text": "No doxxing.", "keywords": ["address"]},
+    ]}
+    after = cache.adjudicate(comment, edited)
+    if before.get("verdict") != "No Violation" or after.get("verdict") != "Violation":
+        print("FAIL: Stale verdict served after a rulebook edit")
+        return False
+    if cache.make_key(comment, edited) != cache.make_key(comment, RuleIndex(edited)):
+        print("FAIL: Dict and RuleIndex fingerprints differ")
+        return False
+    print("PASS: Rulebook fingerprint scopes cache entries")
+    return True
+
+
+def test_eviction_and_ttl() -> bool:
+    print("Test 4.26: LRU eviction and TTL expiry")
+    clock = FakeClock()
+    cache = VerdictCache(max_entries=2, ttl_seconds=10, clock=clock)
+    index = RuleIndex(RULES_JSON)
+    for comment in ("spam one", "spam two", "spam one", "spam three"):
+        cache.adjudicate(comment, index)
+    if cache.get(cache.make_key("spam two", index)) is not None:
+        print("FAIL: Least recently used entry should be evicted")
+        return False
+    clock.now = 11.0
+    if cache.get(cache.make_key("spam three", index)) is not None:
+        print("FAIL: Expired entry should not be served")
+        return False
+    stats = cache.stats()
+    if stats["evictions"] != 1 or stats["expirations"] != 1:
+        print(f"FAIL: Unexpected counters {stats}")
+        return False
+    print("PASS: Eviction and expiry counted")
+    return True
+
+
+def test_adjudicate_many() -> bool:
+    print("Test 4.27: Batched lookups")
+    cache = VerdictCache()
+    index = RuleIndex(RULES_JSON)
+    comments = ["you idiot", "You idiot", "spam promo", "hello", "you idiot"]
+    results = cache.adjudicate_many(comments, index)
+    if results != [adjudicate_comment(comment, index) for comment in comments]:
+        print("FAIL: Batched cached verdicts differ")
+        return False
+    if len(cache) != 3:
+        print(f"FAIL: Expected 3 distinct entries, got {len(cache)}")
+        return False
+    cache.adjudicate_many(comments, index)
+    if cache.stats()["hits"] != 5:
+        print(f"FAIL: Second pass should be all hits: {cache.stats()}")
+        return False
+    print("PASS: Batched lookups deduplicated")
+    return True
+
+
+def main() -> int:
+    print("=" * 70)
+    print("Step 4 - Verdict Cache Tests")
+    print("=" * 70)
+    tests = [
+        test_hits_on_repeated_comments(),
+        test_rulebook_change_invalidates(),
+        test_eviction_and_ttl(),
+        test_adjudicate_many(),
+    ]
+    if all(tests):
+        print("\nALL TESTS PASSED")
+        return 0
+    print("\nTESTS FAILED")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
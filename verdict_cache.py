@@ -0,0 +1,170 @@
+"""
+Bounded verdict cache for repeated comments.
+
+Spam and brigading waves repeat the same comment text many times. The cache
+keys verdicts by the rulebook fingerprint (a stable hash of the rules JSON),
+the normalized comment text and the scoring options, so any change to the
+rulebook produces new keys and old verdicts are never served for it. Entries
+are evicted least-recently-used beyond ``max_entries`` and expire after
+``ttl_seconds``. Hit/miss/eviction counters are exposed through ``stats()``.
+"""
+
+import copy
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from citation_checker import (
+    RuleIndex,
+    _normalize_text,
+    adjudicate_comment,
+    adjudicate_comments,
+    rulebook_fingerprint,
+)
+
+
+CacheKey = Tuple[str, str, float, float, Optional[int]]
+
+
+class VerdictCache:
+    """
+    LRU + TTL cache in front of adjudicate_comment / adjudicate_comments.
+
+    Args:
+        max_entries: Maximum cached verdicts before LRU eviction.
+        ttl_seconds: Lifetime of an entry; ``None`` disables expiry.
+        clock: Monotonic time source (injectable for tests).
+
+    Example:
+        >>> cache = VerdictCache(max_entries=50_000, ttl_seconds=600)
+        >>> verdict = cache.adjudicate(comment, rule_index)
+        >>> cache.stats()["hit_rate"]
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 10000,
+        ttl_seconds: Optional[float] = 3600.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_entries = max(1, int(max_entries))
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries: "OrderedDict[CacheKey, Tuple[Optional[float], Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def make_key(
+        comment: str,
+        rules_json: Union[Dict[str, Any], RuleIndex],
+        *,
+        exact_threshold: float = 0.34,
+        semantic_threshold: float = 0.28,
+        top_k: Optional[int] = None,
+    ) -> CacheKey:
+        if isinstance(rules_json, RuleIndex):
+            fingerprint = rules_json.fingerprint
+        else:
+            rules = rules_json.get("rules") if isinstance(rules_json, dict) else None
+            fingerprint = rulebook_fingerprint({"rules": list(rules or [])})
+        return (
+            fingerprint,
+            _normalize_text(comment or ""),
+            float(exact_threshold),
+            float(semantic_threshold),
+            top_k,
+        )
+
+    def get(self, key: CacheKey) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, verdict = entry
+            if expires_at is not None and self._clock() >= expires_at:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return copy.deepcopy(verdict)
+
+    def put(self, key: CacheKey, verdict: Dict[str, Any]) -> None:
+        expires_at = None if self.ttl_seconds is None else self._clock() + self.ttl_seconds
+        with self._lock:
+            self._entries[key] = (expires_at, copy.deepcopy(verdict))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+    def adjudicate(
+        self,
+        comment: str,
+        rules_json: Union[Dict[str, Any], RuleIndex],
+        **options: Any,
+    ) -> Dict[str, Any]:
+        """Cached ``adjudicate_comment``; ``options`` are its keyword arguments."""
+        key = self.make_key(comment, rules_json, **options)
+        verdict = self.get(key)
+        if verdict is None:
+            verdict = adjudicate_comment(comment, rules_json, **options)
+            self.put(key, verdict)
+        return verdict
+
+    def adjudicate_many(
+        self,
+        comments: List[str],
+        rules_json: Union[Dict[str, Any], RuleIndex],
+        *,
+        exact_threshold: float = 0.34,
+        semantic_threshold: float = 0.28,
+    ) -> List[Dict[str, Any]]:
+        """Cached ``adjudicate_comments``: only unseen comments are scored, in one batch."""
+        index = rules_json if isinstance(rules_json, RuleIndex) else RuleIndex(rules_json)
+        thresholds = {"exact_threshold": exact_threshold, "semantic_threshold": semantic_threshold}
+        keys = [self.make_key(comment, index, **thresholds) for comment in comments]
+        results: List[Optional[Dict[str, Any]]] = [self.get(key) for key in keys]
+
+        # Duplicates within the batch are scored once.
+        missing: Dict[CacheKey, List[int]] = {}
+        for position, result in enumerate(results):
+            if result is None:
+                missing.setdefault(keys[position], []).append(position)
+        if missing:
+            first_positions = [positions[0] for positions in missing.values()]
+            scored = adjudicate_comments(
+                [comments[position] for position in first_positions], index, **thresholds
+            )
+            for (key, positions), verdict in zip(missing.items(), scored):
+                self.put(key, verdict)
+                for position in positions:
+                    results[position] = copy.deepcopy(verdict)
+        return results